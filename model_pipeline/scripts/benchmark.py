@@ -0,0 +1,280 @@
+import argparse
+import copy
+import json
+import multiprocessing
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import yaml
+
+from helper.load_config import load_config
+from helper.synthetic_data import MANIFEST_FILE, generate_dataset, get_generation_config
+from helper.warm_runner import SCRIPTS_DIR, WARM_MODULES, WarmRunner
+
+RESULTS_SCHEMA_VERSION = 1
+STAGES = ("train", "validate", "register")
+STAGE_SCRIPTS = {"train": "train.py", "validate": "validate_model.py", "register": "register_model.py"}
+
+
+def get_benchmark_config(config):
+    """Settings for the benchmark grid from config["benchmark"]."""
+    return {
+        "dir": "./.benchmark",
+        "rows": [1000, 10000, 100000],
+        "features": [10, 100],
+        "models": [m["name"] for m in config["models"]],
+        "repeats": 1,
+        "max_cells": 200_000_000,   # rows * features; larger grid points are skipped
+        "timeout_s": 3600,
+        "baseline": "./benchmarks/baseline.json",
+        "tolerance": 0.25,
+        "min_delta_s": 0.5,
+        **config.get("benchmark", {}),
+    }
+
+
+def _git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=SCRIPTS_DIR,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _environment():
+    import mlflow
+    import numpy
+    import pandas
+    import sklearn
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "git_commit": _git_commit(),
+        "packages": {"numpy": numpy.__version__, "pandas": pandas.__version__,
+                     "scikit-learn": sklearn.__version__, "mlflow": mlflow.__version__},
+    }
+
+
+def prepare_grid_point(config, bench_cfg, rows, features):
+    """
+    Dataset and pipeline config for one grid point, under <dir>/r<rows>_f<features>.
+
+    Datasets are deterministic and reused across benchmark runs. All grid points log to
+    one file-based MLflow store under <dir>/mlruns; stage caches are off so every stage
+    does its full work, and the run index is kept in memory.
+    """
+    bench_dir = Path(bench_cfg["dir"]).resolve()
+    point_dir = bench_dir / f"r{rows}_f{features}"
+    point_dir.mkdir(parents=True, exist_ok=True)
+    data_dir = bench_dir / "data" / f"r{rows}_f{features}"
+    data_path = data_dir / MANIFEST_FILE
+    if not data_path.exists():
+        params = get_generation_config(config)
+        generate_dataset({**params, "n_samples": rows, "n_features": features,
+                          "n_redundant": min(params["n_redundant"], features - params["n_informative"])}, data_dir)
+
+    point_config = copy.deepcopy(config)
+    point_config["mlflow"] = {"tracking_uri": (bench_dir / "mlruns").as_uri()}
+    point_config.setdefault("platform", {})["use_azureml"] = False
+    point_config["data"] = {**config["data"], "path": str(data_path), "output_dir": str(point_dir / "Outputs"),
+                            "cache_dir": str(bench_dir / "cache" / "data")}
+    point_config["data"].pop("columns", None)
+    point_config["model_cache"] = {**config.get("model_cache", {}), "dir": str(bench_dir / "cache" / "models")}
+    point_config["stage_cache"] = {"enabled": False}
+    point_config["run_index"] = {"enabled": False}
+    point_config.pop("benchmark", None)
+    config_path = point_dir / "config.yaml"
+    with open(config_path, "w") as f:
+        yaml.safe_dump(point_config, f, sort_keys=False)
+    return config_path, point_dir
+
+
+def _stage_argv(stage, config_path, model, run_id_file, status_file):
+    argv = [sys.executable, str(SCRIPTS_DIR / STAGE_SCRIPTS[stage]), "--config", str(config_path),
+            "--models", model, "--run-id-file", str(run_id_file)]
+    if stage == "train":
+        return argv + ["--workers", "1"]
+    return argv + ["--status-file", str(status_file)]
+
+
+def _run_stage(runner, argv, log_path, timeout_s):
+    """One stage run: (returncode, seconds in the stage itself, peak RSS in MB or None)."""
+    with open(log_path, "a") as log:
+        log.write(f"$ {' '.join(argv)}\n")
+        if runner is not None:
+            returncode, timings = runner.execute(argv, log, timeout_s)
+            return returncode, timings.get("run_s"), timings.get("max_rss_mb")
+        started = time.perf_counter()
+        result = subprocess.run(argv, stdout=log, stderr=subprocess.STDOUT, timeout=timeout_s)
+        return result.returncode, time.perf_counter() - started, None
+
+
+def run_grid_point(runner, config, bench_cfg, rows, features):
+    """Train, validate and register each model once per repeat; one result record per model and stage."""
+    config_path, point_dir = prepare_grid_point(config, bench_cfg, rows, features)
+    test_size = config["data"].get("split", {}).get("test_size", 0.2)
+    stage_rows = {"train": round(rows * (1 - test_size)), "validate": round(rows * test_size), "register": None}
+    results = []
+    for model in bench_cfg["models"]:
+        samples = {stage: [] for stage in STAGES}
+        failed = None
+        for repeat in range(bench_cfg["repeats"]):
+            run_id_file = point_dir / f"{model}_run_id.txt"
+            status_file = point_dir / f"{model}_status.txt"
+            for stage in STAGES:
+                log_path = point_dir / f"{model}_{stage}.log"
+                try:
+                    returncode, run_s, max_rss_mb = _run_stage(
+                        runner, _stage_argv(stage, config_path, model, run_id_file, status_file),
+                        log_path, bench_cfg["timeout_s"])
+                except subprocess.TimeoutExpired:
+                    returncode, run_s, max_rss_mb = "timeout", None, None
+                if returncode != 0 or run_s is None:
+                    failed = (stage, f"{'timed out' if returncode == 'timeout' else 'failed'}, see {log_path}")
+                    break
+                samples[stage].append((run_s, max_rss_mb))
+                print(f"   {rows:>9} x {features:<5} {model:<10} {stage:<9} {run_s:8.3f}s"
+                      + (f" {max_rss_mb:9.1f} MB" if max_rss_mb is not None else ""))
+            if failed:
+                break
+        for stage in STAGES:
+            record = {"rows": rows, "features": features, "model": model, "stage": stage}
+            if not samples[stage]:
+                reason = failed[1] if failed and failed[0] == stage else "skipped after an earlier stage failed"
+                results.append({**record, "status": "failed", "reason": reason})
+                continue
+            latencies = [run_s for run_s, _ in samples[stage]]
+            peaks = [peak for _, peak in samples[stage] if peak is not None]
+            latency_s = statistics.median(latencies)
+            results.append({
+                **record, "status": "ok", "repeats": len(latencies),
+                "latency_s": round(latency_s, 4), "min_latency_s": round(min(latencies), 4),
+                "rows_per_s": round(stage_rows[stage] / latency_s, 1) if stage_rows[stage] else None,
+                "max_rss_mb": round(max(peaks), 1) if peaks else None,
+            })
+    return results
+
+
+def result_key(record):
+    return f"{record['rows']}x{record['features']}/{record['model']}/{record['stage']}"
+
+
+def compare_to_baseline(results, baseline, tolerance, min_delta_s):
+    """
+    Regressions against a baseline results file: a stage more than `tolerance` slower
+    (and at least min_delta_s slower, to ignore noise on short stages) or using more than
+    `tolerance` more peak memory. Grid points missing from the baseline are not compared.
+    """
+    previous = {result_key(r): r for r in baseline["results"] if r["status"] == "ok"}
+    regressions = []
+    for record in results:
+        base = previous.get(result_key(record))
+        if base is None:
+            continue
+        if record["status"] != "ok":
+            regressions.append(f"{result_key(record)}: {record['reason']}")
+            continue
+        slower = record["latency_s"] - base["latency_s"]
+        if record["latency_s"] > base["latency_s"] * (1 + tolerance) and slower >= min_delta_s:
+            regressions.append(f"{result_key(record)}: latency {base['latency_s']:.3f}s -> {record['latency_s']:.3f}s")
+        if record["max_rss_mb"] and base.get("max_rss_mb") and record["max_rss_mb"] > base["max_rss_mb"] * (1 + tolerance):
+            regressions.append(f"{result_key(record)}: peak RSS {base['max_rss_mb']:.1f} MB -> {record['max_rss_mb']:.1f} MB")
+    return regressions
+
+
+def _number(value):
+    return int(float(value))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Train/validate/register benchmark over a rows x features grid")
+    parser.add_argument("--config", type=str, required=True, help="Path to job config YAML")
+    parser.add_argument("--rows", type=_number, nargs="+", help="Dataset sizes, e.g. 1e3 1e5 1e7 (default: benchmark.rows)")
+    parser.add_argument("--features", type=_number, nargs="+", help="Feature counts, e.g. 10 100 1000 (default: benchmark.features)")
+    parser.add_argument("--models", nargs="+", help="Model names (default: benchmark.models)")
+    parser.add_argument("--repeats", type=int, help="Runs per stage; latency is the median (default: benchmark.repeats)")
+    parser.add_argument("--output", type=str, help="Results file (default: <dir>/results/benchmark_<time>_<commit>.json)")
+    parser.add_argument("--baseline", type=str, help="Baseline results to compare with (default: benchmark.baseline)")
+    parser.add_argument("--tolerance", type=float, help="Allowed relative slowdown / memory growth (default: benchmark.tolerance)")
+    parser.add_argument("--save-baseline", action="store_true", help="Also write the results as the new baseline")
+    args = parser.parse_args()
+
+    config = load_config(args.config)
+    bench_cfg = get_benchmark_config(config)
+    for key in ("rows", "features", "models", "repeats", "baseline", "tolerance"):
+        if getattr(args, key) is not None:
+            bench_cfg[key] = getattr(args, key)
+    unknown = set(bench_cfg["models"]) - {m["name"] for m in config["models"]}
+    if unknown:
+        raise ValueError(f"Unknown models in benchmark: {sorted(unknown)}")
+
+    runner = None
+    if "forkserver" in multiprocessing.get_all_start_methods():
+        # Stages fork from a warm parent, so latency is the stage's own work, not interpreter startup
+        runner = WarmRunner(WARM_MODULES).start()
+    else:
+        print("⚠️ No forkserver start method; stages run as subprocesses and latency includes startup")
+
+    environment = _environment()
+    print(f"📏 Benchmark grid: rows {bench_cfg['rows']} x features {bench_cfg['features']}, "
+          f"models {bench_cfg['models']}, {bench_cfg['repeats']} repeat(s)")
+    results = []
+    started = time.perf_counter()
+    for rows in bench_cfg["rows"]:
+        for features in bench_cfg["features"]:
+            if rows * features > bench_cfg["max_cells"]:
+                print(f"⏭️ Skipping {rows} x {features}: more than max_cells={bench_cfg['max_cells']}")
+                results += [{"rows": rows, "features": features, "model": model, "stage": stage,
+                             "status": "skipped", "reason": "rows * features above max_cells"}
+                            for model in bench_cfg["models"] for stage in STAGES]
+                continue
+            results += run_grid_point(runner, config, bench_cfg, rows, features)
+
+    report = {
+        "schema_version": RESULTS_SCHEMA_VERSION,
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "environment": environment,
+        "grid": {key: bench_cfg[key] for key in ("rows", "features", "models", "repeats", "max_cells")},
+        "total_s": round(time.perf_counter() - started, 2),
+        "results": results,
+    }
+    output = Path(args.output or Path(bench_cfg["dir"]) / "results" /
+                  f"benchmark_{time.strftime('%Y%m%d_%H%M%S')}_{environment['git_commit'] or 'nogit'}.json")
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2))
+    print(f"💾 Results written to {output}")
+
+    failures = [r for r in results if r["status"] == "failed"]
+    baseline_path = Path(bench_cfg["baseline"])
+    regressions = []
+    if baseline_path.exists():
+        baseline = json.loads(baseline_path.read_text())
+        if baseline.get("schema_version") != RESULTS_SCHEMA_VERSION:
+            raise ValueError(f"Baseline {baseline_path} has schema version {baseline.get('schema_version')}, "
+                             f"expected {RESULTS_SCHEMA_VERSION}")
+        regressions = compare_to_baseline(results, baseline, bench_cfg["tolerance"], bench_cfg["min_delta_s"])
+        print(f"📊 Compared with baseline {baseline_path} (commit {baseline['environment'].get('git_commit')}, "
+              f"tolerance {bench_cfg['tolerance']:.0%}): {len(regressions)} regression(s)")
+        for regression in regressions:
+            print(f"   ❌ {regression}")
+    else:
+        print(f"ℹ️ No baseline at {baseline_path}; nothing to compare")
+    if args.save_baseline:
+        baseline_path.parent.mkdir(parents=True, exist_ok=True)
+        baseline_path.write_text(json.dumps(report, indent=2))
+        print(f"📌 Baseline saved to {baseline_path}")
+
+    for failure in failures:
+        print(f"   ❌ {result_key(failure)}: {failure['reason']}")
+    if regressions or failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
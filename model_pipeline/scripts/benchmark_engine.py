@@ -0,0 +1,115 @@
+import argparse
+import json
+import statistics
+import time
+from pathlib import Path
+
+import mlflow
+import numpy as np
+from mlflow.tracking import MlflowClient
+
+from helper.load_config import load_config
+from helper.setup_mlflow import setup_mlflow
+from helper.data_loader import load_training_data
+from helper.model_cache import get_model_cache
+from helper.forest_engine import ENGINE_ARTIFACT_PATH, CompiledForest
+from helper.scoring import find_model_config, resolve_model_version
+
+MAX_CALLS = 200   # predict calls per batch size; small batches cover fewer rows
+
+
+def _timed(fn, repeats):
+    """Median and best wall time of fn() over repeats calls, and its last result."""
+    times, result = [], None
+    for _ in range(repeats):
+        started = time.perf_counter()
+        result = fn()
+        times.append(time.perf_counter() - started)
+    return statistics.median(times), min(times), result
+
+
+def _predict_all(model, X, batch_size):
+    return np.concatenate([model.predict_proba(X[start:start + batch_size])
+                           for start in range(0, len(X), batch_size)])
+
+
+def benchmark_engine(config, model, rows, batch_sizes, repeats, version=None, stage=None):
+    """
+    Load time and batch prediction speed of a registered forest's compiled engine
+    against its sklearn model, on the first `rows` rows of the training data.
+    """
+    client = MlflowClient()
+    model_cfg = find_model_config(config, model)
+    model_version = resolve_model_version(client, model_cfg["model_name"], version, stage)
+    run_id = model_version.run_id
+    if not client.list_artifacts(run_id, ENGINE_ARTIFACT_PATH):
+        raise ValueError(f"Run {run_id} has no compiled engine; retrain {model_cfg['name']} to log one")
+    model_cache = get_model_cache(config, client)
+    sklearn_path = model_cache.get_local_path(run_id, "model")
+    engine_path = model_cache.get_local_path(run_id, ENGINE_ARTIFACT_PATH)
+    print(f"⏱️ Benchmarking {model_cfg['model_name']} v{model_version.version} (run {run_id})")
+
+    X, _ = load_training_data(config)
+    X = X.iloc[:rows]
+    sklearn_load, _, sklearn_model = _timed(lambda: mlflow.sklearn.load_model(str(sklearn_path)), repeats)
+    engine_load, _, engine = _timed(lambda: CompiledForest.load(engine_path), repeats)
+    # First prediction right after loading also pages in the memory-mapped arrays
+    first_call, _, _ = _timed(lambda: CompiledForest.load(engine_path).predict_proba(X[:1]), repeats)
+
+    results = {
+        "model": model_cfg["model_name"], "version": str(model_version.version), "run_id": run_id,
+        "rows": len(X), "layout": engine.layout, "n_trees": engine.n_trees, "max_depth": engine.max_depth,
+        "identical": bool(np.array_equal(sklearn_model.predict_proba(X), engine.predict_proba(X))),
+        "load_s": {"sklearn": round(sklearn_load, 5), "compiled": round(engine_load, 5),
+                   "compiled_first_prediction": round(first_call, 5)},
+        "predict": [],
+    }
+    for batch_size in batch_sizes:
+        batch_size = min(batch_size or len(X), len(X))
+        X_batches = X.iloc[:batch_size * MAX_CALLS]
+        row = {"batch_size": batch_size, "rows": len(X_batches)}
+        for name, predictor in (("sklearn", sklearn_model), ("compiled", engine)):
+            median, best, _ = _timed(lambda: _predict_all(predictor, X_batches, batch_size), repeats)
+            row[name] = {"seconds": round(median, 4), "best_s": round(best, 4),
+                         "rows_per_s": round(len(X_batches) / median, 1),
+                         "ms_per_batch": round(1000 * median / -(-len(X_batches) // batch_size), 4)}
+        row["speedup"] = round(row["sklearn"]["seconds"] / row["compiled"]["seconds"], 2)
+        results["predict"].append(row)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compiled forest engine vs sklearn: load time and prediction speed")
+    parser.add_argument("--config", type=str, required=True, help="Path to job config YAML")
+    parser.add_argument("--model", type=str, default="model_rf", help="Config name or registered model name")
+    group = parser.add_mutually_exclusive_group()
+    group.add_argument("--version", type=str, help="Registered model version (default: latest)")
+    group.add_argument("--stage", type=str, help="Registered model stage, e.g. Production")
+    parser.add_argument("--rows", type=int, default=20000, help="Rows of the training data to predict")
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 64, 1024, 0],
+                        help="Rows per predict call; 0 means all rows in one call")
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+
+    config = load_config(args.config)
+    setup_mlflow(config)
+    results = benchmark_engine(config, args.model, args.rows, args.batch_sizes, args.repeats, args.version, args.stage)
+
+    print(f"🌲 {results['n_trees']} trees, depth {results['max_depth']}, {results['layout']} layout; "
+          f"predictions identical: {results['identical']}")
+    load = results["load_s"]
+    print(f"   load       sklearn {load['sklearn'] * 1000:9.2f} ms   compiled {load['compiled'] * 1000:9.2f} ms "
+          f"(+ first prediction {load['compiled_first_prediction'] * 1000:.2f} ms)")
+    for row in results["predict"]:
+        print(f"   batch {row['batch_size']:>6}  sklearn {row['sklearn']['rows_per_s']:>12,.0f} rows/s   "
+              f"compiled {row['compiled']['rows_per_s']:>12,.0f} rows/s   {row['speedup']:.2f}x")
+    output_path = Path(config["data"]["output_dir"]) / f"engine_benchmark_{results['model']}_v{results['version']}.json"
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    output_path.write_text(json.dumps(results, indent=2))
+    print(f"💾 Results written to {output_path}")
+    if not results["identical"]:
+        raise ValueError("Compiled engine predictions differ from the sklearn model")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,16 +1,71 @@
 # data_gen.py
+import argparse
+import json
+from pathlib import Path
+
 import numpy as np
 import pandas as pd
 
-def generate_classification_data(n_samples=1000, n_features=10, random_state=42):
+from helper.load_config import load_config
+from helper.synthetic_data import GENERATION_FORMATS, MANIFEST_FILE, generate_dataset, get_generation_config
+
+
+def generate_classification_data(n_samples=1000, n_features=10, random_state=42,
+                                 output_path="./data/train_data.csv"):
+    """Small single-CSV dataset held in memory; use generate_dataset() for large ones."""
     from sklearn.datasets import make_classification
-    X, y = make_classification(n_samples=n_samples, n_features=n_features, 
+    X, y = make_classification(n_samples=n_samples, n_features=n_features,
                                n_informative=6, n_redundant=2, n_classes=2,
                                random_state=random_state)
     df = pd.DataFrame(X, columns=[f"feature_{i}" for i in range(X.shape[1])])
     df["target"] = y
-    df.to_csv("./data/train_data.csv", index=False)
-    print("Data saved to train_data.csv")
+    df.to_csv(output_path, index=False)
+    print(f"Data saved to {output_path}")
+
+
+def _number(value):
+    return int(float(value))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sharded synthetic classification data (parquet / npy / csv parts + manifest)")
+    parser.add_argument("--config", type=str, help="Job config YAML with a data_generation block")
+    parser.add_argument("--rows", type=_number, help="Total rows, e.g. 1e8")
+    parser.add_argument("--features", type=int)
+    parser.add_argument("--informative", type=int, help="Informative features")
+    parser.add_argument("--redundant", type=int, help="Linear combinations of the informative features")
+    parser.add_argument("--classes", type=int)
+    parser.add_argument("--weights", type=float, nargs="+", help="Class proportions, e.g. 0.9 0.1")
+    parser.add_argument("--seed", type=int)
+    parser.add_argument("--shard-rows", type=_number, help="Rows per part file")
+    parser.add_argument("--format", choices=GENERATION_FORMATS)
+    parser.add_argument("--output-dir", type=str)
+    parser.add_argument("--workers", type=int, help="Processes generating shards (default: CPU count)")
+    parser.add_argument("--shard", type=int, nargs="+",
+                        help="Only (re)generate these shards, with the parameters in the output directory's manifest")
+    parser.add_argument("--legacy-csv", action="store_true", help="Write the small ./data/train_data.csv instead")
+    args = parser.parse_args()
+
+    if args.legacy_csv:
+        generate_classification_data()
+        return
+
+    overrides = {"n_samples": args.rows, "n_features": args.features, "n_informative": args.informative,
+                 "n_redundant": args.redundant, "n_classes": args.classes, "weights": args.weights,
+                 "seed": args.seed, "shard_rows": args.shard_rows, "format": args.format,
+                 "output_dir": args.output_dir, "workers": args.workers}
+    config = load_config(args.config) if args.config else {}
+    params = get_generation_config({"data_generation": {
+        **config.get("data_generation", {}), **{k: v for k, v in overrides.items() if v is not None}}})
+    manifest_path = Path(params["output_dir"]) / MANIFEST_FILE
+    if args.shard and manifest_path.exists():
+        # Regenerate from the parameters the dataset was made with
+        params = {**json.loads(manifest_path.read_text())["params"],
+                  "output_dir": params["output_dir"], "workers": params["workers"]}
+    manifest = generate_dataset(params, shards=args.shard)
+    counts = np.asarray(manifest["class_counts"])
+    print(f"📊 Class balance: {dict(enumerate(np.round(counts / counts.sum(), 4).tolist()))}")
+
 
 if __name__ == "__main__":
-    generate_classification_data()
+    main()
@@ -0,0 +1,214 @@
+import shutil
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from pathlib import Path
+
+from mlflow.exceptions import MlflowException
+from mlflow.tracking import MlflowClient
+
+from helper.profiling import span
+
+# MLflow errors that will not go away on a retry
+PERMANENT_ERROR_CODES = {"INVALID_PARAMETER_VALUE", "RESOURCE_DOES_NOT_EXIST", "INVALID_STATE", "PERMISSION_DENIED"}
+MB = 1024 * 1024
+
+
+def get_upload_config(config):
+    """Background artifact upload settings from config["artifact_upload"]."""
+    return {
+        "enabled": True,
+        "workers": 4,
+        "max_pending": 16,
+        "small_file_kb": 256,
+        "linger_ms": 50,
+        "retries": 3,
+        "backoff_s": 0.5,
+        **config.get("artifact_upload", {}),
+    }
+
+
+def _is_transient(exc) -> bool:
+    if isinstance(exc, MlflowException):
+        return exc.error_code not in PERMANENT_ERROR_CODES
+    return isinstance(exc, OSError)
+
+
+class _Batch:
+    """Small files for one (run, artifact path), staged in a directory and sent with one log_artifacts."""
+
+    def __init__(self, run_id, artifact_path, staging_dir):
+        self.run_id = run_id
+        self.artifact_path = artifact_path
+        self.dir = staging_dir
+        self.files = 0
+        self.bytes = 0
+
+
+class ArtifactUploader:
+    """
+    Upload MLflow run artifacts from background threads while the caller keeps computing.
+
+    log_artifact() returns once the file is queued. Files below small_file_kb are
+    copied into a staging directory per (run, artifact path); files queued while
+    that directory waits for a worker join it and go up as one log_artifacts request.
+    Larger files are uploaded from their own path, so they must not change until
+    flushed. Transient failures are retried with exponential backoff. flush() waits
+    for everything queued (for one run, or all runs) and raises the first upload that
+    still failed; leaving the context flushes, so artifacts are in the run before it
+    ends. At most max_pending uploads are queued; log_artifact blocks beyond that.
+
+        with ArtifactUploader(client, get_upload_config(config)) as uploader:
+            uploader.log_artifact(run_id, "schema.json")
+            uploader.log_artifact(run_id, engine_path, artifact_path="engine")
+    """
+
+    def __init__(self, client: MlflowClient = None, upload_cfg=None, verbose: bool = True):
+        self.client = client or MlflowClient()
+        self.cfg = upload_cfg or get_upload_config({})
+        self.verbose = verbose
+        self._pool = None
+        if self.cfg["enabled"]:
+            self._pool = ThreadPoolExecutor(self.cfg["workers"], thread_name_prefix="artifact-upload")
+        self._slots = threading.BoundedSemaphore(self.cfg["max_pending"])
+        self._lock = threading.Lock()
+        self._futures = {}     # run_id -> futures not yet flushed
+        self._open = {}        # (run_id, artifact_path) -> _Batch still accepting files
+        self._staging_root = None
+        self.files_queued = 0
+        self.bytes_queued = 0
+        self.bytes_uploaded = 0
+        self.requests_sent = 0
+        self.retries = 0
+        self.wait_s = 0.0      # time the caller was blocked on uploads (full queue or flush)
+
+    def log_artifact(self, run_id, local_path, artifact_path=None):
+        """Queue a file for upload to the run (under artifact_path)."""
+        local_path = Path(local_path)
+        size = local_path.stat().st_size
+        with self._lock:
+            self.files_queued += 1
+            self.bytes_queued += size
+        if self._pool is None:
+            started = time.perf_counter()
+            self._upload_file(run_id, local_path, artifact_path, size)
+            with self._lock:
+                self.wait_s += time.perf_counter() - started
+        elif size < self.cfg["small_file_kb"] * 1024:
+            self._stage(run_id, local_path, artifact_path, size)
+        else:
+            self._submit(run_id, self._upload_file, run_id, local_path, artifact_path, size)
+
+    def _stage(self, run_id, local_path, artifact_path, size):
+        key = (run_id, artifact_path)
+        with self._lock:
+            batch = self._open.get(key)
+            if batch is not None:
+                # Copied under the lock so the worker cannot seal the batch halfway
+                shutil.copy2(local_path, batch.dir / local_path.name)
+                batch.files += 1
+                batch.bytes += size
+                return
+            if self._staging_root is None:
+                self._staging_root = Path(tempfile.mkdtemp(prefix="artifact-upload-"))
+            batch = _Batch(run_id, artifact_path, Path(tempfile.mkdtemp(dir=self._staging_root)))
+            shutil.copy2(local_path, batch.dir / local_path.name)
+            batch.files, batch.bytes = 1, size
+            self._open[key] = batch
+        self._submit(run_id, self._upload_batch, batch)
+
+    def _submit(self, run_id, fn, *args):
+        started = time.perf_counter()
+        self._slots.acquire()
+        waited = time.perf_counter() - started
+        future = self._pool.submit(fn, *args)
+        future.add_done_callback(lambda _: self._slots.release())
+        with self._lock:
+            self.wait_s += waited
+            self._futures.setdefault(run_id, []).append(future)
+
+    def _with_retries(self, what, fn):
+        attempt = 0
+        while True:
+            try:
+                fn()
+                with self._lock:
+                    self.requests_sent += 1
+                return
+            except Exception as exc:
+                if attempt >= self.cfg["retries"] or not _is_transient(exc):
+                    raise
+                delay = self.cfg["backoff_s"] * 2 ** attempt
+                attempt += 1
+                with self._lock:
+                    self.retries += 1
+                print(f"⚠️ Upload of {what} failed ({exc}); retry {attempt}/{self.cfg['retries']} in {delay:.1f}s")
+                time.sleep(delay)
+
+    def _upload_file(self, run_id, local_path, artifact_path, size):
+        with span("mlflow.log_artifact", file=local_path.name):
+            self._with_retries(local_path.name,
+                               lambda: self.client.log_artifact(run_id, str(local_path), artifact_path))
+        with self._lock:
+            self.bytes_uploaded += size
+
+    def _upload_batch(self, batch):
+        # Give files written right after this one a moment to join the batch
+        time.sleep(self.cfg["linger_ms"] / 1000)
+        with self._lock:
+            self._open.pop((batch.run_id, batch.artifact_path), None)
+        try:
+            with span("mlflow.log_artifacts", files=batch.files):
+                self._with_retries(f"{batch.files} files",
+                                   lambda: self.client.log_artifacts(batch.run_id, str(batch.dir), batch.artifact_path))
+            with self._lock:
+                self.bytes_uploaded += batch.bytes
+        finally:
+            shutil.rmtree(batch.dir, ignore_errors=True)
+
+    def flush(self, run_id=None):
+        """Wait for the queued uploads of one run (or all runs); raises the first failed upload."""
+        with self._lock:
+            run_ids = [run_id] if run_id else list(self._futures)
+            futures = [future for rid in run_ids for future in self._futures.pop(rid, [])]
+        if not futures:
+            return
+        started = time.perf_counter()
+        with span("upload.wait", uploads=len(futures)):
+            wait(futures)
+        with self._lock:
+            self.wait_s += time.perf_counter() - started
+        for future in futures:
+            if future.exception() is not None:
+                raise future.exception()
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=True)
+        if self._staging_root is not None:
+            shutil.rmtree(self._staging_root, ignore_errors=True)
+
+    def report(self):
+        print(f"📤 Uploaded {self.files_queued} artifacts ({self.bytes_uploaded / MB:.2f} of "
+              f"{self.bytes_queued / MB:.2f} MB queued) in {self.requests_sent} requests"
+              + (f", {self.retries} retries" if self.retries else "")
+              + f"; blocked {self.wait_s:.2f}s waiting on uploads")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        try:
+            try:
+                self.flush()
+            except Exception as upload_exc:
+                if exc_type is None:
+                    raise
+                # Do not hide the error that ended the block
+                print(f"⚠️ Artifact upload failed: {upload_exc}")
+        finally:
+            self.close()
+        if self.verbose:
+            self.report()
+        return False
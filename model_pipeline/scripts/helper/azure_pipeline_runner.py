@@ -2,11 +2,15 @@ import subprocess
 import yaml
 from string import Template
 import os
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
 import hashlib
 import tempfile
 
 AZUREML_COMPONENT_PREFIX = "azureml"
+DEFAULT_COMPONENT_CACHE = "./.cache/azure_components.json"
 
 def get_component_hash(yaml_path: str) -> str:
     """Generate a hash based on the content of the component YAML."""
@@ -14,54 +18,60 @@ def get_component_hash(yaml_path: str) -> str:
         content = f.read()
         return hashlib.sha256(content).hexdigest()
 
-def get_latest_component_version_number(component_name: str) -> str:
-    """Get the latest version number (just the version, not full ID)."""
+def _version_key(version: str):
+    return [int(s) if s.isdigit() else s for s in str(version).split('.')]
+
+def get_workspace(platform_cfg: dict) -> dict:
+    """
+    The workspace the `az ml` calls go to: platform.subscription_id, resource_group and
+    workspace_name when all are set (they are then passed to every call), otherwise
+    the az CLI defaults (`az account show`, `az configure --list-defaults`).
+    """
+    keys = ("subscription_id", "resource_group", "workspace_name")
+    if all(platform_cfg.get(key) for key in keys):
+        workspace = {key: platform_cfg[key] for key in keys}
+        workspace["args"] = ["--subscription", workspace["subscription_id"],
+                             "--resource-group", workspace["resource_group"],
+                             "--workspace-name", workspace["workspace_name"]]
+        return workspace
+    subscription = subprocess.check_output(["az", "account", "show", "--query", "id", "-o", "tsv"], text=True).strip()
+    defaults = {d["name"]: d["value"] for d in json.loads(
+        subprocess.check_output(["az", "configure", "--list-defaults", "-o", "json"], text=True) or "[]")}
+    return {"subscription_id": subscription, "resource_group": defaults.get("group", ""),
+            "workspace_name": defaults.get("workspace", ""), "args": []}
+
+def workspace_key(workspace: dict) -> str:
+    return "/".join(workspace[key] for key in ("subscription_id", "resource_group", "workspace_name"))
+
+def get_component_versions(component_name: str, workspace_args=()) -> list:
+    """All registered versions of a component with their hash tag, from a single `az` call."""
     try:
         output = subprocess.check_output([
             "az", "ml", "component", "list",
             "--name", component_name,
-            "--query", "[].version",
-            "-o", "tsv"
+            "--query", "[].{version: version, hash: tags.hash}",
+            "-o", "json", *workspace_args
         ], text=True)
-        versions = output.strip().splitlines()
-        if versions:
-            return sorted(versions, key=lambda v: [int(s) if s.isdigit() else s for s in v.split('.')])[-1]
+        return json.loads(output or "[]")
     except subprocess.CalledProcessError:
-        return None
-
-def get_registered_component_hash(component_name: str) -> str:
-    """Fetch the hash tag of the latest registered component (if any)."""
-    version = get_latest_component_version_number(component_name)
-    if not version:
-        return None
-    try:
-        output = subprocess.check_output([
-            "az", "ml", "component", "show",
-            "--name", component_name,
-            "--version", version,
-            "--query", "tags.hash",
-            "-o", "tsv"
-        ], text=True).strip()
-        return output if output else None
-    except subprocess.CalledProcessError:
-        return None
-
-def register_component_if_needed(component_yaml_path: str) -> str:
-    with open(component_yaml_path) as f:
-        component_yaml = yaml.safe_load(f)
-        component_name = component_yaml.get("name")
-
-    new_hash = get_component_hash(component_yaml_path)
-    existing_hash = get_registered_component_hash(component_name)
-
-    if existing_hash == new_hash:
-        version = get_latest_component_version_number(component_name)
-        component_id = f"{AZUREML_COMPONENT_PREFIX}:{component_name}:{version}"
-        print(f"✅ No changes in {component_name}, using existing: {component_id}")
-        return component_id
-
-    print(f"📦 Registering updated component: {component_name}")
-
+        return []
+
+def load_component_cache(cache_path: Path) -> dict:
+    """{workspace key: {component name: {hash, component_id}}}; entries of the old per-name layout are dropped."""
+    if cache_path.exists():
+        with open(cache_path) as f:
+            return {key: value for key, value in json.load(f).items() if "component_id" not in value}
+    return {}
+
+def save_component_cache(cache_path: Path, cache: dict):
+    cache_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = cache_path.with_name(f"{cache_path.name}.{os.getpid()}.tmp")
+    with open(tmp_path, "w") as f:
+        json.dump(cache, f, indent=2)
+    os.replace(tmp_path, cache_path)
+
+def _create_component(component_yaml_path: str, component_yaml: dict, new_hash: str, workspace_args=()) -> str:
+    """Register the component and return the new version (taken from the create output)."""
     component_dir = Path(component_yaml_path).parent.resolve()
 
     # Inject base_path into the component YAML
@@ -69,13 +79,9 @@ def register_component_if_needed(component_yaml_path: str) -> str:
 
     # Preserve relative paths but include base_path so they resolve properly
     if "code" in component_yaml:
-        relative_code_path = Path(component_yaml["code"])
-       # component_yaml["code"] = str(relative_code_path)
         component_yaml["code"] = str(Path(component_yaml_path).parent / component_yaml["code"])
 
     if "environment" in component_yaml and "conda_file" in component_yaml["environment"]:
-        relative_conda_path = Path(component_yaml["environment"]["conda_file"])
-#        component_yaml["environment"]["conda_file"] = str(relative_conda_path)
         component_yaml["environment"]["conda_file"] = str(Path(component_yaml_path).parent / component_yaml["environment"]["conda_file"])
 
     # Add or update tags
@@ -85,15 +91,80 @@ def register_component_if_needed(component_yaml_path: str) -> str:
         yaml.dump(component_yaml, tmp)
         tmp_path = tmp.name
 
-    subprocess.run([
-        "az", "ml", "component", "create",
-        "--file", tmp_path
-    ], check=True)
+    try:
+        output = subprocess.check_output([
+            "az", "ml", "component", "create",
+            "--file", tmp_path,
+            "-o", "json", *workspace_args
+        ], text=True)
+    finally:
+        os.unlink(tmp_path)
+    return str(json.loads(output)["version"])
+
+def register_component_if_needed(component_yaml_path: str, cache: dict = None, workspace_args=()):
+    """
+    Resolve a component YAML to a registered component id, registering it only if changed.
+
+    The workspace's local cache (component name -> {hash, component_id}) is checked first and
+    skips the CLI entirely; otherwise one `list` call finds the latest version and its
+    hash tag, and `create` runs only when the hash differs.
+    Returns (component_name, component_id, source) with source "cache", "registry" or "created".
+    """
+    with open(component_yaml_path) as f:
+        component_yaml = yaml.safe_load(f)
+        component_name = component_yaml.get("name")
+
+    new_hash = get_component_hash(component_yaml_path)
+    cached = (cache or {}).get(component_name)
+    if cached and cached["hash"] == new_hash:
+        print(f"✅ No changes in {component_name}, using cached: {cached['component_id']}")
+        return component_name, cached["component_id"], "cache"
 
-    version = get_latest_component_version_number(component_name)
+    versions = get_component_versions(component_name, workspace_args)
+    latest = max(versions, key=lambda v: _version_key(v["version"])) if versions else None
+
+    if latest and latest.get("hash") == new_hash:
+        component_id = f"{AZUREML_COMPONENT_PREFIX}:{component_name}:{latest['version']}"
+        print(f"✅ No changes in {component_name}, using existing: {component_id}")
+        return component_name, component_id, "registry"
+
+    print(f"📦 Registering updated component: {component_name}")
+    version = _create_component(component_yaml_path, component_yaml, new_hash, workspace_args)
     component_id = f"{AZUREML_COMPONENT_PREFIX}:{component_name}:{version}"
     print(f"✅ Registered: {component_id}")
-    return component_id
+    return component_name, component_id, "created"
+
+def _timed_register(component_yaml_path: str, cache: dict, workspace_args):
+    started = time.perf_counter()
+    return (*register_component_if_needed(component_yaml_path, cache, workspace_args), time.perf_counter() - started)
+
+def resolve_components(component_files, cache_path: Path, max_workers: int = None, workspace: dict = None) -> dict:
+    """
+    Resolve component YAMLs to component ids concurrently; returns {component name: component id}.
+
+    Results are written back to the cache file at cache_path, under the workspace
+    they were resolved in (delete it to force a fresh lookup, e.g. after components
+    were removed from the workspace).
+    """
+    workspace = workspace or get_workspace({})
+    workspaces = load_component_cache(cache_path)
+    cache = workspaces.setdefault(workspace_key(workspace), {})
+    resolved, timings = {}, {}
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max_workers or max(len(component_files), 1)) as pool:
+        futures = {pool.submit(_timed_register, str(path), cache, workspace["args"]): path for path in component_files}
+        for future in as_completed(futures):
+            component_name, component_id, source, seconds = future.result()
+            resolved[component_name] = component_id
+            timings[component_name] = (source, seconds)
+            cache[component_name] = {"hash": get_component_hash(str(futures[future])), "component_id": component_id}
+    save_component_cache(cache_path, workspaces)
+
+    print(f"⏱️ Resolved {len(resolved)} components in {time.perf_counter() - started:.2f}s:")
+    for component_name, (source, seconds) in sorted(timings.items()):
+        print(f"   {component_name:<16} {source:<9} {seconds:6.2f}s")
+    return resolved
 
 def render_pipeline_yaml(template_path, output_path, substitutions):
     with open(template_path, 'r') as file:
@@ -119,15 +190,20 @@ def run_azure_pipeline(config):
     template_path = jobs_dir / "pipeline_job_template.yaml"
     output_path = jobs_dir / "pipeline_job.yaml"
 
-    substitutions = {}
     print("🔁 Resolving components dynamically from folder...")
+    workspace = get_workspace(config["platform"])
+    component_files = [file for file in sorted(jobs_dir.glob("*_job.yaml"))
+                       if file.name not in ["pipeline_job_template.yaml", "pipeline_job.yaml"]]
+    resolved = resolve_components(
+        component_files,
+        cache_path=Path(config["platform"].get("component_cache", DEFAULT_COMPONENT_CACHE)),
+        max_workers=config["platform"].get("max_workers"),
+        workspace=workspace,
+    )
 
-    for file in jobs_dir.glob("*_job.yaml"):
-        if file.name in ["pipeline_job_template.yaml", "pipeline_job.yaml"]:
-            continue
-
-        component_name = file.stem.replace("_job", "")  # e.g., train_job.yaml → train
-        component_id = register_component_if_needed(str(file))
+    # Keyed by component name, e.g. train_model → ${train_model_component_id} in the template
+    substitutions = {}
+    for component_name, component_id in resolved.items():
         substitutions[f"{component_name}_component_id"] = component_id
         print(f"🔧 Registered or found: {component_name} → {component_id}")
 
@@ -145,5 +221,6 @@ def run_azure_pipeline(config):
         "az", "ml", "job", "create",
         "--file", str(output_path),
         "--set", f"inputs.config_path={config['job']['config_path']}",
-        "--set", f"inputs.compute_target={config['platform']['compute']}"
+        "--set", f"inputs.compute_target={config['platform']['compute']}",
+        *workspace["args"]
     ], check=True)
@@ -0,0 +1,104 @@
+import time
+
+from mlflow.entities import Metric, Param, RunTag
+from mlflow.tracking import MlflowClient
+
+from helper.profiling import span
+
+# MlflowClient.log_batch limits per request
+MAX_METRICS_PER_BATCH = 1000
+MAX_PARAMS_PER_BATCH = 100
+MAX_TAGS_PER_BATCH = 100
+
+
+class BatchLogger:
+    """
+    Buffer MLflow metrics, params and tags per run and send them with log_batch.
+
+    Repeated writes of the same metric (key, step), param or tag keep only the last
+    value. Buffers are sent on flush() or when the context exits; the logger counts
+    how many individual logging calls were requested and how many requests were made.
+    With a run_index, sent metrics and tags are also written to it (helper.run_index).
+
+        with BatchLogger(client) as logger:
+            logger.log_metrics(run_id, metrics)
+            logger.set_tags(run_id, {"evaluation_status": "accepted"})
+    """
+
+    def __init__(self, client: MlflowClient = None, verbose: bool = True, run_index=None):
+        self.client = client or MlflowClient()
+        self.verbose = verbose
+        self.run_index = run_index
+        self._buffers = {}
+        self.calls_requested = 0
+        self.requests_sent = 0
+
+    def _buffer(self, run_id):
+        return self._buffers.setdefault(run_id, {"metrics": {}, "params": {}, "tags": {}})
+
+    def log_metric(self, run_id, key, value, step=0, timestamp=None):
+        self.calls_requested += 1
+        timestamp = timestamp or int(time.time() * 1000)
+        self._buffer(run_id)["metrics"][(key, step)] = Metric(key, float(value), timestamp, step)
+
+    def log_metrics(self, run_id, metrics, step=0):
+        timestamp = int(time.time() * 1000)
+        for key, value in metrics.items():
+            self.log_metric(run_id, key, value, step, timestamp)
+
+    def log_param(self, run_id, key, value):
+        self.calls_requested += 1
+        self._buffer(run_id)["params"][key] = Param(key, str(value))
+
+    def log_params(self, run_id, params):
+        for key, value in params.items():
+            self.log_param(run_id, key, value)
+
+    def set_tag(self, run_id, key, value):
+        self.calls_requested += 1
+        self._buffer(run_id)["tags"][key] = RunTag(key, str(value))
+
+    def set_tags(self, run_id, tags):
+        for key, value in tags.items():
+            self.set_tag(run_id, key, value)
+
+    def _send(self, run_id, buffer):
+        metrics = list(buffer["metrics"].values())
+        params = list(buffer["params"].values())
+        tags = list(buffer["tags"].values())
+        while metrics or params or tags:
+            batch_metrics, metrics = metrics[:MAX_METRICS_PER_BATCH], metrics[MAX_METRICS_PER_BATCH:]
+            batch_params, params = params[:MAX_PARAMS_PER_BATCH], params[MAX_PARAMS_PER_BATCH:]
+            batch_tags, tags = tags[:MAX_TAGS_PER_BATCH], tags[MAX_TAGS_PER_BATCH:]
+            with span("mlflow.log_batch"):
+                self.client.log_batch(run_id, metrics=batch_metrics, params=batch_params, tags=batch_tags)
+            self.requests_sent += 1
+        if self.run_index is not None:
+            self.run_index.update(run_id,
+                                  metrics={m.key: m.value for m in sorted(buffer["metrics"].values(), key=lambda m: m.step)},
+                                  tags={t.key: t.value for t in buffer["tags"].values()})
+
+    def flush(self, run_id=None):
+        """Send buffered entries for one run (or all runs) in as few requests as possible."""
+        run_ids = [run_id] if run_id else list(self._buffers)
+        for rid in run_ids:
+            buffer = self._buffers.pop(rid, None)
+            if buffer:
+                self._send(rid, buffer)
+
+    @property
+    def round_trips_saved(self) -> int:
+        return self.calls_requested - self.requests_sent
+
+    def report(self):
+        print(f"📉 Batched {self.calls_requested} MLflow logging calls into {self.requests_sent} "
+              f"requests (saved {self.round_trips_saved} round trips)")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.flush()
+        if self.verbose:
+            self.report()
+        return False
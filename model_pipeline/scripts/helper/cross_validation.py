@@ -0,0 +1,157 @@
+import hashlib
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+import numpy as np
+from sklearn.model_selection import KFold, StratifiedKFold
+
+from helper.data_loader import load_training_data
+from helper.metrics import METRIC_NAMES, compute_metrics, get_evaluation_config
+from helper.model_registry import get_model_entry
+from helper.profiling import get_profiler, get_profiling_config, init_profiler, span
+from helper.split_manifest import get_dataset_hash, get_split_params
+from helper.stage_cache import DEFAULT_STAGE_CACHE_DIR, data_settings, source_hash
+
+CV_CACHE_SUBDIR = "cv"
+
+
+def get_cv_config(model_cfg):
+    """Cross-validation settings for a model from its cross_validation block (off by default)."""
+    return {
+        "enabled": False,
+        "folds": 5,
+        "stratified": True,
+        "random_state": 42,
+        "workers": None,     # default: one process per fold, up to the CPU count
+        "cache": True,       # reuse fold results for the same data, hyperparameters and code
+        **model_cfg.get("cross_validation", {}),
+    }
+
+
+def cv_cache_key(config, model_cfg, hparams, cv_cfg) -> str:
+    """Fingerprint of everything a fold's result depends on."""
+    eval_cfg = get_evaluation_config(config)
+    key = {
+        "dataset": get_dataset_hash(config),
+        "split": get_split_params(config),
+        "data": data_settings(config),
+        "type": model_cfg["type"],
+        "hyperparameters": {k: v for k, v in hparams.items() if not k.startswith("model_")},
+        "cv": {k: cv_cfg[k] for k in ("folds", "stratified", "random_state")},
+        "evaluation": {k: eval_cfg[k] for k in ("pos_label", "average")},
+        "code": source_hash("train"),
+    }
+    return hashlib.sha256(json.dumps(key, sort_keys=True, default=str).encode()).hexdigest()[:24]
+
+
+def make_folds(y_train, cv_cfg):
+    """(fit positions, score positions) into the training rows, one pair per fold."""
+    splitter_cls = StratifiedKFold if cv_cfg["stratified"] else KFold
+    splitter = splitter_cls(n_splits=cv_cfg["folds"], shuffle=True, random_state=cv_cfg["random_state"])
+    return list(splitter.split(np.zeros(len(y_train)), y_train))
+
+
+def _fold_worker(config, model_cfg, hparams, fold, fit_rows, score_rows):
+    """Fit and score one fold; the dataset is memory-mapped, so workers share one copy of it."""
+    init_profiler(get_profiling_config(config), "train")
+    with span("cv.fold", model=model_cfg["name"], fold=fold):
+        X, y = load_training_data(config)
+        started = time.perf_counter()
+        model = get_model_entry(model_cfg)["build"](hparams)
+        with span("cv.fit", rows=len(fit_rows)):
+            model.fit(X.iloc[fit_rows], y.iloc[fit_rows])
+        fit_s = time.perf_counter() - started
+        with span("cv.predict", rows=len(score_rows)):
+            y_pred = model.predict(X.iloc[score_rows])
+        eval_cfg = get_evaluation_config(config)
+        metrics = compute_metrics(y.iloc[score_rows].to_numpy(), y_pred, model.classes_,
+                                  eval_cfg["pos_label"], eval_cfg["average"])
+    result = {"fold": fold, "metrics": metrics, "fit_rows": len(fit_rows), "score_rows": len(score_rows),
+              "fit_s": round(fit_s, 4)}
+    return result, get_profiler().drain()
+
+
+class FoldCache:
+    """Fold results as JSON files under <dir>/<key>/fold_<i>.json; a missing file means the fold must run."""
+
+    def __init__(self, cache_dir, key, enabled=True):
+        self.dir = Path(cache_dir) / key
+        self.enabled = enabled
+
+    def get(self, fold):
+        path = self.dir / f"fold_{fold}.json"
+        if not self.enabled or not path.exists():
+            return None
+        return json.loads(path.read_text())
+
+    def put(self, result):
+        if not self.enabled:
+            return
+        self.dir.mkdir(parents=True, exist_ok=True)
+        path = self.dir / f"fold_{result['fold']}.json"
+        tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        tmp_path.write_text(json.dumps(result, indent=2))
+        os.replace(tmp_path, path)
+
+
+def summarize_folds(fold_results):
+    """cv_<metric>_mean / cv_<metric>_std over folds (population std, as in cv_results_)."""
+    summary = {}
+    for metric in METRIC_NAMES:
+        values = np.array([result["metrics"][metric] for result in fold_results])
+        summary[f"cv_{metric}_mean"] = float(values.mean())
+        summary[f"cv_{metric}_std"] = float(values.std())
+    return summary
+
+
+def run_cross_validation(config, model_cfg, hparams, y, train_idx, cv_cfg=None):
+    """
+    k-fold cross-validation of one model on the split's training rows.
+
+    Folds run in parallel worker processes; each memory-maps the dataset cache built
+    by the parent, so the data exists once in the page cache and only the fold's rows
+    are gathered in each worker. Fold results are cached by dataset hash,
+    hyperparameters, fold settings and training code, so an unchanged rerun fits
+    nothing. Returns {"summary": {...}, "folds": [...], "cached_folds": n}.
+    """
+    cv_cfg = cv_cfg or get_cv_config(model_cfg)
+    if cv_cfg["folds"] < 2:
+        raise ValueError(f"cross_validation.folds must be at least 2 for '{model_cfg['name']}'")
+    name = model_cfg["name"]
+    cache_dir = Path(config.get("stage_cache", {}).get("dir", DEFAULT_STAGE_CACHE_DIR)) / CV_CACHE_SUBDIR
+    cache = FoldCache(cache_dir, cv_cache_key(config, model_cfg, hparams, cv_cfg), cv_cfg["cache"])
+
+    train_idx = np.sort(np.asarray(train_idx))
+    with span("cv.folds"):
+        folds = make_folds(y.iloc[train_idx].to_numpy(), cv_cfg)
+    results = {}
+    for fold in range(len(folds)):
+        cached = cache.get(fold)
+        if cached:
+            results[fold] = cached
+    pending = [fold for fold in range(len(folds)) if fold not in results]
+
+    if pending:
+        workers = min(cv_cfg["workers"] or os.cpu_count() or 1, len(pending))
+        print(f"🔁 {name}: {len(pending)} of {len(folds)} folds to fit with {workers} workers"
+              + (f" ({len(results)} cached)" if results else ""))
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(_fold_worker, config, model_cfg, hparams, fold,
+                                   train_idx[folds[fold][0]], train_idx[folds[fold][1]])
+                       for fold in pending]
+            for future in as_completed(futures):
+                result, spans = future.result()
+                get_profiler().extend(spans)
+                cache.put(result)
+                results[result["fold"]] = result
+    else:
+        print(f"⏭️ {name}: all {len(folds)} folds cached")
+
+    fold_results = [results[fold] for fold in range(len(folds))]
+    summary = summarize_folds(fold_results)
+    print(f"📐 {name} {len(folds)}-fold CV: " + ", ".join(
+        f"{m}={summary[f'cv_{m}_mean']:.4f}±{summary[f'cv_{m}_std']:.4f}" for m in METRIC_NAMES))
+    return {"summary": summary, "folds": fold_results, "cached_folds": len(folds) - len(pending)}
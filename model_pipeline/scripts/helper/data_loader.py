@@ -0,0 +1,333 @@
+import hashlib
+import json
+import os
+import shutil
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from helper.synthetic_data import MANIFEST_FILE, iter_dataset_chunks
+
+DEFAULT_CACHE_DIR = "./.cache/data"
+DEFAULT_CHUNK_ROWS = 100_000
+
+FEATURES_FILE = "features.bin"
+TARGET_FILE = "target.bin"
+META_FILE = "meta.json"
+HASH_INDEX_FILE = "hash_index.json"
+HASH_BLOCK_SIZE = 1 << 20
+
+
+def _scan(f, offset=0, chain=b""):
+    """
+    Continue the block chain of a file from offset (a block boundary) to its end.
+
+    The content hash chains sha256 over full blocks and finishes with the partial last
+    block, so a grown file is hashed from its last block boundary on. Returns the hash
+    and the state needed to resume: the boundary, the chain digest there and a digest
+    of the bytes after it.
+    """
+    f.seek(offset)
+    while True:
+        block = f.read(HASH_BLOCK_SIZE)
+        if len(block) < HASH_BLOCK_SIZE:
+            break
+        chain = hashlib.sha256(chain + block).digest()
+        offset += HASH_BLOCK_SIZE
+    state = {"size": offset + len(block), "offset": offset, "chain": chain.hex(),
+             "tail": hashlib.sha256(block).hexdigest()}
+    return hashlib.sha256(chain + block).hexdigest(), state
+
+
+def get_file_hash(path) -> str:
+    """Generate a hash based on the content of the data file."""
+    with open(path, "rb") as f:
+        return _scan(f)[0]
+
+
+def _extend_hash(path, entry, size):
+    """
+    (hash, state) of a file that grew since entry was recorded, or None when any of its
+    old bytes changed.
+
+    The old bytes are re-chained up to the recorded boundary and compared with the
+    chain digest there, then the old tail is compared, and the scan carries on over the
+    appended bytes: one sequential read, like a full re-hash, that also tells whether
+    the file only grew. Reading is cheap next to re-parsing the rows (_extend_cache).
+    """
+    state = entry.get("state")
+    if not state or size <= state["size"]:
+        return None
+    with open(path, "rb") as f:
+        chain = b""
+        for _ in range(state["offset"] // HASH_BLOCK_SIZE):
+            chain = hashlib.sha256(chain + f.read(HASH_BLOCK_SIZE)).digest()
+        if chain.hex() != state["chain"]:
+            return None
+        if hashlib.sha256(f.read(state["size"] - state["offset"])).hexdigest() != state["tail"]:
+            return None
+        return _scan(f, state["offset"], chain)
+
+
+def _read_hash_index(cache_dir):
+    index_path = Path(cache_dir) / HASH_INDEX_FILE
+    if index_path.exists():
+        try:
+            with open(index_path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            pass
+    return {}
+
+
+def get_cached_file_hash(path, cache_dir=DEFAULT_CACHE_DIR) -> str:
+    """
+    Return the content hash of a file, re-hashing only when its size or mtime changed.
+
+    The (size, mtime) -> hash mapping is kept in a small JSON index inside the cache
+    directory so repeated loads of an unchanged file do not read it twice. A file that
+    only grew is hashed from where it left off (see _scan), and the index keeps the
+    earlier versions it extends, for get_file_lineage. A file whose old bytes changed
+    starts a new lineage.
+    """
+    path = Path(path).resolve()
+    stat = path.stat()
+    stamp = f"{stat.st_size}:{stat.st_mtime_ns}"
+
+    index = _read_hash_index(cache_dir)
+    entry = index.get(str(path))
+    if entry and entry["stamp"] == stamp:
+        return entry["hash"]
+
+    extended = _extend_hash(path, entry, stat.st_size) if entry else None
+    if extended:
+        file_hash, state = extended
+        versions = entry.get("versions", []) + [{"hash": entry["hash"], "size": entry["state"]["size"]}]
+    else:
+        with open(path, "rb") as f:
+            file_hash, state = _scan(f)
+        versions = []
+    index[str(path)] = {"stamp": stamp, "hash": file_hash, "state": state, "versions": versions}
+    index_path = Path(cache_dir) / HASH_INDEX_FILE
+    index_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = index_path.with_suffix(f".{os.getpid()}.tmp")
+    with open(tmp_path, "w") as f:
+        json.dump(index, f, indent=2)
+    os.replace(tmp_path, index_path)
+    return file_hash
+
+
+def get_file_lineage(path, cache_dir=DEFAULT_CACHE_DIR):
+    """
+    Earlier versions of a file that its current content extends by appended bytes, as
+    {"hash", "size"} dicts, newest first (empty until get_cached_file_hash saw it grow).
+    """
+    get_cached_file_hash(path, cache_dir)
+    entry = _read_hash_index(cache_dir).get(str(Path(path).resolve()), {})
+    return entry.get("versions", [])[::-1]
+
+
+def _variant_key(columns, target_col, dtype) -> str:
+    key = json.dumps({"columns": columns, "target": target_col, "dtype": dtype}, sort_keys=True)
+    return hashlib.sha256(key.encode()).hexdigest()[:8]
+
+
+def _iter_source_chunks(data_path, usecols, chunk_rows):
+    """Chunks of a CSV, a Parquet file or a generated dataset (its manifest.json)."""
+    if Path(data_path).name == MANIFEST_FILE:
+        yield from iter_dataset_chunks(data_path, chunk_rows, usecols)
+    elif Path(data_path).suffix.lower() in (".parquet", ".pq"):
+        import pyarrow.parquet as pq
+        for batch in pq.ParquetFile(data_path).iter_batches(batch_size=chunk_rows, columns=usecols):
+            yield batch.to_pandas()
+    else:
+        yield from pd.read_csv(data_path, usecols=usecols, chunksize=chunk_rows)
+
+
+def _build_cache(data_path, cache_path: Path, file_hash, columns, target_col, dtype, chunk_rows):
+    """
+    Convert the source data into binary feature/target blocks, one chunk at a time.
+
+    Features are one row-major (n_rows, n_features) block rather than a file per
+    column: every reader gathers rows (train/test splits, CV folds, streaming chunks)
+    and sklearn wants them as one 2-D array, so each gathered row is one contiguous
+    read. Column projection happens here, when the block is written (the variant key).
+    """
+    tmp_path = cache_path.with_name(f"{cache_path.name}.tmp-{os.getpid()}")
+    tmp_path.mkdir(parents=True, exist_ok=True)
+
+    usecols = None
+    if columns is not None:
+        usecols = list(columns) + ([target_col] if target_col else [])
+
+    feature_cols, feature_dtype, target_dtype = None, None, None
+    n_rows = 0
+    with open(tmp_path / FEATURES_FILE, "wb") as fx, open(tmp_path / TARGET_FILE, "wb") as fy:
+        for chunk in _iter_source_chunks(data_path, usecols, chunk_rows):
+            if feature_cols is None:
+                if target_col and target_col not in chunk.columns:
+                    raise ValueError(f"Target column '{target_col}' not found in {data_path}")
+                feature_cols = [c for c in (columns or list(chunk.columns)) if c != target_col]
+                # Without an explicit dtype the first chunk decides, like read_csv would.
+                feature_dtype = np.dtype(dtype) if dtype else chunk[feature_cols].to_numpy().dtype
+                if target_col:
+                    target_dtype = chunk[target_col].to_numpy().dtype
+
+            X = np.ascontiguousarray(chunk[feature_cols].to_numpy(dtype=feature_dtype))
+            X.tofile(fx)
+            if target_col:
+                chunk[target_col].to_numpy().astype(target_dtype, copy=False).tofile(fy)
+            n_rows += len(chunk)
+
+    meta = {
+        "source": str(Path(data_path).resolve()),
+        "source_hash": file_hash,
+        "source_size": os.path.getsize(data_path),
+        "n_rows": n_rows,
+        "feature_columns": feature_cols or [],
+        "feature_dtype": np.dtype(feature_dtype if feature_dtype is not None else "float64").str,
+        "target_column": target_col,
+        "target_dtype": np.dtype(target_dtype).str if target_dtype is not None else None,
+    }
+    with open(tmp_path / META_FILE, "w") as f:
+        json.dump(meta, f, indent=2)
+
+    try:
+        os.replace(tmp_path, cache_path)
+    except OSError:
+        # Another process finished the same cache entry first; theirs is identical.
+        shutil.rmtree(tmp_path, ignore_errors=True)
+
+
+def _is_csv(data_path) -> bool:
+    return Path(data_path).name != MANIFEST_FILE and Path(data_path).suffix.lower() not in (".parquet", ".pq")
+
+
+def _extend_cache(data_path, base_path: Path, cache_path: Path, file_hash, chunk_rows):
+    """
+    Build the cache entry of a CSV that grew by appended rows from the entry of its
+    previous version: only the bytes after the old end are parsed and appended to the
+    binary blocks. The old entry is moved, not copied (its content no longer exists).
+    Returns False, leaving everything as it was, when the entry cannot be extended.
+    """
+    with open(base_path / META_FILE) as f:
+        meta = json.load(f)
+    old_size = meta.get("source_size")
+    if not old_size:
+        return False
+    with open(data_path, "rb") as f:
+        f.seek(old_size - 1)
+        if f.read(1) != b"\n":
+            return False
+    tmp_path = cache_path.with_name(f"{cache_path.name}.tmp-{os.getpid()}")
+    try:
+        os.replace(base_path, tmp_path)
+    except OSError:
+        # Another process took the old entry first
+        return False
+
+    header = list(pd.read_csv(data_path, nrows=0).columns)
+    feature_cols, target_col = meta["feature_columns"], meta["target_column"]
+    usecols = feature_cols + ([target_col] if target_col else [])
+    n_new = 0
+    with open(data_path, "rb") as source, open(tmp_path / FEATURES_FILE, "ab") as fx, \
+            open(tmp_path / TARGET_FILE, "ab") as fy:
+        source.seek(old_size)
+        try:
+            chunks = pd.read_csv(source, header=None, names=header, usecols=usecols, chunksize=chunk_rows)
+            for chunk in chunks:
+                np.ascontiguousarray(chunk[feature_cols].to_numpy(dtype=meta["feature_dtype"])).tofile(fx)
+                if target_col:
+                    chunk[target_col].to_numpy().astype(meta["target_dtype"], copy=False).tofile(fy)
+                n_new += len(chunk)
+        except pd.errors.EmptyDataError:
+            pass
+
+    meta.update({"source_hash": file_hash, "source_size": os.path.getsize(data_path),
+                 "n_rows": meta["n_rows"] + n_new})
+    with open(tmp_path / META_FILE, "w") as f:
+        json.dump(meta, f, indent=2)
+    try:
+        os.replace(tmp_path, cache_path)
+    except OSError:
+        shutil.rmtree(tmp_path, ignore_errors=True)
+    print(f"📦 Appended {n_new} rows to the dataset cache → {cache_path}")
+    return True
+
+
+def _open_block(path: Path, dtype, shape):
+    if 0 in shape:
+        return np.empty(shape, dtype=dtype)
+    return np.memmap(path, dtype=dtype, mode="r", shape=shape)
+
+
+def get_dataset_cache(data_path, target_col=None, columns=None, dtype=None,
+                      cache_dir=DEFAULT_CACHE_DIR, chunk_rows=DEFAULT_CHUNK_ROWS):
+    """
+    Return (cache_path, meta) for a CSV, a Parquet file or a generated dataset's
+    manifest.json, building the memory-mapped cache on first use.
+
+    Cache entries live under ``<cache_dir>/<content hash>-<variant>``, where the variant
+    covers the column projection, target column and dtype. For a generated dataset the
+    hash is that of its manifest, which records the seeds and parameters of every part.
+    When a CSV only had rows appended, the entry of its previous version is extended
+    with the new rows instead of parsing the whole file again.
+    """
+    cache_dir = Path(cache_dir)
+    file_hash = get_cached_file_hash(data_path, cache_dir)
+    columns = list(columns) if columns else None
+    dtype = np.dtype(dtype).name if dtype else None
+    variant = _variant_key(columns, target_col, dtype)
+    cache_path = cache_dir / f"{file_hash[:16]}-{variant}"
+
+    if not (cache_path / META_FILE).exists():
+        extended = False
+        if _is_csv(data_path):
+            for version in get_file_lineage(data_path, cache_dir):
+                base_path = cache_dir / f"{version['hash'][:16]}-{variant}"
+                if (base_path / META_FILE).exists():
+                    extended = _extend_cache(data_path, base_path, cache_path, file_hash, chunk_rows)
+                    break
+        if not extended:
+            print(f"📦 Building dataset cache for {data_path} → {cache_path}")
+            _build_cache(data_path, cache_path, file_hash, columns, target_col, dtype, chunk_rows)
+
+    with open(cache_path / META_FILE) as f:
+        meta = json.load(f)
+    return cache_path, meta
+
+
+def load_dataset(data_path, target_col=None, columns=None, dtype=None,
+                 cache_dir=DEFAULT_CACHE_DIR, chunk_rows=DEFAULT_CHUNK_ROWS):
+    """
+    Load a CSV, Parquet file or generated dataset through the memory-mapped cache.
+
+    Returns (X, y) where X is a DataFrame backed by a read-only memory map and y is a
+    Series (or None when no target column is given). No data is copied on load.
+    """
+    cache_path, meta = get_dataset_cache(data_path, target_col, columns, dtype, cache_dir, chunk_rows)
+
+    n_rows = meta["n_rows"]
+    feature_cols = meta["feature_columns"]
+    features = _open_block(cache_path / FEATURES_FILE, meta["feature_dtype"], (n_rows, len(feature_cols)))
+    X = pd.DataFrame(features, columns=feature_cols, copy=False)
+
+    y = None
+    if meta["target_column"]:
+        target = _open_block(cache_path / TARGET_FILE, meta["target_dtype"], (n_rows,))
+        y = pd.Series(target, name=meta["target_column"], copy=False)
+    return X, y
+
+
+def load_training_data(config):
+    """Load the configured training dataset, applying config["data"] projection and dtype."""
+    data_cfg = config["data"]
+    return load_dataset(
+        data_cfg["path"],
+        target_col=data_cfg["target_column"],
+        columns=data_cfg.get("columns"),
+        dtype=data_cfg.get("dtype"),
+        cache_dir=data_cfg.get("cache_dir", DEFAULT_CACHE_DIR),
+        chunk_rows=data_cfg.get("chunk_rows", DEFAULT_CHUNK_ROWS),
+    )
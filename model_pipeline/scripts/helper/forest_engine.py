@@ -0,0 +1,255 @@
+import json
+import os
+from pathlib import Path
+
+import numpy as np
+
+ENGINE_ARTIFACT_PATH = "engine"
+ENGINE_FILE = "forest.rfe"
+INFERENCE_ENGINES = ("sklearn", "compiled")
+MAGIC = b"RFENGINE"
+FORMAT_VERSION = 1
+ALIGNMENT = 64
+DEFAULT_BATCH_ROWS = 1024        # rows traversed together; memory is batch_rows * n_trees node ids
+MAX_PERFECT_NODES = 1 << 24      # larger (deeper) forests use the pointer layout
+
+# Arrays per layout, in file order
+LAYOUT_ARRAYS = {
+    # Every tree padded to a complete binary tree of max_depth levels: node i's children
+    # are 2i+1 and 2i+2, and all leaves sit on the last level
+    "perfect": ("feature", "threshold", "missing_left", "leaf_proba"),
+    # Trees as stored by sklearn, with global child pointers; leaves point to themselves
+    "pointer": ("roots", "feature", "threshold", "missing_left", "left", "right", "proba"),
+}
+
+
+def _float32_thresholds(threshold):
+    """
+    Largest float32 at or below each threshold: for float32 inputs, x <= t exactly when
+    x <= that value, so splits compare in float32 with sklearn's (float64) outcome.
+    """
+    rounded = threshold.astype(np.float32)
+    above = rounded > threshold
+    rounded[above] = np.nextafter(rounded[above], np.float32(-np.inf))
+    return rounded
+
+
+class CompiledForest:
+    """
+    A fitted RandomForestClassifier flattened into contiguous NumPy arrays.
+
+    A batch of rows walks all trees in lockstep, one level per step, with array
+    gathers instead of per-tree Python objects. Splits and per-leaf class
+    probabilities reproduce sklearn's arithmetic (float32 inputs, NaNs routed by
+    missing_go_to_left, tree probabilities summed in tree order), so predictions are
+    bit-for-bit identical to RandomForestClassifier.predict / predict_proba.
+
+    save() writes one file (JSON header + 64-byte aligned arrays); load() memory-maps it.
+    """
+
+    def __init__(self, layout, arrays, classes, n_trees, max_depth, n_features, feature_names=None):
+        self.layout = layout
+        self.arrays = arrays
+        self.classes_ = np.asarray(classes)
+        self.n_trees = int(n_trees)
+        self.max_depth = int(max_depth)
+        self.n_features_in_ = int(n_features)
+        if feature_names is not None:
+            self.feature_names_in_ = np.asarray(feature_names, dtype=object)
+        self.route_missing = bool(np.any(arrays["missing_left"]))
+        trees = np.arange(self.n_trees, dtype=np.int32)
+        if layout == "perfect":
+            internal = 2 ** self.max_depth - 1
+            self._node_base = trees * internal
+            self._leaf_base = trees * (internal + 1) - internal
+
+    def _walk(self, X):
+        """Index of the leaf each row reaches in each tree: (n_rows, n_trees)."""
+        a = self.arrays
+        flat = X.reshape(-1)
+        row_offsets = (np.arange(len(X), dtype=np.int32) * X.shape[1])[:, None]
+        if self.layout == "perfect":
+            node = np.zeros((len(X), self.n_trees), dtype=np.int32)
+            for _ in range(self.max_depth):
+                index = node + self._node_base
+                value = flat.take(row_offsets + a["feature"].take(index))
+                go_right = value > a["threshold"].take(index)
+                if self.route_missing:
+                    go_right |= np.isnan(value) & ~a["missing_left"].take(index)
+                node = 2 * node + 1 + go_right
+            return node + self._leaf_base
+
+        node = np.broadcast_to(a["roots"], (len(X), self.n_trees)).copy()
+        for _ in range(self.max_depth):
+            value = flat.take(row_offsets + a["feature"].take(node))
+            go_right = value > a["threshold"].take(node)
+            if self.route_missing:
+                go_right |= np.isnan(value) & ~a["missing_left"].take(node)
+            node = np.where(go_right, a["right"].take(node), a["left"].take(node))
+        return node
+
+    def _validate(self, X):
+        if hasattr(X, "columns") and hasattr(self, "feature_names_in_"):
+            X = X[list(self.feature_names_in_)]
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        if X.ndim != 2 or X.shape[1] != self.n_features_in_:
+            raise ValueError(f"X has shape {X.shape}, expected (n, {self.n_features_in_})")
+        if np.isinf(X).any():
+            raise ValueError("Input X contains infinity")
+        return X
+
+    def predict_proba(self, X, batch_rows=DEFAULT_BATCH_ROWS):
+        X = self._validate(X)
+        proba = self.arrays["leaf_proba" if self.layout == "perfect" else "proba"]
+        out = np.empty((len(X), len(self.classes_)), dtype=np.float64)
+        for start in range(0, len(X), batch_rows):
+            leaves = self._walk(X[start:start + batch_rows])
+            # cumsum adds tree by tree, in the same order as sklearn's accumulation
+            out[start:start + len(leaves)] = np.cumsum(proba.take(leaves, axis=0), axis=1)[:, -1] / self.n_trees
+        return out
+
+    def predict(self, X, batch_rows=DEFAULT_BATCH_ROWS):
+        return self.classes_.take(np.argmax(self.predict_proba(X, batch_rows), axis=1), axis=0)
+
+    def save(self, path):
+        """Write the header and arrays to path (atomically)."""
+        header = {
+            "format_version": FORMAT_VERSION,
+            "layout": self.layout,
+            "classes": self.classes_.tolist(),
+            "n_trees": self.n_trees,
+            "max_depth": self.max_depth,
+            "n_features": self.n_features_in_,
+            "feature_names": list(map(str, self.feature_names_in_)) if hasattr(self, "feature_names_in_") else None,
+            "arrays": {},
+        }
+        offset = 0
+        for name in LAYOUT_ARRAYS[self.layout]:
+            array = self.arrays[name]
+            header["arrays"][name] = {"dtype": array.dtype.str, "shape": list(array.shape), "offset": offset}
+            offset += -(-array.nbytes // ALIGNMENT) * ALIGNMENT
+        header_bytes = json.dumps(header).encode()
+        data_start = -(-(len(MAGIC) + 8 + len(header_bytes)) // ALIGNMENT) * ALIGNMENT
+
+        path = Path(path)
+        tmp_path = path.with_name(f"{path.name}.tmp-{os.getpid()}")
+        with open(tmp_path, "wb") as f:
+            f.write(MAGIC + len(header_bytes).to_bytes(8, "little") + header_bytes)
+            for name, spec in header["arrays"].items():
+                f.seek(data_start + spec["offset"])
+                f.write(np.ascontiguousarray(self.arrays[name]).tobytes())
+        os.replace(tmp_path, path)
+        return path
+
+    @classmethod
+    def load(cls, path, mmap=True):
+        """Open a saved engine (a file, or a directory holding forest.rfe)."""
+        path = Path(path)
+        if path.is_dir():
+            path = path / ENGINE_FILE
+        with open(path, "rb") as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                raise ValueError(f"{path} is not a compiled forest")
+            header_len = int.from_bytes(f.read(8), "little")
+            header = json.loads(f.read(header_len))
+            if header["format_version"] != FORMAT_VERSION:
+                raise ValueError(f"{path} has format version {header['format_version']}, expected {FORMAT_VERSION}")
+            data_start = -(-(len(MAGIC) + 8 + header_len) // ALIGNMENT) * ALIGNMENT
+            arrays = {}
+            for name, spec in header["arrays"].items():
+                shape = tuple(spec["shape"])
+                if mmap:
+                    arrays[name] = np.memmap(path, dtype=spec["dtype"], mode="r",
+                                             offset=data_start + spec["offset"], shape=shape)
+                else:
+                    f.seek(data_start + spec["offset"])
+                    arrays[name] = np.fromfile(f, dtype=spec["dtype"], count=int(np.prod(shape))).reshape(shape)
+        return cls(header["layout"], arrays, header["classes"], header["n_trees"], header["max_depth"],
+                   header["n_features"], header["feature_names"])
+
+
+def _leaf_proba(tree, n_classes):
+    """Per-node class probabilities, computed as DecisionTreeClassifier.predict_proba does."""
+    import sklearn
+    value = np.array(tree.value[:, 0, :n_classes], dtype=np.float64)
+    if tuple(int(part) for part in sklearn.__version__.split(".")[:2]) >= (1, 4):
+        # Classifier trees store class fractions and return them as they are
+        return value
+    # Older versions store weighted counts and normalize them per prediction
+    normalizer = value.sum(axis=1)[:, None]
+    normalizer[normalizer == 0.0] = 1.0
+    return value / normalizer
+
+
+def _missing_left(tree):
+    if hasattr(tree, "missing_go_to_left"):
+        return np.asarray(tree.missing_go_to_left, dtype=bool)
+    return np.zeros(tree.node_count, dtype=bool)
+
+
+def _compile_perfect(trees, n_classes, max_depth):
+    internal, width = 2 ** max_depth - 1, 2 ** max_depth
+    feature = np.zeros((len(trees), internal), dtype=np.int32)
+    threshold = np.full((len(trees), internal), np.inf, dtype=np.float64)
+    missing_left = np.zeros((len(trees), internal), dtype=bool)
+    leaf_proba = np.zeros((len(trees), width, n_classes), dtype=np.float64)
+    for t, tree in enumerate(trees):
+        proba, tree_missing = _leaf_proba(tree, n_classes), _missing_left(tree)
+        stack = [(0, 0, 0)]   # (sklearn node, position in the complete tree, depth)
+        while stack:
+            node, position, depth = stack.pop()
+            if tree.children_left[node] == -1:
+                # A leaf above the last level covers the whole subtree under its position
+                first = last = position
+                for _ in range(max_depth - depth):
+                    first, last = 2 * first + 1, 2 * last + 2
+                leaf_proba[t, first - internal:last - internal + 1] = proba[node]
+                continue
+            feature[t, position] = tree.feature[node]
+            threshold[t, position] = tree.threshold[node]
+            missing_left[t, position] = tree_missing[node]
+            stack.append((tree.children_left[node], 2 * position + 1, depth + 1))
+            stack.append((tree.children_right[node], 2 * position + 2, depth + 1))
+    return {"feature": feature.reshape(-1), "threshold": _float32_thresholds(threshold.reshape(-1)),
+            "missing_left": missing_left.reshape(-1), "leaf_proba": leaf_proba.reshape(-1, n_classes)}
+
+
+def _compile_pointer(trees, n_classes):
+    offsets = np.cumsum([0] + [tree.node_count for tree in trees])
+    parts = {name: [] for name in ("feature", "threshold", "missing_left", "left", "right", "proba")}
+    for tree, start in zip(trees, offsets[:-1]):
+        leaf = tree.children_left == -1
+        ids = np.arange(start, start + tree.node_count, dtype=np.int32)
+        parts["feature"].append(np.where(leaf, 0, tree.feature).astype(np.int32))
+        parts["threshold"].append(np.where(leaf, np.inf, tree.threshold))
+        parts["missing_left"].append(np.where(leaf, False, _missing_left(tree)))
+        parts["left"].append(np.where(leaf, ids, tree.children_left + start).astype(np.int32))
+        parts["right"].append(np.where(leaf, ids, tree.children_right + start).astype(np.int32))
+        parts["proba"].append(_leaf_proba(tree, n_classes))
+    arrays = {name: np.concatenate(values) for name, values in parts.items()}
+    arrays["threshold"] = _float32_thresholds(arrays["threshold"])
+    arrays["roots"] = offsets[:-1].astype(np.int32)
+    return arrays
+
+
+def compile_forest(model, layout=None):
+    """
+    Flatten a fitted RandomForestClassifier into a CompiledForest.
+
+    The complete-tree ("perfect") layout replaces child pointers with index arithmetic
+    and is used unless padding every tree to max_depth would exceed MAX_PERFECT_NODES.
+    """
+    if getattr(model, "n_outputs_", 1) != 1:
+        raise ValueError("Only single-output forests can be compiled")
+    trees = [estimator.tree_ for estimator in model.estimators_]
+    max_depth = max(tree.max_depth for tree in trees)
+    if layout is None:
+        layout = "perfect" if len(trees) * 2 ** (max_depth + 1) <= MAX_PERFECT_NODES else "pointer"
+    if layout == "perfect":
+        arrays = _compile_perfect(trees, model.n_classes_, max_depth)
+    elif layout == "pointer":
+        arrays = _compile_pointer(trees, model.n_classes_)
+    else:
+        raise ValueError(f"Unknown layout '{layout}': use one of {list(LAYOUT_ARRAYS)}")
+    return CompiledForest(layout, arrays, model.classes_, len(trees), max_depth, model.n_features_in_,
+                          getattr(model, "feature_names_in_", None))
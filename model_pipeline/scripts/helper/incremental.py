@@ -0,0 +1,179 @@
+import hashlib
+import json
+import math
+
+import numpy as np
+from mlflow.exceptions import MlflowException
+from mlflow.tracking import MlflowClient
+
+from helper.model_cache import get_model_cache, load_local_model
+from helper.scoring import resolve_model_version
+
+# Replayed earlier rows per new row by model type. A logistic regression update is a fresh
+# fit that starts from the registered coefficients, so the replay sample is all it keeps
+# of the earlier rows; a forest keeps its earlier trees.
+DEFAULT_REPLAY_RATIOS = {"logistic_regression": 4.0}
+
+# Run tags copied onto the registered version, as {run tag: version tag}
+VERSION_LINEAGE_TAGS = {
+    "training_update": "training_update",
+    "parent_model_version": "parent_version",
+    "parent_run_id": "parent_run_id",
+    "delta_rows": "delta_rows",
+    "data_rows": "data_rows",
+}
+
+
+def get_incremental_config(model_cfg):
+    """Incremental retraining settings for a model from its incremental block (off by default)."""
+    return {
+        "enabled": False,
+        "parent_stage": None,      # registered version to update (default: the latest version)
+        "replay_ratio": DEFAULT_REPLAY_RATIOS.get(model_cfg.get("type"), 1.0),  # earlier train rows refit per new row
+        "max_iter": None,          # logistic regression: iterations from the parent's coefficients
+        "add_estimators": None,    # random forest: trees per update (default: n_estimators * new rows / old rows)
+        "max_estimators": None,    # random forest: keep at most this many trees, dropping the oldest
+        "random_state": 42,
+        **model_cfg.get("incremental", {}),
+    }
+
+
+def hparams_hash(entry, hparams) -> str:
+    return hashlib.sha256(json.dumps(entry["params"](hparams), sort_keys=True, default=str).encode()).hexdigest()[:16]
+
+
+def train_rows_hash(train_idx) -> str:
+    return hashlib.sha256(np.sort(train_idx).astype(np.uint64).tobytes()).hexdigest()[:16]
+
+
+def lineage_tags(entry, hparams, split):
+    """Which rows (and hyperparameters) a run was trained on; empty without a split row history."""
+    if not split["history"]:
+        return {}
+    data_rows, data_rows_hash = split["history"][-1]
+    return {
+        "data_rows": data_rows,
+        "data_rows_hash": data_rows_hash,
+        "train_rows_hash": train_rows_hash(split["train_idx"]),
+        "hparams_hash": hparams_hash(entry, hparams),
+    }
+
+
+def plan_update(config, model_cfg, entry, hparams, split, y, inc_cfg):
+    """
+    Decide whether the registered model can be updated with the rows appended since it
+    was trained, instead of being retrained on all rows.
+
+    The parent version must have been trained on a prefix of the current data (its
+    row count and dataset hash appear in the split's history), with the same
+    hyperparameters and the same train rows in that prefix. Returns the plan (the
+    loaded parent, the rows to fit and its lineage), or None after printing why a full
+    retrain is needed.
+    """
+    name = model_cfg["name"]
+
+    def full_retrain(reason):
+        print(f"🔄 {name}: full retrain ({reason})")
+        return None
+
+    if not split["history"]:
+        return full_retrain("the split has no row history; set data.split.on_append: extend")
+    client = MlflowClient()
+    try:
+        version = resolve_model_version(client, model_cfg["model_name"], stage=inc_cfg["parent_stage"])
+    except (ValueError, MlflowException):
+        return full_retrain(f"no registered version of {model_cfg['model_name']} to update")
+    tags = client.get_run(version.run_id).data.tags
+    if "data_rows_hash" not in tags:
+        return full_retrain(f"version {version.version} has no data lineage tags")
+    parent_rows = int(tags["data_rows"])
+    if (parent_rows, tags["data_rows_hash"]) not in [tuple(item) for item in split["history"]]:
+        return full_retrain(f"version {version.version} was trained on data that is not a prefix of the current data")
+    if tags.get("hparams_hash") != hparams_hash(entry, hparams):
+        return full_retrain(f"hyperparameters differ from version {version.version}")
+
+    train_idx = split["train_idx"]
+    trained = train_idx < parent_rows
+    if train_rows_hash(train_idx[trained]) != tags.get("train_rows_hash"):
+        return full_retrain(f"the train rows of version {version.version} changed")
+    new_rows = np.sort(train_idx[~trained])
+    if not len(new_rows):
+        return full_retrain("no new training rows")
+
+    old_rows = train_idx[trained]
+    replay_rows = replay_sample(old_rows, len(new_rows), inc_cfg, parent_rows)
+    n_replay = len(replay_rows)
+    fit_rows = np.sort(np.concatenate([replay_rows, new_rows]))
+
+    parent = load_local_model(get_model_cache(config, client).get_local_path(version.run_id))
+    if type(parent) is not type(entry["build"](hparams)):
+        return full_retrain(f"version {version.version} is a {type(parent).__name__}")
+    if not np.array_equal(np.unique(y.iloc[fit_rows]), parent.classes_):
+        return full_retrain(f"the classes in the new rows differ from version {version.version}")
+
+    print(f"➕ {name}: updating version {version.version} with {len(new_rows)} new rows "
+          f"(+{n_replay} replayed, {len(old_rows)} trained before)")
+    return {
+        "model": parent,
+        "fit_rows": fit_rows,
+        "new_row_idx": new_rows,
+        "new_rows": len(new_rows),
+        "replay_rows": n_replay,
+        "base_rows": len(old_rows),
+        "tags": {
+            "training_update": "incremental",
+            "parent_model_name": model_cfg["model_name"],
+            "parent_model_version": version.version,
+            "parent_run_id": version.run_id,
+            "delta_rows": len(new_rows),
+            "replay_rows": n_replay,
+        },
+    }
+
+
+def replay_sample(old_rows, n_new, inc_cfg, seed_rows):
+    """replay_ratio * n_new of the earlier train rows (all of them if fewer), drawn at random."""
+    n_replay = min(len(old_rows), int(round(inc_cfg["replay_ratio"] * n_new)))
+    rng = np.random.default_rng([inc_cfg["random_state"], seed_rows])
+    return rng.choice(old_rows, size=n_replay, replace=False) if n_replay else old_rows[:0]
+
+
+def update_logistic_regression(model, X, y, hparams, update):
+    """
+    Refit on the new and replayed rows, starting the solver from the parent's
+    coefficients (warm_start; liblinear starts over).
+
+    The loss is convex, so this converges to the optimum on the rows it is given:
+    warm_start only saves iterations, and earlier rows outside the replay sample no
+    longer count. The replay sample is the model's only memory of them, which is why
+    replay_ratio defaults higher for logistic regression (DEFAULT_REPLAY_RATIOS).
+    """
+    model.set_params(warm_start=True, max_iter=update["max_iter"] or hparams.get("max_iter", 100))
+    model.fit(X, y)
+    model.set_params(warm_start=False)
+    return model
+
+
+def update_random_forest(model, X, y, hparams, update):
+    """Grow trees on the new (and replayed) rows next to the parent's trees with warm_start."""
+    n_add = update["add_estimators"] or max(
+        1, math.ceil(hparams.get("n_estimators", 100) * update["new_rows"] / update["base_rows"]))
+    max_estimators = update["max_estimators"]
+    if max_estimators:
+        n_add = min(n_add, max_estimators)
+        n_drop = len(model.estimators_) + n_add - max_estimators
+        if n_drop > 0:
+            print(f"✂️ Dropping the {n_drop} oldest trees (max_estimators={max_estimators})")
+            model.estimators_ = model.estimators_[n_drop:]
+    model.set_params(warm_start=True, n_estimators=len(model.estimators_) + n_add)
+    model.fit(X, y)
+    model.set_params(warm_start=False)
+    return model
+
+
+def version_lineage_tags(run_tags):
+    """Tags for a registered model version trained by an incremental update."""
+    if run_tags.get("training_update") != "incremental":
+        return {}
+    return {version_tag: run_tags[run_tag] for run_tag, version_tag in VERSION_LINEAGE_TAGS.items()
+            if run_tag in run_tags}
@@ -0,0 +1,258 @@
+import json
+import os
+import re
+import shlex
+import subprocess
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from pathlib import Path
+
+import yaml
+
+from helper.warm_runner import get_warm_runner
+
+PLACEHOLDER = re.compile(r"\$\{\{\s*([\w.]+)\s*\}\}")
+COMPONENT_REF = re.compile(r"^\$\{(\w+)_component_id\}$")
+
+
+def get_local_config(config):
+    """Settings for the local provider from config["platform"]["local"]."""
+    return {
+        "pipeline_file": "model_pipeline_job.yaml",
+        "jobs_dir": "jobs",
+        "work_dir": "./.local_pipeline",
+        "max_workers": os.cpu_count() or 1,
+        "retries": 1,
+        "timeout_s": None,
+        "warm": False,  # run stages as forks of a pre-imported parent (helper.warm_runner)
+        "steps": {},  # per-step overrides of retries / timeout_s
+        **config["platform"].get("local", {}),
+    }
+
+
+def _load_yaml(path):
+    with open(path) as f:
+        return yaml.safe_load(f)
+
+
+def _components_by_name(jobs_dir: Path):
+    """Component YAMLs in jobs_dir keyed by their `name` (e.g. train_model -> jobs/train_job.yaml)."""
+    components = {}
+    for path in jobs_dir.glob("*_job.yaml"):
+        spec = _load_yaml(path)
+        if spec and spec.get("type") == "command" and spec.get("name"):
+            components[spec["name"]] = (path, spec)
+    return components
+
+
+def _output_file(spec, name):
+    """Local file name for an output: the declared path, or the output name."""
+    if isinstance(spec, str) and not spec.startswith("${{"):
+        return spec
+    if isinstance(spec, dict) and spec.get("path"):
+        return Path(spec["path"]).name
+    return name
+
+
+def load_pipeline_dag(pipeline_path: Path, jobs_dir: Path):
+    """
+    Read an AzureML pipeline YAML into local steps.
+
+    Jobs may carry an inline command or reference a component from jobs_dir through a
+    ${<name>_component_id} placeholder. Edges come from ${{parent.jobs.<job>.outputs.<name>}}
+    inputs. Returns (pipeline inputs, {step name: step}).
+    """
+    pipeline = _load_yaml(pipeline_path)
+    components = None
+    steps = {}
+    for name, job in pipeline.get("jobs", {}).items():
+        command, code_dir, outputs = job.get("command"), job.get("code"), dict(job.get("outputs") or {})
+        base_dir = pipeline_path.parent
+        if not command:
+            components = components if components is not None else _components_by_name(jobs_dir)
+            match = COMPONENT_REF.match(str(job.get("component", "")))
+            if not match or match.group(1) not in components:
+                raise ValueError(f"Step '{name}': cannot resolve component {job.get('component')!r} in {jobs_dir}")
+            component_path, component = components[match.group(1)]
+            command, code_dir, base_dir = component["command"], component.get("code"), component_path.parent
+            outputs = {**(component.get("outputs") or {}), **outputs}
+
+        inputs = dict(job.get("inputs") or {})
+        depends_on = sorted({ref.split(".")[2] for value in inputs.values()
+                             for ref in PLACEHOLDER.findall(str(value)) if ref.startswith("parent.jobs.")})
+        steps[name] = {
+            "name": name,
+            "command": " ".join(str(command).split()),
+            "code_dir": (base_dir / code_dir).resolve() if code_dir else base_dir.resolve(),
+            "inputs": inputs,
+            "outputs": {key: _output_file(spec, key) for key, spec in outputs.items()},
+            "depends_on": depends_on,
+        }
+
+    unknown = {d for step in steps.values() for d in step["depends_on"] if d not in steps}
+    if unknown:
+        raise ValueError(f"Pipeline references unknown jobs: {sorted(unknown)}")
+    return pipeline.get("inputs") or {}, steps
+
+
+def _resolve(value, scope):
+    def substitute(match):
+        key = match.group(1)
+        if key not in scope:
+            raise ValueError(f"Unresolved placeholder ${{{{{key}}}}}")
+        return str(scope[key])
+    return PLACEHOLDER.sub(substitute, str(value))
+
+
+def build_command(step, pipeline_inputs, step_outputs, run_dir: Path):
+    """Substitute inputs/outputs with local values and paths; returns (argv, {output: path})."""
+    parent_scope = {f"parent.inputs.{k}": v for k, v in pipeline_inputs.items()}
+    for upstream, outputs in step_outputs.items():
+        parent_scope.update({f"parent.jobs.{upstream}.outputs.{k}": v for k, v in outputs.items()})
+
+    outputs = {key: str(run_dir / step["name"] / file_name) for key, file_name in step["outputs"].items()}
+    scope = {f"inputs.{k}": _resolve(v, parent_scope) for k, v in step["inputs"].items()}
+    scope.update({f"outputs.{k}": v for k, v in outputs.items()})
+
+    argv = shlex.split(_resolve(step["command"], scope))
+    if argv and argv[0] in ("python", "python3"):
+        argv[0] = sys.executable
+    # Scripts are found in the step's code directory; relative data/config paths stay relative to the cwd
+    argv = [str(step["code_dir"] / arg) if arg.endswith(".py") and (step["code_dir"] / arg).exists() else arg
+            for arg in argv]
+    return argv, outputs
+
+
+def _run_subprocess(argv, log, timeout_s):
+    result = subprocess.run(argv, stdout=log, stderr=subprocess.STDOUT, timeout=timeout_s)
+    return result.returncode, {}
+
+
+def run_step(step, argv, log_path: Path, retries, timeout_s, execute=None):
+    """
+    Run one step, retrying failures and timeouts. Returns a timing record.
+
+    execute(argv, log, timeout_s) -> (returncode, extra timings) runs a single attempt;
+    by default argv runs as a subprocess.
+    """
+    execute = execute or _run_subprocess
+    log_path.parent.mkdir(parents=True, exist_ok=True)
+    started = time.time()
+    attempts, status, extra = 0, "failed", {}
+    # Append mode: a warm child writes to the same file through its own descriptor
+    with open(log_path, "a") as log:
+        for attempts in range(1, retries + 2):
+            log.write(f"$ {' '.join(argv)}  (attempt {attempts})\n")
+            log.flush()
+            try:
+                returncode, extra = execute(argv, log, timeout_s)
+                if returncode == 0:
+                    status = "succeeded"
+                    break
+                log.write(f"exit code {returncode}\n")
+            except subprocess.TimeoutExpired:
+                log.write(f"timed out after {timeout_s}s\n")
+                status = "timed out"
+            log.flush()
+    return {"step": step["name"], "status": status, "attempts": attempts,
+            "start": started, "end": time.time(), "log": str(log_path), **extra}
+
+
+def critical_path(steps, timings):
+    """Longest chain of dependent steps by duration: (seconds, [step names])."""
+    best = {}
+
+    def visit(name):
+        if name not in best:
+            duration = timings[name]["end"] - timings[name]["start"] if name in timings else 0.0
+            upstream = max((visit(d) for d in steps[name]["depends_on"]), default=(0.0, []), key=lambda x: x[0])
+            best[name] = (upstream[0] + duration, upstream[1] + [name])
+        return best[name]
+
+    return max((visit(name) for name in steps), default=(0.0, []), key=lambda x: x[0])
+
+
+def print_timing_report(steps, timings, wall_s):
+    t0 = min((t["start"] for t in timings.values()), default=0.0)
+    print("⏱️ Step timings:")
+    for name, t in sorted(timings.items(), key=lambda item: item[1]["start"]):
+        warm = f"  startup={t['startup_s']:.3f}s  import={t.get('import_s', 0):.2f}s" if "startup_s" in t else ""
+        print(f"   {name:<14} {t['status']:<10} start=+{t['start'] - t0:6.1f}s  "
+              f"duration={t['end'] - t['start']:6.1f}s  attempts={t['attempts']}{warm}")
+    busy = sum(t["end"] - t["start"] for t in timings.values())
+    cp_seconds, cp_steps = critical_path(steps, timings)
+    print(f"🧵 Critical path ({cp_seconds:.1f}s): {' → '.join(cp_steps)}")
+    print(f"📈 Wall time {wall_s:.1f}s for {busy:.1f}s of step time "
+          f"(parallel speedup {busy / wall_s if wall_s else 0:.2f}x)")
+    return {"critical_path": cp_steps, "critical_path_s": cp_seconds, "wall_s": wall_s, "step_s": busy}
+
+
+def run_local_pipeline(config):
+    """
+    Run the pipeline DAG on this machine.
+
+    Steps whose upstream steps have all succeeded run concurrently as subprocesses,
+    at most max_workers at a time; outputs are files under work_dir/<run>/<step>/ and
+    are passed to downstream steps as paths. Failed steps are retried, and steps
+    downstream of a failure are skipped. With local.warm, stage scripts run as forks
+    of a parent that has imported the heavy libraries once (see helper.warm_runner).
+    """
+    local_cfg = get_local_config(config)
+    pipeline_inputs, steps = load_pipeline_dag(Path(local_cfg["pipeline_file"]), Path(local_cfg["jobs_dir"]))
+    pipeline_inputs = {**pipeline_inputs, "config_path": config["job"]["config_path"],
+                       "compute_target": "local"}
+
+    run_dir = Path(local_cfg["work_dir"]) / time.strftime("run_%Y%m%d_%H%M%S")
+    run_dir.mkdir(parents=True, exist_ok=True)
+    print(f"🖥️ Running {len(steps)} steps locally with up to {local_cfg['max_workers']} workers → {run_dir}")
+
+    warm_runner = get_warm_runner(config, local_cfg)
+    step_outputs, timings, skipped = {}, {}, set()
+    remaining = dict(steps)
+    started = time.time()
+    with ThreadPoolExecutor(local_cfg["max_workers"]) as pool:
+        running = {}
+        while remaining or running:
+            for name, step in list(remaining.items()):
+                if any(d in skipped or timings.get(d, {}).get("status") not in (None, "succeeded")
+                       for d in step["depends_on"]):
+                    skipped.add(name)
+                    del remaining[name]
+                    print(f"⏭️ {name}: skipped (upstream failed)")
+                elif all(d in step_outputs for d in step["depends_on"]):
+                    overrides = local_cfg["steps"].get(name, {})
+                    argv, outputs = build_command(step, pipeline_inputs, step_outputs, run_dir)
+                    execute = warm_runner.execute if warm_runner and warm_runner.can_run(argv) else None
+                    print(f"▶️ {name}{' (warm)' if execute else ''}: {' '.join(argv)}")
+                    future = pool.submit(run_step, step, argv, run_dir / name / "log.txt",
+                                         overrides.get("retries", local_cfg["retries"]),
+                                         overrides.get("timeout_s", local_cfg["timeout_s"]), execute)
+                    running[future] = (name, outputs)
+                    del remaining[name]
+            if not running:
+                break
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                name, outputs = running.pop(future)
+                timings[name] = future.result()
+                if timings[name]["status"] == "succeeded":
+                    step_outputs[name] = outputs
+                    print(f"✅ {name} succeeded in {timings[name]['end'] - timings[name]['start']:.1f}s")
+                else:
+                    print(f"❌ {name} {timings[name]['status']} after {timings[name]['attempts']} attempts "
+                          f"(log: {timings[name]['log']})")
+    wall_s = time.time() - started
+
+    report = print_timing_report(steps, timings, wall_s)
+    if warm_runner:
+        report["warmup_s"] = warm_runner.warmup_s
+    report["steps"] = timings
+    report["skipped"] = sorted(skipped)
+    with open(run_dir / "timings.json", "w") as f:
+        json.dump(report, f, indent=2)
+
+    failed = [name for name, t in timings.items() if t["status"] != "succeeded"]
+    if failed or skipped:
+        raise RuntimeError(f"Local pipeline failed: {failed} (skipped downstream: {sorted(skipped)})")
+    print("🏁 Local pipeline finished")
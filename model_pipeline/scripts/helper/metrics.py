@@ -0,0 +1,257 @@
+import numpy as np
+
+METRIC_NAMES = ("accuracy", "precision", "recall", "f1_score")
+DEFAULT_SWEEP_BINS = 100
+
+
+def get_evaluation_config(config):
+    """
+    Settings for the metric engine from config["evaluation"].
+
+    gate_on: "point" compares metrics_threshold to the point estimates,
+             "lower_bound" to the lower end of the bootstrap confidence interval,
+             "cv_mean" to the training run's cross-validation means (models
+             must be trained with cross_validation enabled).
+    average: None picks "binary" when pos_label has at most one other class,
+             "macro" otherwise.
+    """
+    return {
+        "gate_on": "point",
+        "n_bootstrap": 2000,
+        "confidence": 0.95,
+        "pos_label": 1,
+        "average": None,
+        "sweep_bins": DEFAULT_SWEEP_BINS,
+        "random_state": 42,
+        **config.get("evaluation", {}),
+    }
+
+
+def get_metrics_thresholds(config, model_cfg):
+    """The model's metrics_threshold block, or the top-level one when the model has none."""
+    return model_cfg.get("metrics_threshold", config.get("metrics_threshold", {}))
+
+
+def get_labels(y_true, y_pred, classes=None, pos_label=None):
+    """
+    Sorted labels the confusion matrix is built over: the observed ones, the model's
+    classes_ and pos_label. A class nobody predicted (or that is missing from the
+    holdout) still counts, so a binary model never falls back to macro averaging.
+    """
+    labels = np.union1d(np.asarray(y_true), np.asarray(y_pred))
+    if classes is not None:
+        labels = np.union1d(labels, np.asarray(classes))
+    if pos_label is not None:
+        labels = np.union1d(labels, [pos_label])
+    return labels
+
+
+def confusion_counts(y_true, y_pred, labels):
+    """Confusion matrix (rows = true, columns = predicted) over sorted labels, via one bincount."""
+    labels = np.asarray(labels)
+    n = len(labels)
+    true_idx = np.searchsorted(labels, np.asarray(y_true))
+    pred_idx = np.searchsorted(labels, np.asarray(y_pred))
+    return np.bincount(true_idx * n + pred_idx, minlength=n * n).reshape(n, n)
+
+
+def _resolve_average(labels, pos_label, average):
+    if average:
+        return average
+    return "binary" if len(labels) <= 2 and pos_label in labels.tolist() else "macro"
+
+
+def _safe_div(num, den):
+    num, den = np.broadcast_arrays(np.asarray(num, dtype=float), np.asarray(den, dtype=float))
+    return np.divide(num, den, out=np.zeros(num.shape), where=den != 0)
+
+
+def _metrics_from_counts(cm, pos, average):
+    """
+    Metrics for one (k, k) or a stack of (..., k, k) confusion matrices.
+
+    Matches sklearn's accuracy/precision/recall/f1 with zero_division=0.
+    """
+    cm = np.asarray(cm, dtype=float)
+    tp = np.diagonal(cm, axis1=-2, axis2=-1)
+    predicted = cm.sum(axis=-2)
+    actual = cm.sum(axis=-1)
+    accuracy = _safe_div(tp.sum(axis=-1), cm.sum(axis=(-2, -1)))
+
+    if average == "binary":
+        tp, predicted, actual = tp[..., pos], predicted[..., pos], actual[..., pos]
+        precision = _safe_div(tp, predicted)
+        recall = _safe_div(tp, actual)
+        f1 = _safe_div(2 * tp, predicted + actual)
+    elif average == "micro":
+        precision = recall = f1 = accuracy
+    elif average in ("macro", "weighted"):
+        per_precision = _safe_div(tp, predicted)
+        per_recall = _safe_div(tp, actual)
+        per_f1 = _safe_div(2 * tp, predicted + actual)
+        if average == "macro":
+            weights = np.full(actual.shape, 1.0 / actual.shape[-1])
+        else:
+            weights = _safe_div(actual, actual.sum(axis=-1, keepdims=True))
+        precision = (per_precision * weights).sum(axis=-1)
+        recall = (per_recall * weights).sum(axis=-1)
+        f1 = (per_f1 * weights).sum(axis=-1)
+    else:
+        raise ValueError(f"Unsupported average '{average}': use binary, micro, macro or weighted")
+
+    return {"accuracy": accuracy, "precision": precision, "recall": recall, "f1_score": f1}
+
+
+def metrics_from_confusion(cm, labels, pos_label=1, average=None):
+    """Accuracy/precision/recall/f1 derived from a single confusion matrix."""
+    labels = np.asarray(labels)
+    average = _resolve_average(labels, pos_label, average)
+    pos = labels.tolist().index(pos_label) if average == "binary" else None
+    return {k: float(v) for k, v in _metrics_from_counts(cm, pos, average).items()}
+
+
+def compute_metrics(y_true, y_pred, classes=None, pos_label=1, average=None):
+    """
+    Build the confusion matrix once and derive every metric from it.
+
+    classes is the model's classes_; with pos_label it fixes the labels whatever the
+    holdout happens to contain (see get_labels).
+    """
+    labels = get_labels(y_true, y_pred, classes, pos_label)
+    return metrics_from_confusion(confusion_counts(y_true, y_pred, labels), labels, pos_label, average)
+
+
+def bootstrap_intervals(cm, labels, pos_label=1, average=None, n_resamples=2000,
+                        confidence=0.95, random_state=42):
+    """
+    Percentile bootstrap confidence intervals for every metric.
+
+    Resampling rows with replacement only changes how many rows fall into each
+    confusion cell, so each resample is drawn directly as a multinomial over the
+    k*k cells. All resamples are one (n_resamples, k, k) array, and the cost does
+    not depend on the number of rows.
+    """
+    labels = np.asarray(labels)
+    average = _resolve_average(labels, pos_label, average)
+    pos = labels.tolist().index(pos_label) if average == "binary" else None
+
+    cm = np.asarray(cm)
+    n = int(cm.sum())
+    k = cm.shape[0]
+    if n == 0:
+        return {m: {"lower": 0.0, "upper": 0.0} for m in METRIC_NAMES}
+
+    rng = np.random.default_rng(random_state)
+    samples = rng.multinomial(n, cm.ravel() / n, size=n_resamples).reshape(n_resamples, k, k)
+    resampled = _metrics_from_counts(samples, pos, average)
+
+    tail = (1 - confidence) / 2 * 100
+    return {
+        name: {
+            "lower": float(np.percentile(values, tail)),
+            "upper": float(np.percentile(values, 100 - tail)),
+        }
+        for name, values in resampled.items()
+    }
+
+
+def score_histograms(y_true, y_score, pos_label=1, bins=DEFAULT_SWEEP_BINS):
+    """
+    Histograms of positive-class scores for positive and negative rows.
+
+    They can be summed across chunks and are all that threshold_sweep needs.
+    """
+    edges = np.linspace(0.0, 1.0, bins + 1)
+    positive = np.asarray(y_true) == pos_label
+    y_score = np.asarray(y_score)
+    pos_hist, _ = np.histogram(y_score[positive], bins=edges)
+    neg_hist, _ = np.histogram(y_score[~positive], bins=edges)
+    return pos_hist, neg_hist
+
+
+def threshold_sweep(pos_hist, neg_hist):
+    """
+    Binary metrics at every bin edge used as the decision threshold (score >= t).
+
+    Counts come from reverse cumulative sums of the score histograms, so the sweep
+    is O(bins) whatever the number of rows.
+    """
+    bins = len(pos_hist)
+    thresholds = np.linspace(0.0, 1.0, bins + 1)[:-1]
+    tp = np.cumsum(pos_hist[::-1])[::-1]
+    fp = np.cumsum(neg_hist[::-1])[::-1]
+    total_pos, total_neg = pos_hist.sum(), neg_hist.sum()
+    fn = total_pos - tp
+    tn = total_neg - fp
+    return {
+        "threshold": thresholds,
+        "accuracy": _safe_div(tp + tn, total_pos + total_neg),
+        "precision": _safe_div(tp, tp + fp),
+        "recall": _safe_div(tp, total_pos),
+        "f1_score": _safe_div(2 * tp, 2 * tp + fp + fn),
+    }
+
+
+def best_threshold(sweep, metric="f1_score"):
+    i = int(np.argmax(sweep[metric]))
+    return {"threshold": float(sweep["threshold"][i]), **{m: float(sweep[m][i]) for m in METRIC_NAMES}}
+
+
+def summarize_confusion(cm, labels, eval_cfg, histograms=None):
+    """Point metrics, confidence intervals and optional threshold sweep from accumulated counts."""
+    pos_label, average = eval_cfg["pos_label"], eval_cfg["average"]
+    result = {
+        "labels": np.asarray(labels).tolist(),
+        "confusion_matrix": np.asarray(cm).tolist(),
+        "metrics": metrics_from_confusion(cm, labels, pos_label, average),
+        "intervals": bootstrap_intervals(
+            cm, labels, pos_label, average, eval_cfg["n_bootstrap"],
+            eval_cfg["confidence"], eval_cfg["random_state"]
+        ),
+    }
+    if histograms is not None:
+        sweep = threshold_sweep(*histograms)
+        result["best_threshold"] = best_threshold(sweep)
+        result["threshold_sweep"] = {k: np.round(v, 6).tolist() for k, v in sweep.items()}
+    return result
+
+
+def predict_with_scores(model, X, pos_label=1):
+    """
+    Predictions plus positive-class probabilities from a single predict_proba call.
+
+    Returns (y_pred, None) for models without predict_proba or non-binary problems.
+    """
+    classes = getattr(model, "classes_", None)
+    if not hasattr(model, "predict_proba") or classes is None or len(classes) != 2 \
+            or pos_label not in classes.tolist():
+        return model.predict(X), None
+    proba = model.predict_proba(X)
+    return classes[np.argmax(proba, axis=1)], proba[:, classes.tolist().index(pos_label)]
+
+
+def evaluate_predictions(y_true, y_pred, y_score=None, eval_cfg=None, classes=None):
+    """
+    Full evaluation of one holdout: point metrics, bootstrap intervals and, when
+    positive-class scores are given, a threshold sweep with its best point.
+    """
+    eval_cfg = eval_cfg or get_evaluation_config({})
+    labels = get_labels(y_true, y_pred, classes, eval_cfg["pos_label"])
+    cm = confusion_counts(y_true, y_pred, labels)
+    histograms = None
+    if y_score is not None:
+        histograms = score_histograms(y_true, y_score, eval_cfg["pos_label"], eval_cfg["sweep_bins"])
+    return summarize_confusion(cm, labels, eval_cfg, histograms)
+
+
+def gate_metrics(evaluation, eval_cfg):
+    """The values metrics_threshold is compared against: point estimates, lower bounds or CV means."""
+    if eval_cfg["gate_on"] == "lower_bound":
+        return {m: bounds["lower"] for m, bounds in evaluation["intervals"].items()}
+    if eval_cfg["gate_on"] == "cv_mean":
+        if "cv" not in evaluation:
+            raise ValueError("gate_on 'cv_mean' needs the training run's cross-validation metrics")
+        return evaluation["cv"]["mean"]
+    if eval_cfg["gate_on"] == "point":
+        return evaluation["metrics"]
+    raise ValueError(f"Unsupported gate_on '{eval_cfg['gate_on']}': use 'point', 'lower_bound' or 'cv_mean'")
@@ -0,0 +1,121 @@
+import asyncio
+import time
+from collections import Counter, deque
+
+import numpy as np
+import pandas as pd
+
+LATENCY_WINDOW = 10_000
+
+
+class ServingStats:
+    """Request latencies (last LATENCY_WINDOW requests) and a power-of-two batch-size histogram."""
+
+    def __init__(self):
+        self.latencies_ms = deque(maxlen=LATENCY_WINDOW)
+        self.batch_sizes = Counter()
+        self.requests = 0
+        self.rows = 0
+        self.batches = 0
+
+    def record_request(self, seconds):
+        self.requests += 1
+        self.latencies_ms.append(seconds * 1000)
+
+    def record_batch(self, rows):
+        self.batches += 1
+        self.rows += rows
+        bucket = 1 << (max(rows, 1) - 1).bit_length()
+        self.batch_sizes[bucket] += 1
+
+    def summary(self):
+        latencies = np.array(self.latencies_ms) if self.latencies_ms else np.zeros(1)
+        return {
+            "requests": self.requests,
+            "rows": self.rows,
+            "batches": self.batches,
+            "mean_batch_rows": round(self.rows / self.batches, 2) if self.batches else 0.0,
+            "latency_ms": {
+                "p50": round(float(np.percentile(latencies, 50)), 3),
+                "p99": round(float(np.percentile(latencies, 99)), 3),
+            },
+            # bucket upper bound (rows) -> number of batches
+            "batch_size_histogram": {f"<={k}": v for k, v in sorted(self.batch_sizes.items())},
+        }
+
+
+class MicroBatcher:
+    """
+    Gather concurrent predict requests into one vectorized predict call.
+
+    A batch is closed when it holds max_batch_size rows or max_delay_ms after its
+    first request arrived, whichever comes first. predict_fn runs in the default
+    executor so the event loop keeps accepting requests meanwhile; max_batch_size=1
+    serves every request on its own.
+
+        batcher = MicroBatcher(model.predict, max_batch_size=64, max_delay_ms=5)
+        batcher.start()
+        predictions = await batcher.predict(rows_df)
+    """
+
+    def __init__(self, predict_fn, max_batch_size=64, max_delay_ms=5.0):
+        self.predict_fn = predict_fn
+        self.max_batch_size = max_batch_size
+        self.max_delay = max_delay_ms / 1000
+        self.stats = ServingStats()
+        self._queue = None
+        self._task = None
+
+    def start(self):
+        self._queue = asyncio.Queue()
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+
+    async def predict(self, rows: pd.DataFrame):
+        started = time.perf_counter()
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((rows, future))
+        result = await future
+        self.stats.record_request(time.perf_counter() - started)
+        return result
+
+    async def _collect(self):
+        batch = [await self._queue.get()]
+        n_rows = len(batch[0][0])
+        deadline = time.perf_counter() + self.max_delay
+        while n_rows < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                item = await asyncio.wait_for(self._queue.get(), remaining)
+            except asyncio.TimeoutError:
+                break
+            batch.append(item)
+            n_rows += len(item[0])
+        return batch, n_rows
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch, n_rows = await self._collect()
+            frames = [rows for rows, _ in batch]
+            X = frames[0] if len(frames) == 1 else pd.concat(frames, ignore_index=True)
+            try:
+                predictions = await loop.run_in_executor(None, self.predict_fn, X)
+            except Exception as exc:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(exc)
+                continue
+            self.stats.record_batch(n_rows)
+
+            offset = 0
+            for rows, future in batch:
+                if not future.done():
+                    future.set_result(predictions[offset:offset + len(rows)])
+                offset += len(rows)
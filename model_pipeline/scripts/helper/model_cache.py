@@ -0,0 +1,146 @@
+import hashlib
+import os
+import shutil
+import threading
+from collections import OrderedDict
+from pathlib import Path
+
+import mlflow
+from mlflow.tracking import MlflowClient
+
+from helper.forest_engine import ENGINE_ARTIFACT_PATH, ENGINE_FILE, INFERENCE_ENGINES, CompiledForest
+
+DEFAULT_MODEL_CACHE_DIR = "./.cache/models"
+DEFAULT_MAX_SIZE_MB = 2048
+DEFAULT_MAX_IN_MEMORY = 8
+
+
+def _dir_size(path: Path) -> int:
+    return sum(f.stat().st_size for f in path.rglob("*") if f.is_file())
+
+
+def load_local_model(path):
+    """A downloaded MLflow sklearn model directory, or a compiled engine directory (memory-mapped)."""
+    path = Path(path)
+    if (path / ENGINE_FILE).exists():
+        return CompiledForest.load(path)
+    return mlflow.sklearn.load_model(str(path))
+
+
+class ModelCache:
+    """
+    Two-level cache for MLflow sklearn models.
+
+    Deserialized models are kept in process (LRU, max_in_memory entries). Downloaded
+    artifacts are kept on disk under <cache_dir>/<run_id>-<digest of artifact_path>
+    and evicted least-recently-used once the directory exceeds max_size_mb. MLflow run
+    artifacts are write-once, so (run_id, artifact_path) names their content and a hit
+    needs no tracking server round trip. Safe to share between threads.
+    """
+
+    def __init__(self, cache_dir=DEFAULT_MODEL_CACHE_DIR, max_size_mb=DEFAULT_MAX_SIZE_MB,
+                 max_in_memory=DEFAULT_MAX_IN_MEMORY, client: MlflowClient = None):
+        self.cache_dir = Path(cache_dir)
+        self.max_bytes = int(max_size_mb * 1024 * 1024)
+        self.max_in_memory = max_in_memory
+        self.client = client or MlflowClient()
+        self._models = OrderedDict()
+        self.stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "evictions": 0}
+        self._lock = threading.Lock()
+
+    def _count(self, stat):
+        with self._lock:
+            self.stats[stat] += 1
+
+    def entry_path(self, run_id, artifact_path="model") -> Path:
+        digest = hashlib.sha256(artifact_path.encode()).hexdigest()[:16]
+        return self.cache_dir / f"{run_id}-{digest}"
+
+    def get_local_path(self, run_id, artifact_path="model") -> Path:
+        """Return a local copy of the run's artifact directory, downloading it only on a miss."""
+        entry = self.entry_path(run_id, artifact_path)
+        local_path = entry / artifact_path
+
+        if local_path.exists():
+            self._count("disk_hits")
+            os.utime(entry)  # mark as recently used
+            return local_path
+
+        self._count("misses")
+        tmp_entry = self.cache_dir / f".tmp-{run_id}-{os.getpid()}-{threading.get_ident()}"
+        tmp_entry.mkdir(parents=True, exist_ok=True)
+        mlflow.artifacts.download_artifacts(run_id=run_id, artifact_path=artifact_path, dst_path=str(tmp_entry))
+        try:
+            os.replace(tmp_entry, entry)
+        except OSError:
+            # Another process cached the same artifact first
+            shutil.rmtree(tmp_entry, ignore_errors=True)
+        with self._lock:
+            self._evict(keep=entry)
+        return local_path
+
+    def inference_artifact(self, run_id, engine="sklearn"):
+        """Artifact path to predict with: the compiled engine when asked for and logged, else the model."""
+        if engine not in INFERENCE_ENGINES:
+            raise ValueError(f"Unknown inference engine '{engine}': use one of {INFERENCE_ENGINES}")
+        if engine == "compiled":
+            if self.client.list_artifacts(run_id, ENGINE_ARTIFACT_PATH):
+                return ENGINE_ARTIFACT_PATH
+            print(f"ℹ️ Run {run_id} has no compiled engine; using the sklearn model")
+        return "model"
+
+    def load(self, run_id, artifact_path="model", local_path=None):
+        """
+        Load runs:/<run_id>/<artifact_path> (sklearn model or compiled engine), from the cheapest level available.
+
+        local_path is a copy already returned by get_local_path (e.g. in another
+        process sharing the cache directory); it skips the artifact lookup on a memory miss.
+        """
+        key = (run_id, artifact_path)
+        with self._lock:
+            if key in self._models:
+                self.stats["memory_hits"] += 1
+                self._models.move_to_end(key)
+                return self._models[key]
+
+        model = load_local_model(local_path or self.get_local_path(run_id, artifact_path))
+        with self._lock:
+            self._models[key] = model
+            if len(self._models) > self.max_in_memory:
+                self._models.popitem(last=False)
+        return model
+
+    def _evict(self, keep: Path):
+        entries = [p for p in self.cache_dir.iterdir() if p.is_dir() and not p.name.startswith(".tmp-")]
+        sizes = {p: _dir_size(p) for p in entries}
+        total = sum(sizes.values())
+        for path in sorted(entries, key=lambda p: p.stat().st_mtime):
+            if total <= self.max_bytes:
+                break
+            if path == keep:
+                continue
+            shutil.rmtree(path, ignore_errors=True)
+            total -= sizes[path]
+            self.stats["evictions"] += 1
+
+    def add_stats(self, stats):
+        """Count lookups made by another process's cache (e.g. a worker's in-memory hits)."""
+        with self._lock:
+            for stat, count in stats.items():
+                self.stats[stat] += count
+
+    def report(self):
+        hits = self.stats["memory_hits"] + self.stats["disk_hits"]
+        lookups = hits + self.stats["misses"]
+        rate = hits / lookups if lookups else 0.0
+        print(f"🗃️ Model cache: {hits}/{lookups} hits ({rate:.0%}) — {self.stats}")
+
+
+def get_model_cache(config, client: MlflowClient = None) -> ModelCache:
+    cache_cfg = config.get("model_cache", {})
+    return ModelCache(
+        cache_dir=cache_cfg.get("dir", DEFAULT_MODEL_CACHE_DIR),
+        max_size_mb=cache_cfg.get("max_size_mb", DEFAULT_MAX_SIZE_MB),
+        max_in_memory=cache_cfg.get("max_in_memory", DEFAULT_MAX_IN_MEMORY),
+        client=client,
+    )
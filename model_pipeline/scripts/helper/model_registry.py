@@ -0,0 +1,74 @@
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.linear_model import LogisticRegression
+
+from helper.forest_engine import compile_forest
+from helper.incremental import update_logistic_regression, update_random_forest
+from helper.streaming import fit_lr_streaming, fit_rf_streaming
+
+
+def build_logistic_regression(hparams):
+    return LogisticRegression(
+        C=hparams.get("C", 1.0),
+        solver=hparams.get("solver", "lbfgs"),
+        max_iter=hparams.get("max_iter", 100)
+    )
+
+
+def logistic_regression_params(hparams):
+    return {
+        "C": hparams.get("C", 1.0),
+        "solver": hparams.get("solver", "lbfgs"),
+        "max_iter": hparams.get("max_iter", 100)
+    }
+
+
+def build_random_forest(hparams):
+    return RandomForestClassifier(
+        n_estimators=hparams.get("n_estimators", 100),
+        max_depth=hparams.get("max_depth", None),
+        random_state=hparams.get("random_state", 42)
+    )
+
+
+def random_forest_params(hparams):
+    return {
+        "n_estimators": hparams.get("n_estimators", 100),
+        "max_depth": hparams.get("max_depth", None),
+        "random_state": hparams.get("random_state", 42)
+    }
+
+
+# Model types that can appear as config["models"][i]["type"].
+# build: hyperparameters -> unfitted estimator for batch training
+# fit_streaming: out-of-core trainer (see helper.streaming)
+# update: (registered model, new + replayed rows) -> updated model (see helper.incremental)
+# params: hyperparameters -> dict logged to MLflow
+# suffix: short tag used in output file names
+# compile: fitted estimator -> compiled inference engine logged next to it (optional)
+MODEL_REGISTRY = {
+    "logistic_regression": {
+        "build": build_logistic_regression,
+        "fit_streaming": fit_lr_streaming,
+        "update": update_logistic_regression,
+        "params": logistic_regression_params,
+        "suffix": "lr",
+    },
+    "random_forest": {
+        "build": build_random_forest,
+        "fit_streaming": fit_rf_streaming,
+        "update": update_random_forest,
+        "params": random_forest_params,
+        "suffix": "rf",
+        "compile": compile_forest,
+    },
+}
+
+
+def get_model_entry(model_cfg):
+    model_type = model_cfg.get("type")
+    if model_type not in MODEL_REGISTRY:
+        raise ValueError(
+            f"Unsupported model type '{model_type}' for '{model_cfg['name']}': "
+            f"use one of {sorted(MODEL_REGISTRY)}"
+        )
+    return MODEL_REGISTRY[model_type]
@@ -0,0 +1,210 @@
+import json
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from pathlib import Path
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+PROFILE_ENV_VAR = "MLOPS_PROFILE"
+MB = 1024 * 1024
+
+
+def get_profiling_config(config):
+    """Settings for stage profiling from config["profiling"]; MLOPS_PROFILE=1 turns it on."""
+    profiling_cfg = {
+        "enabled": False,
+        "trace_memory": False,   # tracemalloc peak per span; slows allocation-heavy code down
+        "trace_dir": str(Path(config["data"]["output_dir"]) / "traces"),
+        **config.get("profiling", {}),
+    }
+    if os.getenv(PROFILE_ENV_VAR, "") not in ("", "0"):
+        profiling_cfg["enabled"] = True
+    return profiling_cfg
+
+
+def _rss_mb():
+    """Current resident set size (Linux only)."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / MB
+    except (OSError, ValueError):
+        return None
+
+
+def _max_rss_mb():
+    """Peak resident set size of this process so far."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / MB if sys.platform == "darwin" else peak / 1024
+
+
+class Profiler:
+    """
+    Named spans with wall time, CPU time and memory, exported as a Chrome trace.
+
+        with span("fit", model="model_rf"):
+            model.fit(X, y)
+
+    Each span records wall and process CPU seconds, the RSS at its end and the process's
+    peak RSS so far; with trace_memory, also the peak of Python allocations while it was
+    open (tracemalloc is process-wide, so concurrent spans in other threads count too).
+    A span without a model argument inherits the model of the enclosing span in its
+    thread. Spans from worker processes are merged in with extend(). A disabled
+    profiler's spans cost one attribute check.
+    """
+
+    def __init__(self, stage="pipeline", enabled=True, trace_memory=False, trace_dir=None):
+        self.stage = stage
+        self.enabled = enabled
+        self.trace_memory = trace_memory and enabled
+        self.trace_dir = trace_dir
+        self.events = []
+        self._lock = threading.Lock()
+        self._open_peaks = []
+        self._local = threading.local()
+        if self.trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    def add(self, name, start, end, cpu_s=None, **args):
+        """Record a span measured elsewhere (start/end are time.time() values)."""
+        if not self.enabled:
+            return
+        args = {k: v for k, v in {"cpu_s": cpu_s, "rss_mb": _rss_mb(), "max_rss_mb": _max_rss_mb(), **args}.items()
+                if v is not None}
+        with self._lock:
+            self.events.append({
+                "name": name, "cat": self.stage, "ph": "X",
+                "ts": int(start * 1e6), "dur": max(int((end - start) * 1e6), 1),
+                "pid": os.getpid(), "tid": threading.get_ident(), "args": args,
+            })
+
+    def _open_memory_span(self):
+        _, peak = tracemalloc.get_traced_memory()
+        with self._lock:
+            # Fold the peak so far into the spans already open before resetting it
+            for entry in self._open_peaks:
+                entry[0] = max(entry[0], peak)
+            entry = [0]
+            self._open_peaks.append(entry)
+        tracemalloc.reset_peak()
+        return entry
+
+    def _close_memory_span(self, entry):
+        _, peak = tracemalloc.get_traced_memory()
+        with self._lock:
+            entry[0] = max(entry[0], peak)
+            self._open_peaks.remove(entry)
+            for other in self._open_peaks:
+                other[0] = max(other[0], entry[0])
+        return entry[0] / MB
+
+    @contextmanager
+    def span(self, name, **args):
+        if not self.enabled:
+            yield
+            return
+        models = self._local.__dict__.setdefault("models", [])
+        if models and "model" not in args:
+            args["model"] = models[-1]
+        models.append(args.get("model"))
+        memory = self._open_memory_span() if self.trace_memory else None
+        start, cpu_start = time.time(), time.process_time()
+        try:
+            yield
+        finally:
+            models.pop()
+            if memory is not None:
+                args["py_peak_mb"] = round(self._close_memory_span(memory), 3)
+            self.add(name, start, time.time(), cpu_s=round(time.process_time() - cpu_start, 4), **args)
+
+    def drain(self):
+        """Hand this process's events over (to a parent process) and forget them."""
+        with self._lock:
+            events, self.events = self.events, []
+        return events
+
+    def extend(self, events):
+        with self._lock:
+            self.events.extend(events)
+
+    def summary(self, model=None):
+        """Totals per span name: {name: {count, wall_s, cpu_s, max_rss_mb[, py_peak_mb]}}."""
+        totals = {}
+        with self._lock:
+            events = list(self.events)
+        for event in events:
+            if model is not None and event["args"].get("model") not in (None, model):
+                continue
+            total = totals.setdefault(event["name"], {"count": 0, "wall_s": 0.0, "cpu_s": 0.0})
+            total["count"] += 1
+            total["wall_s"] += event["dur"] / 1e6
+            total["cpu_s"] += event["args"].get("cpu_s", 0.0)
+            for key in ("max_rss_mb", "py_peak_mb"):
+                if key in event["args"]:
+                    total[key] = max(total.get(key, 0.0), event["args"][key])
+        return totals
+
+    def log_to_run(self, run_id, model=None, client=None):
+        """
+        Log span totals as metrics profile.<stage>.<span>.<wall_s|cpu_s|...> on an MLflow run.
+
+        With model, spans of other models are left out (spans without a model count).
+        """
+        totals = self.summary(model)
+        if not self.enabled or not totals:
+            return
+        from helper.batch_logger import BatchLogger
+        with BatchLogger(client, verbose=False) as logger:
+            for name, total in totals.items():
+                logger.log_metrics(run_id, {f"profile.{self.stage}.{name}.{key}": value
+                                            for key, value in total.items() if key != "count"})
+
+    def write_chrome_trace(self, path=None):
+        """Write the events as Chrome trace-event JSON (chrome://tracing, ui.perfetto.dev)."""
+        if not self.enabled or not self.events:
+            return None
+        if path is None:
+            path = Path(self.trace_dir or ".") / f"{self.stage}_{time.strftime('%Y%m%d_%H%M%S')}_{os.getpid()}.json"
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        names = [{"name": "process_name", "ph": "M", "pid": pid, "args": {"name": f"{self.stage} ({pid})"}}
+                 for pid in sorted({e["pid"] for e in self.events})]
+        with open(path, "w") as f:
+            json.dump({"traceEvents": names + self.events, "displayTimeUnit": "ms"}, f)
+        return path
+
+    def report(self):
+        """Print per-span totals and write the trace file."""
+        if not self.enabled or not self.events:
+            return
+        print(f"🔬 Profile of {self.stage} (wall / cpu / peak RSS):")
+        for name, total in sorted(self.summary().items(), key=lambda item: -item[1]["wall_s"]):
+            print(f"   {name:<28} x{total['count']:<3} {total['wall_s']:8.3f}s {total['cpu_s']:8.3f}s "
+                  f"{total.get('max_rss_mb', 0):8.1f} MB")
+        print(f"🧾 Chrome trace written to {self.write_chrome_trace()}")
+
+
+_profiler = Profiler(enabled=False)
+
+
+def init_profiler(profiling_cfg, stage) -> Profiler:
+    """Make a profiler for this process's stage the one span() records into."""
+    global _profiler
+    _profiler = Profiler(stage, profiling_cfg["enabled"], profiling_cfg["trace_memory"], profiling_cfg["trace_dir"])
+    return _profiler
+
+
+def get_profiler() -> Profiler:
+    return _profiler
+
+
+def span(name, **args):
+    return _profiler.span(name, **args)
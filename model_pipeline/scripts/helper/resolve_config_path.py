@@ -3,7 +3,7 @@ import os
 import argparse
 
 #def resolve_config_path(env_var: str = "CONFIG_PATH", default_relative: str = "config.yaml") -> Path:
-def resolve_config_path():
+def resolve_config_path(argv=None):
     """
     Resolves the configuration file path using the following priority:
     1. Environment variable (e.g., CONFIG_PATH)
@@ -21,7 +21,8 @@ def resolve_config_path():
     """
     parser = argparse.ArgumentParser()
     parser.add_argument("--config", type=str, required=True, help="Path to job config YAML")
-    args = parser.parse_args()
+    # Other flags are read by resolve_step_args
+    args, _ = parser.parse_known_args(argv)
     return args.config
 
     # # Step 1: Compute default path relative to this file
@@ -36,3 +37,19 @@ def resolve_config_path():
 
     # print(f"[config] Using config path: {config_path}")
     # return config_path
+
+
+def resolve_step_args(argv=None):
+    """
+    Optional arguments for running validate/register as one step of a pipeline DAG.
+
+    --models limits the step to some models; --run-id-file and --status-file pass the
+    run produced by the upstream step and its evaluation status between steps.
+    argv defaults to sys.argv (a warm runner passes the step's arguments instead).
+    """
+    parser = argparse.ArgumentParser(add_help=False)
+    parser.add_argument("--models", nargs="*", help="Model names to process (default: all)")
+    parser.add_argument("--run-id-file", type=str, help="File holding the run id to use instead of the latest run")
+    parser.add_argument("--status-file", type=str, help="Evaluation status file (written by validate, read by register)")
+    args, _ = parser.parse_known_args(argv)
+    return args
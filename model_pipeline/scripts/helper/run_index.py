@@ -0,0 +1,226 @@
+import sqlite3
+import threading
+from pathlib import Path
+
+from mlflow.tracking import MlflowClient
+
+DEFAULT_RUN_INDEX_PATH = "./.cache/run_index.sqlite"
+SEARCH_PAGE_SIZE = 1000
+REFRESH_BATCH_SIZE = 100   # run ids per "run_id IN (...)" filter
+# Runs in these states may still get metrics and tags, so they are fetched again on the next sync
+UNFINISHED_STATUSES = ("RUNNING", "SCHEDULED")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS experiments (
+    name TEXT PRIMARY KEY,
+    experiment_id TEXT NOT NULL,
+    watermark INTEGER NOT NULL DEFAULT 0   -- runs starting before this are fully synced
+);
+CREATE TABLE IF NOT EXISTS runs (
+    run_id TEXT PRIMARY KEY,
+    experiment_id TEXT NOT NULL,
+    run_name TEXT,
+    status TEXT,
+    start_time INTEGER,
+    end_time INTEGER
+);
+CREATE INDEX IF NOT EXISTS runs_by_experiment ON runs (experiment_id, start_time DESC);
+CREATE TABLE IF NOT EXISTS metrics (
+    run_id TEXT NOT NULL,
+    key TEXT NOT NULL,
+    value REAL,
+    PRIMARY KEY (run_id, key)
+);
+CREATE INDEX IF NOT EXISTS metrics_by_key ON metrics (key, value);
+CREATE TABLE IF NOT EXISTS tags (
+    run_id TEXT NOT NULL,
+    key TEXT NOT NULL,
+    value TEXT,
+    PRIMARY KEY (run_id, key)
+);
+CREATE INDEX IF NOT EXISTS tags_by_key ON tags (key, value);
+CREATE TABLE IF NOT EXISTS refreshed (
+    run_id TEXT NOT NULL,
+    key TEXT NOT NULL,          -- re-read once for this tag; not re-read again if it was still missing
+    PRIMARY KEY (run_id, key)
+);
+"""
+
+
+class RunIndex:
+    """
+    Local SQLite index of MLflow runs, with their latest metrics and tags.
+
+    sync() fetches runs of the given experiments that started at or after each
+    experiment's watermark, in a single paged search_runs query; the watermark then
+    moves to the latest start time seen (or to the oldest run still in progress).
+    MLflow cannot search on when a run was last updated, so tags another process sets
+    on a finished run (e.g. evaluation_status) are picked up by refresh_tags: a finished
+    run indexed without one of those tags is fetched again by run id, once. Runs that
+    never get the tag (search trials, CV runs, failed or unvalidated runs) are thus not
+    re-read on every sync; a tag set after that one re-read reaches the index only
+    through update(). Lookups such as the latest validated run or the best run by a
+    metric are then local queries. Tags and metrics our scripts write go through
+    update() as well, so the index stays current without another search.
+    """
+
+    def __init__(self, path=DEFAULT_RUN_INDEX_PATH, client: MlflowClient = None):
+        self.path = str(path)
+        if self.path != ":memory:":
+            Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+        self.client = client or MlflowClient()
+        self.server_calls = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+        self._conn.executescript(SCHEMA)
+
+    def _experiment_ids(self, experiment_names):
+        known = dict(self._conn.execute(
+            f"SELECT name, experiment_id FROM experiments WHERE name IN ({','.join('?' * len(experiment_names))})",
+            list(experiment_names)).fetchall())
+        for name in experiment_names:
+            if name not in known:
+                self.server_calls += 1
+                experiment = self.client.get_experiment_by_name(name)
+                if not experiment:
+                    print(f"⚠️ Experiment not found: {name}")
+                    continue
+                known[name] = experiment.experiment_id
+                self._conn.execute("INSERT INTO experiments (name, experiment_id) VALUES (?, ?)",
+                                   (name, experiment.experiment_id))
+        return known
+
+    def _store(self, run):
+        info = run.info
+        self._conn.execute(
+            "INSERT OR REPLACE INTO runs VALUES (?, ?, ?, ?, ?, ?)",
+            (info.run_id, info.experiment_id, info.run_name, info.status, info.start_time, info.end_time))
+        self._conn.executemany("INSERT OR REPLACE INTO metrics VALUES (?, ?, ?)",
+                               [(info.run_id, k, v) for k, v in run.data.metrics.items()])
+        self._conn.executemany("INSERT OR REPLACE INTO tags VALUES (?, ?, ?)",
+                               [(info.run_id, k, v) for k, v in run.data.tags.items()])
+
+    def _search(self, experiment_ids, filter_string):
+        fetched, page_token = 0, None
+        while True:
+            self.server_calls += 1
+            page = self.client.search_runs(experiment_ids, filter_string=filter_string,
+                                           max_results=SEARCH_PAGE_SIZE, page_token=page_token)
+            for run in page:
+                self._store(run)
+            fetched += len(page)
+            page_token = page.token
+            if not page_token:
+                return fetched
+
+    def _missing_tags(self, experiment_ids, refresh_tags):
+        """Finished runs of these experiments that lack one of refresh_tags and were not re-read for it yet."""
+        placeholders = ",".join("?" * len(experiment_ids))
+        missing = " OR ".join(
+            "(NOT EXISTS (SELECT 1 FROM tags t WHERE t.run_id = r.run_id AND t.key = ?)"
+            " AND NOT EXISTS (SELECT 1 FROM refreshed f WHERE f.run_id = r.run_id AND f.key = ?))"
+            for _ in refresh_tags)
+        rows = self._conn.execute(
+            f"SELECT r.run_id FROM runs r WHERE r.experiment_id IN ({placeholders}) "
+            f"AND r.status NOT IN ({','.join('?' * len(UNFINISHED_STATUSES))}) AND ({missing})",
+            [*experiment_ids, *UNFINISHED_STATUSES, *(key for key in refresh_tags for _ in range(2))]).fetchall()
+        return [row[0] for row in rows]
+
+    def sync(self, experiment_names, refresh_tags=()):
+        """
+        Bring the index up to date for these experiments; returns the number of runs fetched.
+
+        refresh_tags are tags the caller selects on that are set after a run starts;
+        finished runs fetched earlier without them are fetched again, once per run.
+        """
+        experiment_names = sorted(set(experiment_names))
+        with self._lock, self._conn:
+            experiment_ids = self._experiment_ids(experiment_names)
+            if not experiment_ids:
+                return 0
+            ids = list(experiment_ids.values())
+            placeholders = ",".join("?" * len(ids))
+            watermark = self._conn.execute(
+                f"SELECT MIN(watermark) FROM experiments WHERE experiment_id IN ({placeholders})", ids).fetchone()[0]
+
+            stale = self._missing_tags(ids, refresh_tags) if refresh_tags else []
+            fetched = self._search(ids, f"attributes.start_time >= {watermark}")
+            for start in range(0, len(stale), REFRESH_BATCH_SIZE):
+                run_ids = ", ".join(f"'{run_id}'" for run_id in stale[start:start + REFRESH_BATCH_SIZE])
+                fetched += self._search(ids, f"attributes.run_id IN ({run_ids})")
+            self._conn.executemany("INSERT OR IGNORE INTO refreshed VALUES (?, ?)",
+                                   [(run_id, key) for run_id in stale for key in refresh_tags])
+
+            for experiment_id in ids:
+                unfinished, latest = self._conn.execute(
+                    f"SELECT MIN(CASE WHEN status IN ({','.join('?' * len(UNFINISHED_STATUSES))}) "
+                    "THEN start_time END), MAX(start_time) FROM runs WHERE experiment_id = ?",
+                    (*UNFINISHED_STATUSES, experiment_id)).fetchone()
+                new_watermark = unfinished if unfinished is not None else latest
+                if new_watermark is not None:
+                    self._conn.execute("UPDATE experiments SET watermark = ? WHERE experiment_id = ?",
+                                       (new_watermark, experiment_id))
+        print(f"🗂️ Run index: {fetched} runs synced from {len(ids)} experiments since watermark {watermark}"
+              + (f" ({len(stale)} re-read for {', '.join(refresh_tags)})" if stale else ""))
+        return fetched
+
+    def update(self, run_id, metrics=None, tags=None):
+        """Write-through for metrics and tags our scripts just logged to a run."""
+        with self._lock, self._conn:
+            self._conn.executemany("INSERT OR REPLACE INTO metrics VALUES (?, ?, ?)",
+                                   [(run_id, k, float(v)) for k, v in (metrics or {}).items()])
+            self._conn.executemany("INSERT OR REPLACE INTO tags VALUES (?, ?, ?)",
+                                   [(run_id, k, str(v)) for k, v in (tags or {}).items()])
+
+    def _query_run(self, experiment_name, tags=None, metric=None, minimum=None):
+        """
+        One run id of an experiment: the latest one, or the best by metric when given.
+
+        tags is {key: value}, or {key: None} to only require that the tag is set.
+        """
+        joins, join_args = ["runs r JOIN experiments e ON e.experiment_id = r.experiment_id"], []
+        where, where_args = ["e.name = ?"], [experiment_name]
+        for i, (key, value) in enumerate((tags or {}).items()):
+            joins.append(f"JOIN tags t{i} ON t{i}.run_id = r.run_id AND t{i}.key = ?")
+            join_args.append(key)
+            if value is not None:
+                where.append(f"t{i}.value = ?")
+                where_args.append(str(value))
+        order_by = "r.start_time DESC"
+        if metric:
+            joins.append("JOIN metrics m ON m.run_id = r.run_id AND m.key = ?")
+            join_args.append(metric)
+            order_by = "m.value DESC, r.start_time DESC"
+            if minimum is not None:
+                where.append("m.value >= ?")
+                where_args.append(float(minimum))
+        sql = f"SELECT r.run_id FROM {' '.join(joins)} WHERE {' AND '.join(where)} ORDER BY {order_by} LIMIT 1"
+        with self._lock:
+            row = self._conn.execute(sql, join_args + where_args).fetchone()
+        return row[0] if row else None
+
+    def latest_run(self, experiment_name, tags=None):
+        """Most recently started run of the experiment, optionally only runs with the given tags."""
+        return self._query_run(experiment_name, tags)
+
+    def best_run(self, experiment_name, metric, minimum=None, tags=None):
+        """Run with the highest value of metric (at least minimum, when given)."""
+        return self._query_run(experiment_name, tags, metric, minimum)
+
+    def get_metrics(self, run_id):
+        with self._lock:
+            return dict(self._conn.execute("SELECT key, value FROM metrics WHERE run_id = ?", (run_id,)).fetchall())
+
+    def get_tags(self, run_id):
+        with self._lock:
+            return dict(self._conn.execute("SELECT key, value FROM tags WHERE run_id = ?", (run_id,)).fetchall())
+
+    def close(self):
+        self._conn.close()
+
+
+def get_run_index(config, client: MlflowClient = None) -> RunIndex:
+    """Run index from config["run_index"]; when disabled it lives in memory for this process only."""
+    index_cfg = config.get("run_index", {})
+    path = index_cfg.get("path", DEFAULT_RUN_INDEX_PATH) if index_cfg.get("enabled", True) else ":memory:"
+    return RunIndex(path, client)
@@ -0,0 +1,201 @@
+import json
+import time
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+ON_VIOLATION = ("warn", "fail", "off")
+
+
+def get_schema_validation_config(config):
+    """How violations of model_input_schema / model_output_schema are handled (config["schema_validation"])."""
+    schema_cfg = {"on_violation": "warn", **config.get("schema_validation", {})}
+    if schema_cfg["on_violation"] not in ON_VIOLATION:
+        raise ValueError(f"Unsupported on_violation '{schema_cfg['on_violation']}': use one of {ON_VIOLATION}")
+    return schema_cfg
+
+
+def _types(spec):
+    types = spec.get("type", [])
+    return set(types) if isinstance(types, list) else {types}
+
+
+def _numeric_values(col):
+    """Column as floats (NaN where missing or not a number) and a mask of present non-numeric values."""
+    if pd.api.types.is_bool_dtype(col):
+        return pd.Series(np.nan, index=col.index), col.notna()
+    if pd.api.types.is_numeric_dtype(col):
+        return col.astype(float), pd.Series(False, index=col.index)
+    values = pd.to_numeric(col.where(~col.map(lambda v: isinstance(v, bool))), errors="coerce")
+    return values, values.isna() & col.notna()
+
+
+def _compile_column(spec, required):
+    """
+    Turn one property spec into a function col -> [(check name, violation mask)].
+
+    Numeric conversion happens once per column and is shared by the type and range checks.
+    """
+    types = _types(spec)
+    # Optional properties may be null (absent); required ones only when declared nullable
+    nullable = spec.get("nullable", False) or "null" in types or not required
+    numeric = bool(types & {"number", "integer"})
+    integer_only = "integer" in types and "number" not in types
+    bounds = [(key, op, spec[key]) for key, op in (("minimum", np.less), ("maximum", np.greater),
+                                              ("exclusiveMinimum", np.less_equal),
+                                              ("exclusiveMaximum", np.greater_equal))
+              if key in spec and not isinstance(spec[key], bool)]
+    allowed = list(spec["enum"]) if "enum" in spec else None
+
+    def check(col):
+        results = []
+        present = col.notna().to_numpy()
+        if not nullable:
+            results.append(("null", ~present))
+        if numeric:
+            values, wrong_type = _numeric_values(col)
+            values = values.to_numpy()
+            results.append(("type", wrong_type.to_numpy()))
+            if integer_only:
+                results.append(("integer", np.nan_to_num(values % 1) != 0))
+            for key, op, bound in bounds:
+                with np.errstate(invalid="ignore"):
+                    results.append((key, op(values, bound)))
+        elif "string" in types:
+            results.append(("type", present & ~col.map(lambda v: isinstance(v, str)).to_numpy()))
+        elif "boolean" in types and not pd.api.types.is_bool_dtype(col):
+            results.append(("type", present & ~col.map(lambda v: isinstance(v, (bool, np.bool_))).to_numpy()))
+        if allowed is not None:
+            results.append(("enum", present & ~col.isin(allowed).to_numpy()))
+        return results
+
+    return check
+
+
+class SchemaValidator:
+    """
+    A model_input_schema / model_output_schema compiled into column-wise checks.
+
+    The JSON-Schema subset used in config.yaml is supported: required, properties
+    with type (number, integer, string, boolean, or a list including null), minimum,
+    maximum, exclusiveMinimum, exclusiveMaximum, enum, nullable, and
+    additionalProperties: false. Required columns without a property spec must be
+    present and non-null; optional properties may be null. Every check is one vectorized operation over a column, so
+    a DataFrame or chunk is validated in a single pass.
+
+        validator = compile_schema(model_cfg["model_input_schema"])
+        report = validator.validate(X_chunk)
+    """
+
+    def __init__(self, schema):
+        schema = schema or {}
+        self.required = list(schema.get("required", []))
+        self.properties = dict(schema.get("properties", {}))
+        self.allow_extra = schema.get("additionalProperties", True) is not False
+        columns = list(dict.fromkeys(self.required + list(self.properties)))
+        self.checks = {name: _compile_column(self.properties.get(name, {}), name in self.required)
+                       for name in columns}
+
+    def validate(self, df: pd.DataFrame, return_mask=False):
+        """
+        Validate every row of df; returns a compact report (see empty_report), plus the
+        boolean mask of invalid rows when return_mask is set.
+        """
+        started = time.perf_counter()
+        report = empty_report()
+        report["rows"] = len(df)
+        invalid = np.zeros(len(df), dtype=bool)
+
+        missing = [c for c in self.required if c not in df.columns]
+        if missing:
+            report["missing_columns"] = missing
+            invalid[:] = True
+        if not self.allow_extra:
+            report["unexpected_columns"] = [c for c in df.columns if c not in self.checks]
+
+        for name, check_column in self.checks.items():
+            if name not in df.columns:
+                continue
+            for check, mask in check_column(df[name]):
+                count = int(mask.sum())
+                if count:
+                    report["violations"].setdefault(name, {})[check] = count
+                    invalid |= mask
+
+        report["invalid_rows"] = int(invalid.sum())
+        report["seconds"] = time.perf_counter() - started
+        return (report, invalid) if return_mask else report
+
+
+def empty_report():
+    return {"rows": 0, "invalid_rows": 0, "missing_columns": [], "unexpected_columns": [],
+            "violations": {}, "seconds": 0.0}
+
+
+def merge_reports(total, report):
+    """Add a chunk's report into a running total (chunked scoring and streaming)."""
+    total["rows"] += report["rows"]
+    total["invalid_rows"] += report["invalid_rows"]
+    total["seconds"] += report["seconds"]
+    for key in ("missing_columns", "unexpected_columns"):
+        total[key] = list(dict.fromkeys(total[key] + report[key]))
+    for name, counts in report["violations"].items():
+        merged = total["violations"].setdefault(name, {})
+        for check, count in counts.items():
+            merged[check] = merged.get(check, 0) + count
+    return total
+
+
+def summarize_report(report):
+    """Report with throughput added, ready to be written as JSON."""
+    seconds = report["seconds"]
+    return {
+        **report,
+        "seconds": round(seconds, 4),
+        "rows_per_second": round(report["rows"] / seconds, 1) if seconds else None,
+    }
+
+
+def is_valid(report):
+    return not (report["invalid_rows"] or report["missing_columns"] or report["unexpected_columns"])
+
+
+def describe_report(report, limit=5):
+    parts = []
+    if report["missing_columns"]:
+        parts.append(f"missing columns {report['missing_columns']}")
+    if report["unexpected_columns"]:
+        parts.append(f"unexpected columns {report['unexpected_columns']}")
+    for name, counts in list(report["violations"].items())[:limit]:
+        parts.append(f"{name}: " + ", ".join(f"{check}={count}" for check, count in counts.items()))
+    return f"{report['invalid_rows']}/{report['rows']} invalid rows — " + "; ".join(parts)
+
+
+def handle_report(report, label, schema_cfg):
+    """Apply schema_validation.on_violation: print a warning or raise ValueError."""
+    if is_valid(report) or schema_cfg["on_violation"] == "off":
+        return
+    message = f"{label} does not match its schema: {describe_report(report)}"
+    if schema_cfg["on_violation"] == "fail":
+        raise ValueError(message)
+    print(f"⚠️ {message}")
+
+
+@lru_cache(maxsize=64)
+def _compile_cached(schema_json):
+    return SchemaValidator(json.loads(schema_json))
+
+
+def compile_schema(schema) -> SchemaValidator:
+    """Compile a schema once; identical schemas share one validator."""
+    return _compile_cached(json.dumps(schema or {}, sort_keys=True))
+
+
+def validate_chunked(validator: SchemaValidator, X: pd.DataFrame, chunk_rows, rows=None):
+    """Validate X (or the given rows of it) chunk by chunk, so memory-mapped data is never fully loaded."""
+    rows = np.arange(len(X)) if rows is None else np.sort(rows)
+    total = empty_report()
+    for start in range(0, len(rows), chunk_rows):
+        merge_reports(total, validator.validate(X.iloc[rows[start:start + chunk_rows]]))
+    return total
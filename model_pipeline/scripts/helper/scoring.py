@@ -0,0 +1,148 @@
+import os
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from mlflow.tracking import MlflowClient
+
+from helper.schema_validator import compile_schema, handle_report
+from helper.model_cache import load_local_model
+from helper.sketches import DriftMonitor
+
+DEFAULT_SCORE_CHUNK_ROWS = 100_000
+OUTPUT_FORMATS = ("csv", "parquet")
+
+# Loaded once per worker process by init_scoring_worker
+_worker_model = None
+_worker_drift = None
+
+
+def get_scoring_config(config):
+    """Settings for batch scoring from config["scoring"]."""
+    return {
+        "chunk_rows": DEFAULT_SCORE_CHUNK_ROWS,
+        "workers": os.cpu_count() or 1,
+        "max_pending": None,
+        "output_dir": str(Path(config["data"]["output_dir"]) / "scores"),
+        "format": None,
+        "engine": "sklearn",
+        **config.get("scoring", {}),
+    }
+
+
+def find_model_config(config, model):
+    """Look a model up by its config name (model_lr) or registered name (LogisticRegressionModel)."""
+    for model_cfg in config.get("models", []):
+        if model in (model_cfg["name"], model_cfg.get("model_name")):
+            return model_cfg
+    raise ValueError(f"Model '{model}' not found in config (use a config name or registered model name).")
+
+
+def resolve_model_version(client: MlflowClient, model_name, version=None, stage=None):
+    """Registered model version by number, by stage, or the latest version."""
+    if version:
+        return client.get_model_version(model_name, str(version))
+    if stage:
+        versions = client.get_latest_versions(model_name, stages=[stage])
+        if not versions:
+            raise ValueError(f"No version of '{model_name}' in stage '{stage}'")
+        return versions[0]
+    versions = client.search_model_versions(f"name='{model_name}'")
+    if not versions:
+        raise ValueError(f"Registered model '{model_name}' has no versions")
+    return max(versions, key=lambda v: int(v.version))
+
+
+def input_format(path):
+    suffix = Path(path).suffix.lower()
+    if suffix in (".parquet", ".pq"):
+        return "parquet"
+    if suffix == ".csv":
+        return "csv"
+    raise ValueError(f"Unsupported input '{path}': use a .csv or .parquet file")
+
+
+def iter_input_chunks(path, chunk_rows, columns=None):
+    """Yield DataFrames of at most chunk_rows rows; only one chunk is held in memory at a time."""
+    if input_format(path) == "parquet":
+        import pyarrow.parquet as pq
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunk_rows, columns=columns):
+            yield batch.to_pandas()
+    else:
+        yield from pd.read_csv(path, chunksize=chunk_rows, usecols=columns)
+
+
+def get_output_columns(output_schema):
+    """Output column names from model_output_schema, defaulting to a single 'prediction'."""
+    columns = list(output_schema.get("properties", {})) or ["prediction"]
+    unknown = [c for c in columns if c not in ("prediction", "probability")]
+    if unknown:
+        raise ValueError(f"Cannot produce output columns {unknown}: supported are 'prediction' and 'probability'")
+    return columns
+
+
+def positive_class_index(model, pos_label):
+    """Column of pos_label in the model's predict_proba output (works for any number of classes)."""
+    classes = model.classes_.tolist()
+    if pos_label not in classes:
+        raise ValueError(f"pos_label {pos_label!r} is not one of the model's classes {classes}; "
+                         "set evaluation.pos_label")
+    return classes.index(pos_label)
+
+
+def init_scoring_worker(model_path, sketch=None, drift_cfg=None):
+    global _worker_model, _worker_drift
+    _worker_model = load_local_model(model_path)
+    _worker_drift = DriftMonitor(sketch, drift_cfg) if sketch is not None else None
+
+
+def score_chunk(chunk_id, chunk, output_dir, output_columns, output_format, dtype=None,
+                schemas=None, schema_cfg=None, pos_label=1):
+    """
+    Score one chunk with the worker's model and write it as its own shard.
+
+    Rows that fail model_input_schema are not passed to the model; their outputs are
+    left empty so the shard stays row-aligned with the input chunk.
+
+    schemas is (model_input_schema, model_output_schema); the input chunk and the
+    output shard are checked against them with validators compiled once per worker.
+    The probability column is that of pos_label (config["evaluation"]).
+    When the worker has a training sketch, the input rows are also accumulated into a
+    DriftState for the parent to merge.
+    Returns (chunk_id, shard path, rows, seconds, {"input": report, "output": report}, drift state).
+    """
+    started = time.perf_counter()
+    model = _worker_model
+    input_schema, output_schema = schemas or ({}, {})
+    schema_cfg = schema_cfg or {"on_violation": "off"}
+    input_report, invalid = compile_schema(input_schema).validate(chunk, return_mask=True)
+    handle_report(input_report, f"Chunk {chunk_id} input", schema_cfg)
+
+    feature_names = getattr(model, "feature_names_in_", None)
+    X = chunk[list(feature_names)] if feature_names is not None else chunk
+    # Drift covers every input row, including those the schema rejects
+    drift_state = _worker_drift.accumulate(chunk) if _worker_drift is not None else None
+    X = X[~invalid] if invalid.any() else X
+    if dtype:
+        X = X.astype(dtype)
+
+    output = pd.DataFrame(index=X.index)
+    if len(X):
+        if "probability" in output_columns:
+            proba = model.predict_proba(X)
+            output["prediction"] = model.classes_[np.argmax(proba, axis=1)]
+            output["probability"] = proba[:, positive_class_index(model, pos_label)]
+        else:
+            output["prediction"] = model.predict(X)
+    output = output.reindex(index=chunk.index, columns=output_columns)
+    output_report = compile_schema(output_schema).validate(output)
+    handle_report(output_report, f"Chunk {chunk_id} output", schema_cfg)
+
+    shard_path = Path(output_dir) / f"part-{chunk_id:05d}.{output_format}"
+    if output_format == "parquet":
+        output.to_parquet(shard_path, index=False)
+    else:
+        output.to_csv(shard_path, index=False)
+    reports = {"input": input_report, "output": output_report}
+    return chunk_id, str(shard_path), len(output), time.perf_counter() - started, reports, drift_state
@@ -0,0 +1,157 @@
+import os
+
+import mlflow
+import numpy as np
+from scipy.stats import loguniform, randint, uniform
+from sklearn.experimental import enable_halving_search_cv  # noqa: F401
+from sklearn.model_selection import (
+    GridSearchCV,
+    HalvingGridSearchCV,
+    HalvingRandomSearchCV,
+    RandomizedSearchCV,
+)
+
+from helper.batch_logger import BatchLogger
+
+SEARCH_STRATEGIES = ("grid", "random", "halving")
+
+
+def _is_range(value) -> bool:
+    return isinstance(value, dict) and "low" in value and "high" in value
+
+
+def get_search_space(hparams):
+    """Hyperparameters given as a list of values or a {low, high} range."""
+    return {k: v for k, v in hparams.items() if isinstance(v, list) or _is_range(v)}
+
+
+def get_search_config(model_cfg, workers=1):
+    """
+    Search settings of a model. n_jobs defaults to this process's share of the cores
+    when `workers` processes search at the same time (train.py's model pool), so the
+    searches together start about one process per core.
+    """
+    return {
+        "strategy": "halving",
+        "n_candidates": 20,
+        "scoring": "f1",
+        "cv": 3,
+        "factor": 3,
+        "resource": "n_samples",
+        "n_jobs": max(1, (os.cpu_count() or 1) // workers),
+        "random_state": 42,
+        **model_cfg.get("search", {}),
+    }
+
+
+def _is_int_range(spec) -> bool:
+    return isinstance(spec["low"], int) and isinstance(spec["high"], int)
+
+
+def _grid_values(spec):
+    """Expand a range into `num` evenly (or log-evenly) spaced values for grid search."""
+    if isinstance(spec, list):
+        return spec
+    low, high, num = spec["low"], spec["high"], spec.get("num", 5)
+    values = np.geomspace(low, high, num) if spec.get("log") else np.linspace(low, high, num)
+    if _is_int_range(spec):
+        return np.unique(np.round(values).astype(int)).tolist()
+    return values.tolist()
+
+
+def _distribution(spec):
+    """Sampling distribution for random search; lists are sampled uniformly."""
+    if isinstance(spec, list):
+        return spec
+    low, high = spec["low"], spec["high"]
+    if _is_int_range(spec):
+        if spec.get("log"):
+            return _grid_values({**spec, "num": spec.get("num", 20)})
+        return randint(low, high + 1)
+    if spec.get("log"):
+        return loguniform(low, high)
+    return uniform(low, high - low)
+
+
+def build_search(estimator, search_space, search_cfg):
+    """Create the sklearn searcher for the configured strategy (refit is left to the caller)."""
+    strategy = search_cfg["strategy"]
+    common = {
+        "scoring": search_cfg["scoring"],
+        "cv": search_cfg["cv"],
+        "n_jobs": search_cfg["n_jobs"],
+        "refit": False,
+    }
+    has_ranges = any(_is_range(v) for v in search_space.values())
+    grid = {k: _grid_values(v) for k, v in search_space.items()}
+    distributions = {k: _distribution(v) for k, v in search_space.items()}
+
+    if strategy == "grid":
+        return GridSearchCV(estimator, grid, **common)
+    if strategy == "random":
+        return RandomizedSearchCV(
+            estimator, distributions, n_iter=search_cfg["n_candidates"],
+            random_state=search_cfg["random_state"], **common
+        )
+    if strategy == "halving":
+        # Early rounds train on a small budget (rows or trees); only the best
+        # 1/factor of candidates advance to the next, larger budget.
+        halving = {
+            "factor": search_cfg["factor"],
+            "resource": search_cfg["resource"],
+            "random_state": search_cfg["random_state"],
+        }
+        if "max_resources" in search_cfg:
+            halving["max_resources"] = search_cfg["max_resources"]
+        if has_ranges:
+            return HalvingRandomSearchCV(
+                estimator, distributions, n_candidates=search_cfg["n_candidates"], **halving, **common
+            )
+        return HalvingGridSearchCV(estimator, grid, **halving, **common)
+    raise ValueError(f"Unsupported search strategy '{strategy}': use one of {SEARCH_STRATEGIES}")
+
+
+def _log_trials(search, logger):
+    results = search.cv_results_
+    for i, params in enumerate(results["params"]):
+        with mlflow.start_run(run_name=f"trial_{i}", nested=True) as trial:
+            logger.log_params(trial.info.run_id, params)
+            trial_metrics = {
+                "mean_test_score": results["mean_test_score"][i],
+                "std_test_score": results["std_test_score"][i],
+                "mean_fit_time": results["mean_fit_time"][i],
+            }
+            if "n_resources" in results:
+                trial_metrics["iter"] = results["iter"][i]
+                trial_metrics["n_resources"] = results["n_resources"][i]
+            # Halving leaves NaN scores for failed fits; MLflow accepts them as-is.
+            logger.log_metrics(trial.info.run_id, trial_metrics)
+
+
+def run_search(model_cfg, entry, hparams, X_train, y_train, workers=1):
+    """
+    Search the list/range hyperparameters of a model across the local cores, shared
+    with the other `workers` processes training models at the same time.
+
+    The search is logged as a parent MLflow run with one nested run per trial, and
+    ends before the caller starts the final training run so that run stays the
+    latest one in the experiment. Returns (best hyperparameters, search run id).
+    """
+    search_space = get_search_space(hparams)
+    search_cfg = get_search_config(model_cfg, workers)
+    fixed = {k: v for k, v in hparams.items() if k not in search_space}
+    search = build_search(entry["build"](fixed), search_space, search_cfg)
+
+    with mlflow.start_run(run_name=f"{model_cfg['run_name']}_search") as parent, BatchLogger() as logger:
+        parent_id = parent.info.run_id
+        logger.set_tag(parent_id, "run_type", "hyperparameter_search")
+        logger.log_params(parent_id, {f"search_{k}": v for k, v in search_cfg.items()})
+        search.fit(X_train, y_train)
+        _log_trials(search, logger)
+        logger.log_params(parent_id, {f"best_{k}": v for k, v in search.best_params_.items()})
+        logger.log_metric(parent_id, "best_score", search.best_score_)
+
+    print(f"🔎 {model_cfg['name']}: {len(search.cv_results_['params'])} trials, "
+          f"best {search_cfg['scoring']}={search.best_score_:.4f} with {search.best_params_}")
+    best_hparams = {**fixed, **search.best_params_}
+    return best_hparams, parent_id
@@ -0,0 +1,358 @@
+import math
+from pathlib import Path
+
+import numpy as np
+from scipy.stats import chi2
+
+SKETCH_ARTIFACT_PATH = "sketches"
+SKETCH_FILE = "feature_sketches.npz"
+SKETCH_FORMAT_VERSION = 1
+DEFAULT_SKETCH_K = 200
+DEFAULT_CHUNK_ROWS = 100_000
+PSI_EPSILON = 1e-4          # floor for empty bins, so PSI stays finite
+KLL_SHRINK = 2 / 3          # capacity ratio between consecutive KLL levels
+
+
+def get_drift_config(config):
+    """
+    Feature sketches and drift checks from config["drift"].
+
+    Training logs a sketch of every feature; validation (holdout) and score.py (input
+    chunks) compare the data they already read against it. A feature drifts when its
+    PSI exceeds psi_threshold and its critical value at psi_alpha, or its KS statistic
+    exceeds ks_threshold and the two-sample critical value at ks_alpha (so small
+    samples are not flagged on noise). PSI is only judged once every bin expects
+    psi_min_bin_rows rows; below that empty bins dominate it. on_drift is warn | fail | off.
+    """
+    return {
+        "enabled": False,
+        "k": DEFAULT_SKETCH_K,
+        "bins": 10,
+        "psi_threshold": 0.2,
+        "psi_alpha": 0.001,
+        "psi_min_bin_rows": 10,
+        "ks_threshold": 0.1,
+        "ks_alpha": 0.001,
+        "on_drift": "warn",
+        "seed": 42,
+        **config.get("drift", {}),
+    }
+
+
+class QuantileSketch:
+    """
+    KLL quantile sketch of one stream of values.
+
+    Level h holds items that each stand for 2**h values; a full level is sorted and
+    every other item (random offset) moves up. Memory is about 3k items whatever the
+    stream length, rank error is about 1.7/k, and sketches of disjoint streams merge
+    into a sketch of their union.
+    """
+
+    def __init__(self, k=DEFAULT_SKETCH_K, seed=0, levels=None, n=0):
+        self.k = int(k)
+        self.n = int(n)
+        self.levels = levels if levels is not None else [np.empty(0)]
+        self._rng = np.random.default_rng(seed)
+
+    def _capacity(self, level):
+        return max(2, int(math.ceil(self.k * KLL_SHRINK ** (len(self.levels) - 1 - level))))
+
+    def _compress(self):
+        level = 0
+        while level < len(self.levels):
+            items = self.levels[level]
+            if len(items) <= self._capacity(level):
+                level += 1
+                continue
+            items = np.sort(items)
+            kept, items = (items[-1:], items[:-1]) if len(items) % 2 else (items[:0], items)
+            promoted = items[self._rng.integers(2)::2]
+            self.levels[level] = kept
+            if level + 1 == len(self.levels):
+                self.levels.append(promoted)
+            else:
+                self.levels[level + 1] = np.concatenate([self.levels[level + 1], promoted])
+            level = 0   # capacities shrink when a level is added
+
+    def update(self, values):
+        values = np.asarray(values, dtype=np.float64).ravel()
+        if not len(values):
+            return
+        self.levels[0] = np.concatenate([self.levels[0], values])
+        self.n += len(values)
+        self._compress()
+
+    def merge(self, other):
+        for level, items in enumerate(other.levels):
+            if level < len(self.levels):
+                self.levels[level] = np.concatenate([self.levels[level], items])
+            else:
+                self.levels.append(items.copy())
+        self.n += other.n
+        self._compress()
+
+    def sorted_view(self):
+        """(items, cumulative weights): the sketch as a weighted sample, sorted."""
+        items = np.concatenate(self.levels)
+        weights = np.concatenate([np.full(len(level), 2.0 ** h) for h, level in enumerate(self.levels)])
+        order = np.argsort(items, kind="stable")
+        return items[order], np.cumsum(weights[order])
+
+    def cdf(self, x):
+        """Estimated fraction of values <= x."""
+        items, cumulative = self.sorted_view()
+        if not len(items):
+            return np.zeros(np.shape(x))
+        position = np.searchsorted(items, x, side="right")
+        return np.where(position > 0, cumulative[np.maximum(position - 1, 0)], 0.0) / cumulative[-1]
+
+    def quantiles(self, qs):
+        items, cumulative = self.sorted_view()
+        if not len(items):
+            return np.full(np.shape(qs), np.nan)
+        position = np.searchsorted(cumulative, np.asarray(qs) * cumulative[-1], side="left")
+        return items[np.minimum(position, len(items) - 1)]
+
+
+class DatasetSketch:
+    """Per-feature count, missing (NaN/inf) count, min, max, sum, sum of squares and QuantileSketch."""
+
+    def __init__(self, features, k=DEFAULT_SKETCH_K, seed=0):
+        self.features = list(features)
+        n = len(self.features)
+        self.k = int(k)
+        self.count = np.zeros(n, dtype=np.int64)
+        self.missing = np.zeros(n, dtype=np.int64)
+        self.min = np.full(n, np.inf)
+        self.max = np.full(n, -np.inf)
+        self.sum = np.zeros(n)
+        self.sumsq = np.zeros(n)
+        self.quantiles = [QuantileSketch(k, seed=[seed, i]) for i in range(n)]
+
+    def update(self, X):
+        """Add a chunk (DataFrame with the sketch's columns; absent columns count as missing)."""
+        values = X.reindex(columns=self.features).to_numpy(dtype=np.float64, na_value=np.nan)
+        finite = np.isfinite(values)
+        self.count += len(values)
+        self.missing += (~finite).sum(axis=0)
+        filled = np.where(finite, values, 0.0)
+        self.sum += filled.sum(axis=0)
+        self.sumsq += np.square(filled).sum(axis=0)
+        if len(values):
+            self.min = np.minimum(self.min, np.where(finite, values, np.inf).min(axis=0))
+            self.max = np.maximum(self.max, np.where(finite, values, -np.inf).max(axis=0))
+        for i, sketch in enumerate(self.quantiles):
+            sketch.update(values[finite[:, i], i])
+        return self
+
+    def merge(self, other):
+        if other.features != self.features:
+            raise ValueError("Cannot merge sketches of different features")
+        self.count += other.count
+        self.missing += other.missing
+        self.min = np.minimum(self.min, other.min)
+        self.max = np.maximum(self.max, other.max)
+        self.sum += other.sum
+        self.sumsq += other.sumsq
+        for sketch, other_sketch in zip(self.quantiles, other.quantiles):
+            sketch.merge(other_sketch)
+        return self
+
+    def summary(self):
+        present = np.maximum(self.count - self.missing, 1)
+        mean = self.sum / present
+        std = np.sqrt(np.maximum(self.sumsq / present - mean ** 2, 0.0))
+        qs = (0.01, 0.25, 0.5, 0.75, 0.99)
+        return {
+            name: {
+                "count": int(self.count[i]),
+                "missing_rate": float(self.missing[i] / self.count[i]) if self.count[i] else 0.0,
+                "min": float(self.min[i]), "max": float(self.max[i]),
+                "mean": float(mean[i]), "std": float(std[i]),
+                "quantiles": dict(zip(map(str, qs), self.quantiles[i].quantiles(qs).tolist())),
+            }
+            for i, name in enumerate(self.features)
+        }
+
+    def save(self, path):
+        """One compact .npz: the stats arrays plus every KLL level, concatenated."""
+        levels = [sketch.levels for sketch in self.quantiles]
+        np.savez_compressed(
+            path,
+            format_version=np.array(SKETCH_FORMAT_VERSION),
+            features=np.array(self.features, dtype=str),
+            k=np.array(self.k),
+            count=self.count, missing=self.missing, min=self.min, max=self.max, sum=self.sum, sumsq=self.sumsq,
+            sketch_n=np.array([sketch.n for sketch in self.quantiles], dtype=np.int64),
+            levels_per_feature=np.array([len(feature_levels) for feature_levels in levels], dtype=np.int32),
+            level_sizes=np.array([len(items) for feature_levels in levels for items in feature_levels], dtype=np.int64),
+            items=np.concatenate([items for feature_levels in levels for items in feature_levels] or [np.empty(0)]),
+        )
+        return Path(path)
+
+    @classmethod
+    def load(cls, path, seed=0):
+        with np.load(path) as data:
+            if int(data["format_version"]) != SKETCH_FORMAT_VERSION:
+                raise ValueError(f"{path} has sketch format {int(data['format_version'])}, "
+                                 f"expected {SKETCH_FORMAT_VERSION}")
+            sketch = cls(data["features"].tolist(), int(data["k"]), seed)
+            for name in ("count", "missing", "min", "max", "sum", "sumsq"):
+                setattr(sketch, name, data[name].copy())
+            ends = np.cumsum(data["level_sizes"])
+            items = np.split(data["items"], ends[:-1]) if len(ends) else []
+            start = 0
+            for i, n_levels in enumerate(data["levels_per_feature"].tolist()):
+                sketch.quantiles[i] = QuantileSketch(sketch.k, [seed, i], items[start:start + n_levels],
+                                                     int(data["sketch_n"][i]))
+                start += n_levels
+        return sketch
+
+
+def sketch_rows(X, rows, drift_cfg, chunk_rows=DEFAULT_CHUNK_ROWS):
+    """DatasetSketch of the given rows of a (memory-mapped) frame, chunk_rows at a time."""
+    sketch = DatasetSketch(X.columns, drift_cfg["k"], drift_cfg["seed"])
+    rows = np.sort(rows)
+    for start in range(0, len(rows), chunk_rows):
+        sketch.update(X.iloc[rows[start:start + chunk_rows]])
+    return sketch
+
+
+def load_run_sketch(model_cache, run_id):
+    """The training sketch logged on a run (through the model cache), or None for runs without one."""
+    if not model_cache.client.list_artifacts(run_id, SKETCH_ARTIFACT_PATH):
+        return None
+    return DatasetSketch.load(model_cache.get_local_path(run_id, SKETCH_ARTIFACT_PATH) / SKETCH_FILE)
+
+
+class DriftState:
+    """Mergeable drift accumulators for a stream of chunks: bin counts and a sketch per feature."""
+
+    def __init__(self, features, n_bins, k, seed):
+        self.counts = [np.zeros(n + 1, dtype=np.int64) for n in n_bins]   # bins, then the missing bin
+        self.sketch = DatasetSketch(features, k, seed)
+
+    def merge(self, other):
+        for counts, other_counts in zip(self.counts, other.counts):
+            counts += other_counts
+        self.sketch.merge(other.sketch)
+        return self
+
+
+class DriftMonitor:
+    """
+    Compares data, chunk by chunk, with a training DatasetSketch in bounded memory.
+
+    PSI uses `bins` quantile bins of the training distribution (plus a missing-value
+    bin); KS is the largest CDF gap between the training sketch and a sketch of the
+    new data. accumulate() returns the state of one chunk, so chunks can be processed
+    in other processes and merged with update_state().
+    """
+
+    def __init__(self, reference: DatasetSketch, drift_cfg):
+        self.reference = reference
+        self.cfg = drift_cfg
+        probabilities = np.linspace(0, 1, drift_cfg["bins"] + 1)[1:-1]
+        self.edges, self.expected = [], []
+        for i, sketch in enumerate(reference.quantiles):
+            edges = np.unique(sketch.quantiles(probabilities)) if sketch.n else np.empty(0)
+            cdf = np.concatenate([[0.0], sketch.cdf(edges) if sketch.n else [], [1.0]])
+            missing_rate = reference.missing[i] / reference.count[i] if reference.count[i] else 0.0
+            self.edges.append(edges)
+            self.expected.append(np.append(np.diff(cdf) * (1 - missing_rate), missing_rate))
+        self.state = self.new_state()
+
+    def new_state(self):
+        return DriftState(self.reference.features, [len(e) + 1 for e in self.edges], self.cfg["k"], self.cfg["seed"])
+
+    def accumulate(self, X):
+        state = self.new_state()
+        state.sketch.update(X)
+        values = X.reindex(columns=self.reference.features).to_numpy(dtype=np.float64, na_value=np.nan)
+        for i, edges in enumerate(self.edges):
+            column = values[:, i]
+            finite = np.isfinite(column)
+            counts = np.bincount(np.searchsorted(edges, column[finite], side="left"), minlength=len(edges) + 1)
+            state.counts[i] += np.append(counts, (~finite).sum())
+        return state
+
+    def update(self, X):
+        return self.update_state(self.accumulate(X))
+
+    def update_state(self, state):
+        self.state.merge(state)
+        return self
+
+    def _ks(self, i):
+        """(KS statistic, critical value at ks_alpha) for feature i's non-missing values."""
+        reference, current = self.reference.quantiles[i], self.state.sketch.quantiles[i]
+        if not reference.n or not current.n:
+            return 0.0, 1.0
+        points = np.concatenate([reference.sorted_view()[0], current.sorted_view()[0]])
+        ks = float(np.max(np.abs(reference.cdf(points) - current.cdf(points))))
+        critical = math.sqrt(-math.log(self.cfg["ks_alpha"] / 2) / 2 * (reference.n + current.n)
+                             / (reference.n * current.n))
+        return ks, critical
+
+    def _psi_critical(self, i, rows):
+        """
+        Critical PSI at psi_alpha for feature i, or None while a bin expects fewer than
+        psi_min_bin_rows rows. Without drift PSI * nm / (n + m) is about chi-square with
+        bins - 1 degrees of freedom (expected PSI (bins - 1)(1/n + 1/m)).
+        """
+        expected = self.expected[i][self.expected[i] > 0]
+        reference_rows = self.reference.count[i]
+        if len(expected) < 2 or not rows or rows * expected.min() < self.cfg["psi_min_bin_rows"]:
+            return None
+        return float(chi2.ppf(1 - self.cfg["psi_alpha"], len(expected) - 1) * (1 / rows + 1 / reference_rows))
+
+    def report(self):
+        """Per-feature PSI, KS, missing rates and means; features over a threshold are listed as drifted."""
+        rows = int(self.state.sketch.count.max()) if len(self.state.sketch.count) else 0
+        reference_summary, current_summary = self.reference.summary(), self.state.sketch.summary()
+        features = {}
+        for i, name in enumerate(self.reference.features):
+            psi_critical = self._psi_critical(i, self.state.counts[i].sum())
+            observed = self.state.counts[i] / max(self.state.counts[i].sum(), 1)
+            expected = np.maximum(self.expected[i], PSI_EPSILON)
+            observed = np.maximum(observed, PSI_EPSILON)
+            psi = float(np.sum((observed - expected) * np.log(observed / expected)))
+            ks, ks_critical = self._ks(i)
+            features[name] = {
+                "psi": round(psi, 6),
+                "psi_critical": None if psi_critical is None else round(psi_critical, 6),
+                "ks": round(ks, 6),
+                "ks_critical": round(ks_critical, 6),
+                "missing_rate": {"train": reference_summary[name]["missing_rate"],
+                                 "current": current_summary[name]["missing_rate"]},
+                "mean": {"train": reference_summary[name]["mean"], "current": current_summary[name]["mean"]},
+                "drifted": (psi_critical is not None and psi > max(self.cfg["psi_threshold"], psi_critical))
+                           or ks > max(self.cfg["ks_threshold"], ks_critical),
+            }
+        return {
+            "rows": rows,
+            "psi_threshold": self.cfg["psi_threshold"],
+            "ks_threshold": self.cfg["ks_threshold"],
+            "max_psi": max((f["psi"] for f in features.values()), default=0.0),
+            "max_ks": max((f["ks"] for f in features.values()), default=0.0),
+            "drifted_features": [name for name, f in features.items() if f["drifted"]],
+            "features": features,
+        }
+
+
+def handle_drift(report, context, drift_cfg):
+    """Print a summary of drifted features; raise when on_drift is "fail"."""
+    drifted = report["drifted_features"]
+    if drift_cfg["on_drift"] == "off":
+        return
+    if not drifted:
+        print(f"📈 {context}: no drift over {report['rows']} rows "
+              f"(max PSI {report['max_psi']:.3f}, max KS {report['max_ks']:.3f})")
+        return
+    details = ", ".join(f"{name} (PSI {report['features'][name]['psi']:.3f}, KS {report['features'][name]['ks']:.3f})"
+                        for name in drifted[:5])
+    message = f"{context}: {len(drifted)} features drifted from the training data over {report['rows']} rows: {details}"
+    if drift_cfg["on_drift"] == "fail":
+        raise ValueError(message)
+    print(f"⚠️ {message}")
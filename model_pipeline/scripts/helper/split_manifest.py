@@ -0,0 +1,159 @@
+import os
+from pathlib import Path
+
+import numpy as np
+from sklearn.model_selection import train_test_split
+
+from helper.data_loader import get_cached_file_hash, get_file_hash, get_file_lineage, load_training_data, DEFAULT_CACHE_DIR
+
+SPLIT_MANIFEST_FILE = "split_manifest.npz"
+SPLIT_DIGEST_TAG = "split_manifest_digest"   # run tag: digest of the manifest the run was trained with
+ON_APPEND_MODES = ("resplit", "extend")
+
+
+def get_dataset_hash(config) -> str:
+    """Content hash of the configured training dataset."""
+    return get_cached_file_hash(config["data"]["path"], config["data"].get("cache_dir", DEFAULT_CACHE_DIR))
+
+
+def manifest_digest(path) -> str:
+    return get_file_hash(path)
+
+
+def get_split_params(config):
+    split_cfg = config["data"].get("split", {})
+    return split_cfg.get("test_size", 0.2), split_cfg.get("random_state", 42)
+
+
+def get_on_append(config):
+    """
+    What a changed dataset does to the split (config["data"]["split"]["on_append"]).
+
+    "resplit" draws a new split over all rows. "extend" keeps every existing row on its
+    side when rows were only appended to a CSV, and splits just the new ones; the
+    manifest then records (row count, dataset hash) for each version of the data it
+    has covered.
+    """
+    on_append = config["data"].get("split", {}).get("on_append", "resplit")
+    if on_append not in ON_APPEND_MODES:
+        raise ValueError(f"Unsupported split.on_append '{on_append}': use one of {list(ON_APPEND_MODES)}")
+    return on_append
+
+
+def _index_dtype(n_rows):
+    return np.uint32 if n_rows < np.iinfo(np.uint32).max else np.uint64
+
+
+def create_split(n_rows: int, test_size=0.2, random_state=42):
+    """Return (train_idx, test_idx) row indices, matching train_test_split on the full frame."""
+    rows = np.arange(n_rows, dtype=_index_dtype(n_rows))
+    train_idx, test_idx = train_test_split(rows, test_size=test_size, random_state=random_state)
+    return train_idx, test_idx
+
+
+def extend_split(manifest, n_rows: int, test_size=0.2, random_state=42):
+    """
+    (train_idx, test_idx) with rows appended after the manifest's last row count
+    assigned to the test side with probability test_size; existing rows keep their side.
+    """
+    start = manifest["history"][-1][0]
+    new_rows = np.arange(start, n_rows, dtype=_index_dtype(n_rows))
+    in_test = np.random.default_rng([random_state, start]).random(len(new_rows)) < test_size
+    train_idx = np.concatenate([manifest["train_idx"].astype(new_rows.dtype), new_rows[~in_test]])
+    test_idx = np.concatenate([manifest["test_idx"].astype(new_rows.dtype), new_rows[in_test]])
+    return train_idx, test_idx
+
+
+def save_split_manifest(path, train_idx, test_idx, dataset_hash, test_size, random_state, history=()):
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f"{path.stem}.{os.getpid()}.tmp.npz")
+    np.savez(
+        tmp_path,
+        train_idx=train_idx,
+        test_idx=test_idx,
+        dataset_hash=np.array(dataset_hash),
+        test_size=np.array(test_size),
+        random_state=np.array(random_state),
+        history_rows=np.array([n_rows for n_rows, _ in history], dtype=np.int64),
+        history_hashes=np.array([data_hash for _, data_hash in history], dtype="U64"),
+    )
+    os.replace(tmp_path, path)
+
+
+def load_split_manifest(path):
+    with np.load(path) as manifest:
+        return {
+            "train_idx": manifest["train_idx"],
+            "test_idx": manifest["test_idx"],
+            "dataset_hash": str(manifest["dataset_hash"]),
+            "test_size": manifest["test_size"].item(),
+            "random_state": manifest["random_state"].item(),
+            # (row count, dataset hash) of each data version the split covered; empty for "resplit"
+            "history": list(zip(manifest["history_rows"].tolist(), manifest["history_hashes"].tolist()))
+            if "history_rows" in manifest.files else [],
+        }
+
+
+def get_or_create_split(config, n_rows: int):
+    """
+    Return (manifest, manifest_path) for the configured dataset.
+
+    An existing manifest in the output directory is reused when it was built from the
+    same dataset content and split parameters, so every model trains and evaluates on
+    the same rows. With split.on_append "extend", a manifest built from an earlier
+    version of the file that the current one only appends to (get_file_lineage) is
+    extended instead (see extend_split); no earlier row is read again.
+    """
+    manifest_path = Path(config["data"]["output_dir"]) / SPLIT_MANIFEST_FILE
+    dataset_hash = get_dataset_hash(config)
+    test_size, random_state = get_split_params(config)
+    on_append = get_on_append(config)
+
+    manifest = None
+    if manifest_path.exists():
+        manifest = load_split_manifest(manifest_path)
+        if manifest["test_size"] != test_size or manifest["random_state"] != random_state:
+            manifest = None
+        elif manifest["dataset_hash"] == dataset_hash:
+            return manifest, manifest_path
+
+    if on_append == "extend":
+        if manifest and manifest["history"]:
+            last_rows, last_hash = manifest["history"][-1]
+            lineage = [version["hash"] for version in
+                       get_file_lineage(config["data"]["path"], config["data"].get("cache_dir", DEFAULT_CACHE_DIR))]
+            if last_hash in lineage and last_rows <= n_rows:
+                train_idx, test_idx = extend_split(manifest, n_rows, test_size, random_state)
+                history = manifest["history"] + [(n_rows, dataset_hash)]
+                save_split_manifest(manifest_path, train_idx, test_idx, dataset_hash, test_size, random_state, history)
+                print(f"✂️ Extended split manifest with {n_rows - last_rows} appended rows: {manifest_path}")
+                return load_split_manifest(manifest_path), manifest_path
+            print(f"⚠️ The data is not the last split's {last_rows} rows with rows appended; re-splitting all rows")
+        history = [(n_rows, dataset_hash)]
+    else:
+        history = []
+
+    train_idx, test_idx = create_split(n_rows, test_size, random_state)
+    save_split_manifest(manifest_path, train_idx, test_idx, dataset_hash, test_size, random_state, history)
+    print(f"✂️ Wrote split manifest: {manifest_path}")
+    return load_split_manifest(manifest_path), manifest_path
+
+
+def check_manifest_dataset(config, manifest):
+    """Raise if the manifest was built from different data than the configured dataset."""
+    dataset_hash = get_dataset_hash(config)
+    if manifest["dataset_hash"] != dataset_hash:
+        raise ValueError(
+            f"Split manifest was built for dataset {manifest['dataset_hash'][:12]}, "
+            f"but {config['data']['path']} is {dataset_hash[:12]}"
+        )
+
+
+def load_holdout(config, manifest):
+    """Rebuild the holdout set by slicing the source dataset with the manifest's test rows."""
+    check_manifest_dataset(config, manifest)
+    X, y = load_training_data(config)
+    # Sorted indices keep reads from the memory map sequential; metrics do not depend on order.
+    test_idx = np.sort(manifest["test_idx"])
+    return X.iloc[test_idx], y.iloc[test_idx]
@@ -0,0 +1,231 @@
+import hashlib
+import json
+import os
+import time
+from pathlib import Path
+
+from mlflow.exceptions import MlflowException
+from mlflow.tracking import MlflowClient
+
+from helper.metrics import get_metrics_thresholds
+from helper.split_manifest import get_dataset_hash
+
+DEFAULT_STAGE_CACHE_DIR = "./.cache/stages"
+STAGE_CACHE_FILE = "stage_cache.json"
+FORCE_ENV_VAR = "MLOPS_FORCE_STAGES"
+LOCK_TIMEOUT_S = 30
+
+SCRIPTS_DIR = Path(__file__).resolve().parent.parent
+# Source files whose content is part of each stage's fingerprint
+STAGE_SOURCES = {
+    "train": [
+        "train.py", "helper/train_model.py", "helper/model_registry.py", "helper/streaming.py",
+        "helper/search.py", "helper/metrics.py", "helper/data_loader.py", "helper/split_manifest.py",
+        "helper/schema_validator.py", "helper/synthetic_data.py", "helper/forest_engine.py",
+        "helper/cross_validation.py", "helper/incremental.py", "helper/sketches.py",
+    ],
+    "validate": [
+        "validate_model.py", "helper/metrics.py", "helper/streaming.py", "helper/split_manifest.py",
+        "helper/schema_validator.py", "helper/run_index.py", "helper/sketches.py",
+    ],
+    "register": ["register_model.py", "helper/run_index.py", "helper/incremental.py"],
+}
+
+
+def _hash(obj) -> str:
+    return hashlib.sha256(json.dumps(obj, sort_keys=True, default=str).encode()).hexdigest()
+
+
+def source_hash(stage) -> str:
+    digest = hashlib.sha256()
+    for relative in STAGE_SOURCES[stage]:
+        digest.update(relative.encode())
+        digest.update((SCRIPTS_DIR / relative).read_bytes())
+    return digest.hexdigest()
+
+
+def data_settings(config):
+    """The data keys that change what is trained on (paths to caches and outputs do not)."""
+    return {k: v for k, v in config["data"].items() if k not in ("path", "output_dir", "cache_dir")}
+
+
+def train_components(config, model_cfg):
+    return {
+        "dataset": get_dataset_hash(config),
+        "data": _hash(data_settings(config)),
+        "model": _hash(model_cfg),
+        "evaluation": _hash(config.get("evaluation", {})),
+        "schema_validation": _hash(config.get("schema_validation", {})),
+        "drift": _hash(config.get("drift", {})),
+        "code": source_hash("train"),
+    }
+
+
+def validate_components(config, model_cfg, run_id):
+    return {
+        "run": run_id,
+        "dataset": get_dataset_hash(config),
+        "model": _hash(model_cfg),
+        "evaluation": _hash(config.get("evaluation", {})),
+        "metrics_threshold": _hash(get_metrics_thresholds(config, model_cfg)),
+        "schema_validation": _hash(config.get("schema_validation", {})),
+        "drift": _hash(config.get("drift", {})),
+        "code": source_hash("validate"),
+    }
+
+
+def register_components(model_cfg, run_id, evaluation_status):
+    return {
+        "run": run_id,
+        "evaluation_status": evaluation_status,
+        "model_name": model_cfg["model_name"],
+        "code": source_hash("register"),
+    }
+
+
+class StageCache:
+    """
+    Results of pipeline stages (train / validate / register, per model) keyed by fingerprint.
+
+    A fingerprint hashes a stage's real inputs: dataset content hash, the model's
+    config subtree, the config sections the stage reads, the run it works on and the
+    source of the stage's scripts. On a match the earlier MLflow run and outputs are
+    reused, provided the run still exists and the recorded output files are present.
+    save() merges this process's records into the file under a lock file, so pipeline
+    steps running in parallel do not drop each other's results.
+    """
+
+    def __init__(self, cache_dir=DEFAULT_STAGE_CACHE_DIR, enabled=True, force=False, client: MlflowClient = None):
+        self.path = Path(cache_dir) / STAGE_CACHE_FILE
+        self.enabled = enabled
+        self.force = force
+        self.client = client or MlflowClient()
+        self.records = self._read() if enabled else {}
+        self._updated = set()
+
+    def _read(self):
+        return json.loads(self.path.read_text()) if self.path.exists() else {}
+
+    def _run_exists(self, run_id):
+        try:
+            return self.client.get_run(run_id).info.lifecycle_stage != "deleted"
+        except MlflowException:
+            return False
+
+    def check(self, stage, model_name, components):
+        """Return (record, reason): the reusable earlier result or None, and why the stage must run."""
+        if not self.enabled:
+            return None, "stage cache disabled"
+        if self.force:
+            return None, f"forced ({FORCE_ENV_VAR}=1)"
+        record = self.records.get(f"{stage}:{model_name}")
+        if not record:
+            return None, "no earlier result"
+        changed = [k for k in components if record["components"].get(k) != components[k]]
+        if changed:
+            return None, f"changed: {', '.join(changed)}"
+        if record.get("run_id") and not self._run_exists(record["run_id"]):
+            return None, f"earlier run {record['run_id']} no longer exists"
+        missing = [p for p in record.get("outputs", []) if not Path(p).exists()]
+        if missing:
+            return None, f"outputs missing: {', '.join(missing)}"
+        return record, f"unchanged since {record['completed_at']}"
+
+    def record(self, stage, model_name, components, run_id=None, outputs=None, result=None):
+        if not self.enabled:
+            return
+        key = f"{stage}:{model_name}"
+        self._updated.add(key)
+        self.records[key] = {
+            "fingerprint": _hash(components),
+            "components": components,
+            "run_id": run_id,
+            "outputs": [str(p) for p in outputs or []],
+            "result": result,
+            "completed_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        }
+
+    def _lock(self, timeout=LOCK_TIMEOUT_S):
+        lock_path = self.path.with_name(f"{self.path.name}.lock")
+        deadline = time.time() + timeout
+        while True:
+            try:
+                os.close(os.open(lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+                return lock_path
+            except FileExistsError:
+                # A lock older than the timeout was left behind by a killed process
+                try:
+                    if time.time() - lock_path.stat().st_mtime > timeout:
+                        lock_path.unlink()
+                        continue
+                except FileNotFoundError:
+                    continue
+                if time.time() > deadline:
+                    raise TimeoutError(f"Could not lock {self.path} within {timeout}s")
+                time.sleep(0.05)
+
+    def save(self):
+        if not self.enabled or not self._updated:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        lock_path = self._lock()
+        try:
+            records = self._read()
+            records.update({key: self.records[key] for key in self._updated})
+            tmp_path = self.path.with_name(f"{self.path.name}.{os.getpid()}.tmp")
+            tmp_path.write_text(json.dumps(records, indent=2, default=str))
+            os.replace(tmp_path, self.path)
+            self.records = records
+            self._updated.clear()
+        finally:
+            lock_path.unlink(missing_ok=True)
+
+
+def get_stage_cache(config, client: MlflowClient = None) -> StageCache:
+    """Stage cache from config["stage_cache"]; set MLOPS_FORCE_STAGES=1 to rerun every stage."""
+    cache_cfg = config.get("stage_cache", {})
+    return StageCache(
+        cache_dir=cache_cfg.get("dir", DEFAULT_STAGE_CACHE_DIR),
+        enabled=cache_cfg.get("enabled", True),
+        force=os.getenv(FORCE_ENV_VAR, "") not in ("", "0"),
+        client=client,
+    )
+
+
+def plan_stages(config, stage_cache: StageCache):
+    """
+    Which stages an incremental run would execute and why, without running anything.
+
+    Downstream stages of a stage that reruns always rerun, since they depend on its new run.
+    """
+    plan = []
+    for model_cfg in config.get("models", []):
+        name = model_cfg["name"]
+        record, reason = stage_cache.check("train", name, train_components(config, model_cfg))
+        plan.append({"stage": "train", "model": name, "run": record is None, "reason": reason})
+        if record is None:
+            plan.append({"stage": "validate", "model": name, "run": True, "reason": "train reruns first"})
+            plan.append({"stage": "register", "model": name, "run": True, "reason": "validate reruns first"})
+            continue
+
+        run_id = record["run_id"]
+        record, reason = stage_cache.check("validate", name, validate_components(config, model_cfg, run_id))
+        plan.append({"stage": "validate", "model": name, "run": record is None, "reason": reason})
+        if record is None:
+            plan.append({"stage": "register", "model": name, "run": True, "reason": "validate reruns first"})
+            continue
+
+        status = "accepted" if record["result"]["accepted"] else "rejected"
+        if status != "accepted":
+            plan.append({"stage": "register", "model": name, "run": False, "reason": "model was rejected"})
+            continue
+        record, reason = stage_cache.check("register", name, register_components(model_cfg, run_id, status))
+        plan.append({"stage": "register", "model": name, "run": record is None, "reason": reason})
+    return plan
+
+
+def print_plan(plan):
+    print("🧭 Incremental run plan:")
+    for step in plan:
+        action = "▶️ run " if step["run"] else "⏭️ skip"
+        print(f"   {action} {step['stage']:<9} {step['model']:<12} {step['reason']}")
@@ -0,0 +1,175 @@
+import math
+
+import numpy as np
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.linear_model import SGDClassifier
+from sklearn.preprocessing import StandardScaler
+
+from helper.metrics import (
+    DEFAULT_SWEEP_BINS,
+    confusion_counts,
+    get_labels,
+    metrics_from_confusion,
+    predict_with_scores,
+    score_histograms,
+)
+
+DEFAULT_CHUNK_ROWS = 50_000
+DEFAULT_EPOCHS = 5
+
+
+def get_training_config(model_cfg):
+    """Training mode settings for a model; defaults to in-memory batch training."""
+    return {
+        "mode": "batch",
+        "chunk_rows": DEFAULT_CHUNK_ROWS,
+        "epochs": DEFAULT_EPOCHS,
+        **model_cfg.get("training", {}),
+    }
+
+
+def iter_row_chunks(X, y, rows, chunk_rows=DEFAULT_CHUNK_ROWS):
+    """
+    Yield (X_chunk, y_chunk) for a sorted subset of rows, chunk_rows at a time.
+
+    X and y are expected to be memory-mapped (see helper.data_loader), so only the
+    current chunk is materialised.
+    """
+    for start in range(0, len(rows), chunk_rows):
+        chunk = rows[start:start + chunk_rows]
+        yield X.iloc[chunk], y.iloc[chunk]
+
+
+def collect_classes(y, rows, chunk_rows=DEFAULT_CHUNK_ROWS):
+    classes = set()
+    for start in range(0, len(rows), chunk_rows):
+        classes.update(np.unique(y.iloc[rows[start:start + chunk_rows]]).tolist())
+    return np.array(sorted(classes))
+
+
+def fit_lr_streaming(X, y, train_rows, hparams, training_cfg):
+    """
+    Incremental equivalent of LogisticRegression(C=...) built from partial_fit calls.
+
+    A first pass fits a StandardScaler and collects the class labels; each epoch then
+    feeds the standardized chunks, in shuffled order, to an averaged SGDClassifier with
+    log loss and the L2 penalty that matches C (alpha = 1 / (C * n_train)). SGD needs
+    the scaling to converge, but the scaler is folded into the coefficients afterwards
+    (coef / scale, intercept - coef . mean), so the returned model takes raw features
+    like the batch LogisticRegression and its coef_ are on the same scale.
+
+    The penalty applies to the standardized coefficients, so the objective is exactly
+    the batch one when the features have unit variance (any mean); otherwise features
+    are regularized as if they were standardized, which matters little once n_train
+    is large next to C.
+    """
+    chunk_rows = training_cfg["chunk_rows"]
+    epochs = training_cfg["epochs"]
+    train_rows = np.sort(train_rows)
+
+    scaler = StandardScaler().set_output(transform="pandas")
+    for X_chunk, _ in iter_row_chunks(X, y, train_rows, chunk_rows):
+        scaler.partial_fit(X_chunk)
+    classes = collect_classes(y, train_rows, chunk_rows)
+
+    sgd = SGDClassifier(
+        loss="log_loss",
+        penalty="l2",
+        alpha=1.0 / (hparams.get("C", 1.0) * len(train_rows)),
+        # The "optimal" schedule is tuned for the penalty and takes huge steps with an
+        # alpha this small; a small constant step, averaged, converges on scaled data
+        learning_rate="constant",
+        eta0=training_cfg.get("eta0", 0.01),
+        average=True,
+        random_state=training_cfg.get("random_state", 42),
+    )
+    rng = np.random.default_rng(training_cfg.get("random_state", 42))
+    n_chunks = math.ceil(len(train_rows) / chunk_rows)
+    for _ in range(epochs):
+        for i in rng.permutation(n_chunks):
+            rows = train_rows[i * chunk_rows:(i + 1) * chunk_rows]
+            sgd.partial_fit(scaler.transform(X.iloc[rows]), y.iloc[rows], classes=classes)
+
+    sgd.coef_ = sgd.coef_ / scaler.scale_
+    sgd.intercept_ = sgd.intercept_ - sgd.coef_ @ scaler.mean_
+    return sgd
+
+
+def fit_rf_streaming(X, y, train_rows, hparams, training_cfg):
+    """
+    Grow a RandomForestClassifier chunk by chunk with warm_start.
+
+    The configured n_estimators are spread evenly over the chunks; with more chunks
+    than trees, only a subsample of chunks is used. Chunks missing a class pass their
+    share of trees on to the next chunk so every tree sees all labels; trees still
+    pending after the last chunk are grown on the last chunk that had every class.
+    """
+    chunk_rows = training_cfg["chunk_rows"]
+    n_estimators = hparams.get("n_estimators", 100)
+    train_rows = np.sort(train_rows)
+    classes = collect_classes(y, train_rows, chunk_rows)
+
+    clf = RandomForestClassifier(
+        n_estimators=n_estimators,
+        max_depth=hparams.get("max_depth", None),
+        random_state=hparams.get("random_state", 42),
+        warm_start=True,
+    )
+    n_chunks = math.ceil(len(train_rows) / chunk_rows)
+    grown, pending, last_complete = 0, 0, None
+    for i, (X_chunk, y_chunk) in enumerate(iter_row_chunks(X, y, train_rows, chunk_rows)):
+        pending += n_estimators * (i + 1) // n_chunks - n_estimators * i // n_chunks
+        complete = len(np.unique(y_chunk)) == len(classes)
+        if complete:
+            last_complete = i
+        if not pending:
+            continue
+        if not complete:
+            print(f"⚠️ Chunk {i} is missing classes, deferring {pending} trees")
+            continue
+        grown += pending
+        clf.set_params(n_estimators=grown)
+        clf.fit(X_chunk, y_chunk)
+        pending = 0
+
+    if last_complete is None:
+        raise ValueError("No chunk contained every class; cannot grow the forest in streaming mode")
+    if pending:
+        print(f"⚠️ The last chunks are missing classes; growing their {pending} trees on chunk {last_complete}")
+        rows = train_rows[last_complete * chunk_rows:(last_complete + 1) * chunk_rows]
+        grown += pending
+        clf.set_params(n_estimators=grown)
+        clf.fit(X.iloc[rows], y.iloc[rows])
+    return clf
+
+
+def accumulate_streaming(model, X, y, test_rows, chunk_rows=DEFAULT_CHUNK_ROWS,
+                         pos_label=1, sweep_bins=DEFAULT_SWEEP_BINS, drift_monitor=None):
+    """
+    Confusion counts (and positive-class score histograms, when the model has
+    predict_proba) accumulated chunk by chunk over the holdout rows; a drift_monitor
+    (helper.sketches.DriftMonitor) is updated with the same chunks.
+
+    Returns (cm, labels, histograms); histograms is None when scores are unavailable.
+    """
+    test_rows = np.sort(test_rows)
+    labels = collect_classes(y, test_rows, chunk_rows)
+    labels = get_labels(labels, [], model.classes_, pos_label)
+    cm = np.zeros((len(labels), len(labels)), dtype=np.int64)
+    histograms = None
+    for X_chunk, y_chunk in iter_row_chunks(X, y, test_rows, chunk_rows):
+        y_pred, y_score = predict_with_scores(model, X_chunk, pos_label)
+        cm += confusion_counts(y_chunk, y_pred, labels)
+        if drift_monitor is not None:
+            drift_monitor.update(X_chunk)
+        if y_score is not None:
+            pos_hist, neg_hist = score_histograms(y_chunk, y_score, pos_label, sweep_bins)
+            histograms = (pos_hist, neg_hist) if histograms is None else \
+                (histograms[0] + pos_hist, histograms[1] + neg_hist)
+    return cm, labels, histograms
+
+
+def evaluate_streaming(model, X, y, test_rows, chunk_rows=DEFAULT_CHUNK_ROWS, pos_label=1, average=None):
+    """Holdout metrics accumulated from per-chunk confusion counts."""
+    cm, labels, _ = accumulate_streaming(model, X, y, test_rows, chunk_rows, pos_label)
+    return metrics_from_confusion(cm, labels, pos_label, average)
@@ -0,0 +1,283 @@
+import json
+import math
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+MANIFEST_FILE = "manifest.json"
+MANIFEST_VERSION = 1
+GENERATION_FORMATS = ("parquet", "npy", "csv")
+TARGET_COLUMN = "target"
+
+
+def get_generation_config(config=None):
+    """Generator parameters from config["data_generation"], with make_classification-like defaults."""
+    params = {
+        "n_samples": 1000,
+        "n_features": 10,
+        "n_informative": 6,
+        "n_redundant": 2,
+        "n_classes": 2,
+        "n_clusters_per_class": 2,
+        "weights": None,          # class balance, e.g. [0.9, 0.1]; None means balanced
+        "class_sep": 1.0,
+        "flip_y": 0.01,           # fraction of labels assigned at random
+        "seed": 42,
+        "shard_rows": 1_000_000,
+        "chunk_rows": 100_000,    # rows generated and written at a time within a shard
+        "format": "parquet",
+        "dtype": "float32",
+        "output_dir": "./data/generated",
+        "workers": None,
+        **((config or {}).get("data_generation") or {}),
+    }
+    validate_generation_params(params)
+    return params
+
+
+def validate_generation_params(params):
+    if params["format"] not in GENERATION_FORMATS:
+        raise ValueError(f"Unsupported format '{params['format']}': use one of {GENERATION_FORMATS}")
+    if params["n_informative"] + params["n_redundant"] > params["n_features"]:
+        raise ValueError("n_informative + n_redundant must not exceed n_features")
+    if params["n_informative"] < 1 or params["n_classes"] < 2:
+        raise ValueError("Need at least one informative feature and two classes")
+    if params["n_classes"] * params["n_clusters_per_class"] > 2 ** min(params["n_informative"], 62):
+        raise ValueError("n_classes * n_clusters_per_class must be at most 2 ** n_informative")
+    weights = params["weights"]
+    if weights is not None and (len(weights) != params["n_classes"] or min(weights) < 0 or sum(weights) <= 0):
+        raise ValueError(f"weights must be {params['n_classes']} non-negative class proportions")
+    if params["n_samples"] < 1 or params["shard_rows"] < 1 or params["chunk_rows"] < 1:
+        raise ValueError("n_samples, shard_rows and chunk_rows must be positive")
+
+
+def _manifest_params(params):
+    """The parameters that determine the data (not where or how fast it is written)."""
+    return {k: v for k, v in params.items() if k not in ("output_dir", "workers")}
+
+
+def shard_plan(params):
+    """[(shard index, first row, rows)] covering n_samples in shard_rows-sized shards."""
+    n_shards = math.ceil(params["n_samples"] / params["shard_rows"])
+    return [(i, i * params["shard_rows"], min(params["shard_rows"], params["n_samples"] - i * params["shard_rows"]))
+            for i in range(n_shards)]
+
+
+def _class_model(params):
+    """
+    Cluster centroids, per-cluster covariance transforms and the redundant-feature mix.
+
+    Drawn from the dataset seed alone, so every shard samples the same distribution.
+    Centroids sit on distinct vertices of a hypercube with side 2 * class_sep, as in
+    sklearn's make_classification.
+    """
+    rng = np.random.default_rng(np.random.SeedSequence(params["seed"]))
+    n_informative = params["n_informative"]
+    n_clusters = params["n_classes"] * params["n_clusters_per_class"]
+    if n_informative <= 20:
+        vertices = rng.choice(2 ** n_informative, n_clusters, replace=False)
+        bits = (vertices[:, None] >> np.arange(n_informative)) & 1
+    else:
+        bits = rng.integers(0, 2, (n_clusters, n_informative))
+        while len(np.unique(bits, axis=0)) < n_clusters:
+            bits = rng.integers(0, 2, (n_clusters, n_informative))
+    centroids = (2 * bits - 1) * params["class_sep"]
+    transforms = 2 * rng.random((n_clusters, n_informative, n_informative)) - 1
+    redundant = 2 * rng.random((n_informative, params["n_redundant"])) - 1
+    return centroids, transforms, redundant
+
+
+def _sample(rng, model, params, n_rows):
+    centroids, transforms, redundant = model
+    n_classes, per_class = params["n_classes"], params["n_clusters_per_class"]
+    weights = None
+    if params["weights"] is not None:
+        weights = np.asarray(params["weights"], dtype=float) / sum(params["weights"])
+
+    y = rng.choice(n_classes, size=n_rows, p=weights)
+    clusters = y * per_class + rng.integers(0, per_class, n_rows)
+    informative = rng.standard_normal((n_rows, params["n_informative"]))
+    for k in range(len(centroids)):
+        rows = clusters == k
+        informative[rows] = informative[rows] @ transforms[k] + centroids[k]
+
+    X = np.empty((n_rows, params["n_features"]), dtype=params["dtype"])
+    X[:, :params["n_informative"]] = informative
+    X[:, params["n_informative"]:params["n_informative"] + params["n_redundant"]] = informative @ redundant
+    n_noise = params["n_features"] - params["n_informative"] - params["n_redundant"]
+    if n_noise:
+        X[:, params["n_features"] - n_noise:] = rng.standard_normal((n_rows, n_noise))
+
+    flipped = rng.random(n_rows) < params["flip_y"]
+    y[flipped] = rng.integers(0, n_classes, int(flipped.sum()))
+    return X, y.astype(np.int64)
+
+
+def feature_columns(params):
+    return [f"feature_{i}" for i in range(params["n_features"])]
+
+
+def _part_paths(params, index):
+    name = f"part-{index:05d}"
+    if params["format"] == "npy":
+        return f"{name}.features.npy", f"{name}.target.npy"
+    return f"{name}.{params['format']}", None
+
+
+def generate_shard(params, index, output_dir):
+    """
+    Write shard `index` to its part file(s) and return its manifest entry.
+
+    The shard's random stream is SeedSequence(seed, spawn_key=(index,)), so any shard
+    can be regenerated on its own from the manifest parameters. Rows are generated and
+    written chunk_rows at a time, keeping memory bounded regardless of shard size.
+    Part files are written under temporary names and removed if generation fails.
+    """
+    _, first_row, n_rows = shard_plan(params)[index]
+    output_dir = Path(output_dir)
+    rng = np.random.default_rng(np.random.SeedSequence(params["seed"], spawn_key=(index,)))
+    model = _class_model(params)
+    columns = feature_columns(params)
+    path, target_path = _part_paths(params, index)
+    tmp = {name: output_dir / f"{name}.tmp-{os.getpid()}" for name in (path, target_path) if name}
+
+    class_counts = np.zeros(params["n_classes"], dtype=np.int64)
+    writer, features, target, written = None, None, None, False
+    try:
+        if params["format"] == "npy":
+            features = np.lib.format.open_memmap(tmp[path], mode="w+", dtype=params["dtype"],
+                                                 shape=(n_rows, params["n_features"]))
+            target = np.lib.format.open_memmap(tmp[target_path], mode="w+", dtype=np.int64, shape=(n_rows,))
+        for start in range(0, n_rows, params["chunk_rows"]):
+            X, y = _sample(rng, model, params, min(params["chunk_rows"], n_rows - start))
+            class_counts += np.bincount(y, minlength=params["n_classes"])
+            if params["format"] == "npy":
+                features[start:start + len(y)] = X
+                target[start:start + len(y)] = y
+                continue
+            chunk = pd.DataFrame(X, columns=columns, copy=False)
+            chunk[TARGET_COLUMN] = y
+            if params["format"] == "parquet":
+                import pyarrow as pa
+                import pyarrow.parquet as pq
+                table = pa.Table.from_pandas(chunk, preserve_index=False)
+                writer = writer or pq.ParquetWriter(str(tmp[path]), table.schema)
+                writer.write_table(table)
+            else:
+                chunk.to_csv(tmp[path], mode="a", header=start == 0, index=False)
+        written = True
+    finally:
+        if writer is not None:
+            writer.close()
+        for array in (features, target):
+            if array is not None:
+                array.flush()
+        if not written:
+            # A failed shard leaves no partial files behind
+            for tmp_path in tmp.values():
+                tmp_path.unlink(missing_ok=True)
+    for name, tmp_path in tmp.items():
+        os.replace(tmp_path, output_dir / name)
+
+    entry = {"index": index, "path": path, "row_offset": first_row, "rows": n_rows,
+             "seed": {"entropy": params["seed"], "spawn_key": [index]},
+             "class_counts": class_counts.tolist()}
+    if target_path:
+        entry["target_path"] = target_path
+    return entry
+
+
+def _schema(params):
+    return ([{"name": c, "dtype": np.dtype(params["dtype"]).name} for c in feature_columns(params)]
+            + [{"name": TARGET_COLUMN, "dtype": "int64"}])
+
+
+def generate_dataset(params, output_dir=None, workers=None, shards=None):
+    """
+    Generate the dataset as part files in output_dir, one process per shard at a time,
+    and write manifest.json (schema, parameters, seeds and row/class counts per shard).
+
+    With shards, only those shards are (re)generated; the other entries come from the
+    existing manifest, whose parameters must match.
+    """
+    validate_generation_params(params)
+    output_dir = Path(output_dir or params["output_dir"])
+    output_dir.mkdir(parents=True, exist_ok=True)
+    plan = shard_plan(params)
+    indices = list(range(len(plan))) if shards is None else sorted(set(shards))
+    if any(i < 0 or i >= len(plan) for i in indices):
+        raise ValueError(f"Shard indices must be between 0 and {len(plan) - 1}")
+
+    entries = {}
+    manifest_path = output_dir / MANIFEST_FILE
+    if shards is not None and manifest_path.exists():
+        existing = json.loads(manifest_path.read_text())
+        if existing["params"] != _manifest_params(params):
+            raise ValueError(f"{manifest_path} was generated with different parameters: {existing['params']}")
+        entries = {entry["index"]: entry for entry in existing["shards"]}
+
+    workers = workers or params.get("workers") or os.cpu_count()
+    started = time.perf_counter()
+    print(f"🧪 Generating {len(indices)} of {len(plan)} shards ({params['n_samples']} rows x "
+          f"{params['n_features']} features, {params['format']}) with {min(workers, len(indices))} workers")
+    if len(indices) == 1 or workers == 1:
+        results = [generate_shard(params, i, output_dir) for i in indices]
+    else:
+        with ProcessPoolExecutor(max_workers=min(workers, len(indices))) as pool:
+            results = list(pool.map(generate_shard, [params] * len(indices), indices, [output_dir] * len(indices)))
+    entries.update({entry["index"]: entry for entry in results})
+    elapsed = time.perf_counter() - started
+
+    shard_entries = [entries[i] for i in sorted(entries)]
+    complete = len(shard_entries) == len(plan)
+    manifest = {
+        "manifest_version": MANIFEST_VERSION,
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "format": params["format"],
+        "n_rows": sum(entry["rows"] for entry in shard_entries),
+        "complete": complete,
+        "feature_columns": feature_columns(params),
+        "target_column": TARGET_COLUMN,
+        "schema": _schema(params),
+        "params": _manifest_params(params),
+        "class_counts": np.sum([entry["class_counts"] for entry in shard_entries], axis=0).tolist(),
+        "shards": shard_entries,
+    }
+    tmp_path = manifest_path.with_suffix(f".{os.getpid()}.tmp")
+    tmp_path.write_text(json.dumps(manifest, indent=2))
+    os.replace(tmp_path, manifest_path)
+    rows = sum(entry["rows"] for entry in results)
+    print(f"✅ Wrote {rows} rows in {elapsed:.1f}s ({rows / max(elapsed, 1e-9):,.0f} rows/s) → {manifest_path}")
+    return manifest
+
+
+def is_manifest(path):
+    path = Path(path)
+    return path.name == MANIFEST_FILE or (path.is_dir() and (path / MANIFEST_FILE).exists())
+
+
+def iter_dataset_chunks(path, chunk_rows, columns=None):
+    """Yield DataFrames of at most chunk_rows rows from a generated dataset, shard by shard."""
+    manifest_path = Path(path) if Path(path).name == MANIFEST_FILE else Path(path) / MANIFEST_FILE
+    manifest = json.loads(manifest_path.read_text())
+    if not manifest.get("complete", True):
+        raise ValueError(f"{manifest_path} describes a partially generated dataset")
+    root = manifest_path.parent
+    for entry in manifest["shards"]:
+        if manifest["format"] == "parquet":
+            import pyarrow.parquet as pq
+            for batch in pq.ParquetFile(root / entry["path"]).iter_batches(batch_size=chunk_rows, columns=columns):
+                yield batch.to_pandas()
+        elif manifest["format"] == "npy":
+            features = np.load(root / entry["path"], mmap_mode="r")
+            target = np.load(root / entry["target_path"], mmap_mode="r")
+            for start in range(0, len(target), chunk_rows):
+                chunk = pd.DataFrame(features[start:start + chunk_rows], columns=manifest["feature_columns"])
+                chunk[manifest["target_column"]] = target[start:start + chunk_rows]
+                yield chunk[columns] if columns else chunk
+        else:
+            yield from pd.read_csv(root / entry["path"], chunksize=chunk_rows, usecols=columns)
@@ -0,0 +1,244 @@
+import json
+from pathlib import Path
+
+import mlflow
+import numpy as np
+import pandas as pd
+
+from helper.model_registry import get_model_entry
+from helper.streaming import get_training_config, evaluate_streaming
+from helper.search import get_search_space, run_search
+from helper.cross_validation import get_cv_config, run_cross_validation
+from helper.incremental import get_incremental_config, lineage_tags, plan_update
+from helper.model_cache import get_model_cache
+from helper.sketches import SKETCH_ARTIFACT_PATH, SKETCH_FILE, get_drift_config, load_run_sketch, sketch_rows
+from helper.batch_logger import BatchLogger
+from helper.artifact_uploader import ArtifactUploader, get_upload_config
+from helper.metrics import compute_metrics, get_evaluation_config
+from helper.split_manifest import SPLIT_DIGEST_TAG, manifest_digest
+from helper.profiling import get_profiler, span
+from helper.forest_engine import ENGINE_ARTIFACT_PATH, ENGINE_FILE
+from helper.schema_validator import (
+    get_schema_validation_config,
+    compile_schema,
+    validate_chunked,
+    handle_report,
+    summarize_report,
+)
+
+
+def get_model_schemas(model_cfg):
+    """Input/output schemas from the model entry, falling back to the hyperparameters block."""
+    hparams = model_cfg.get("hyperparameters", {})
+    input_schema = model_cfg.get("model_input_schema", hparams.get("model_input_schema", {}))
+    output_schema = model_cfg.get("model_output_schema", hparams.get("model_output_schema", {}))
+    return input_schema, output_schema
+
+
+def _log_compiled_engine(compile_fn, model, X_check, engine_dir, uploader, run_id):
+    """
+    Compile the fitted model, check it predicts exactly like the sklearn model on X_check
+    and queue it for upload under engine/; returns whether it was logged.
+    """
+    with span("compile_engine"):
+        engine = compile_fn(model)
+        engine_dir.mkdir(parents=True, exist_ok=True)
+        engine_path = engine.save(engine_dir / ENGINE_FILE)
+    with span("engine_check", rows=len(X_check)):
+        identical = np.array_equal(engine.predict_proba(X_check), model.predict_proba(X_check))
+    if not identical:
+        print("⚠️ Compiled engine does not match the sklearn model's predictions; not logging it")
+        return False
+    uploader.log_artifact(run_id, engine_path, artifact_path=ENGINE_ARTIFACT_PATH)
+    return True
+
+
+def _feature_sketch(config, X, split, update, drift_cfg, chunk_rows):
+    """
+    Sketch of the training rows' features. An incremental update merges the parent
+    run's sketch with a sketch of the new rows, so earlier rows are not read again.
+    """
+    if update:
+        parent_sketch = load_run_sketch(get_model_cache(config), update["tags"]["parent_run_id"])
+        if parent_sketch is not None and parent_sketch.features == list(X.columns):
+            return parent_sketch.merge(sketch_rows(X, update["new_row_idx"], drift_cfg, chunk_rows))
+    return sketch_rows(X, split["train_idx"], drift_cfg, chunk_rows)
+
+
+def train_model(config, model_cfg, X, y, split, split_path, workers=1):
+    """
+    Fit one configured model on the split's train rows, evaluate it on the test rows and
+    log everything to a new MLflow run. Returns (run_id, metrics).
+
+    Phases are profiled (helper.profiling); the span totals are logged on the run.
+    With cross_validation enabled, k-fold CV of the final hyperparameters runs on the
+    train rows and its cv_<metric>_mean / _std are logged with the run's other metrics.
+    With incremental enabled, the registered version is updated with the rows appended
+    since it was trained when its lineage allows (helper.incremental). With drift
+    enabled, a sketch of the training features is logged under sketches/. `workers` is
+    the number of models training at once; a hyperparameter search uses its share of the cores.
+    Artifact files are uploaded in the background (helper.artifact_uploader) as soon
+    as they are written, and all of them are in the run before it ends.
+    """
+    entry = get_model_entry(model_cfg)
+    training_cfg = get_training_config(model_cfg)
+    cv_cfg = get_cv_config(model_cfg)
+    inc_cfg = get_incremental_config(model_cfg)
+    drift_cfg = get_drift_config(config)
+    hparams = model_cfg["hyperparameters"]
+    suffix = entry["suffix"]
+
+    output_dir = Path(config["data"]["output_dir"])
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    streaming = training_cfg["mode"] == "streaming"
+    mlflow.set_experiment(model_cfg["experiment_name"])
+
+    update = None
+    if inc_cfg["enabled"]:
+        if streaming or get_search_space(hparams):
+            raise ValueError(f"Incremental retraining is not supported with streaming mode or hyperparameter "
+                             f"search ('{model_cfg['name']}')")
+        with span("plan_update", model=model_cfg["name"]):
+            update = plan_update(config, model_cfg, entry, hparams, split, y, inc_cfg)
+
+    # Check the training data against model_input_schema before fitting anything
+    # (an update only reads the rows it fits; the rest were checked when they were trained on)
+    schema_cfg = get_schema_validation_config(config)
+    model_input_schema, model_output_schema = get_model_schemas(model_cfg)
+    X_checked = X.iloc[update["fit_rows"]] if update else X
+    with span("schema_check.input", model=model_cfg["name"]):
+        input_report = validate_chunked(compile_schema(model_input_schema), X_checked, training_cfg["chunk_rows"])
+    handle_report(input_report, f"{model_cfg['name']} training data", schema_cfg)
+    schema_reports = {"input": summarize_report(input_report)}
+
+    if update:
+        X_train, y_train = X.iloc[update["fit_rows"]], y.iloc[update["fit_rows"]]
+    elif not streaming:
+        X_train, y_train = X.iloc[split["train_idx"]], y.iloc[split["train_idx"]]
+    if not streaming:
+        X_test, y_test = X.iloc[split["test_idx"]], y.iloc[split["test_idx"]]
+
+    # List/range hyperparameters: search first, then train the final run on the best point
+    search_run_id = None
+    if get_search_space(hparams):
+        if streaming:
+            raise ValueError(f"Hyperparameter search is not supported in streaming mode ('{model_cfg['name']}')")
+        with span("search", model=model_cfg["name"]):
+            hparams, search_run_id = run_search(model_cfg, entry, hparams, X_train, y_train, workers)
+
+    cv_results = None
+    if cv_cfg["enabled"]:
+        if streaming:
+            raise ValueError(f"Cross-validation is not supported in streaming mode ('{model_cfg['name']}')")
+        with span("cross_validation", model=model_cfg["name"], folds=cv_cfg["folds"]):
+            cv_results = run_cross_validation(config, model_cfg, hparams, y, split["train_idx"], cv_cfg)
+
+    # The uploader is flushed when the block exits, before the run is ended
+    with mlflow.start_run(run_name=model_cfg["run_name"]) as run, BatchLogger() as logger, \
+            ArtifactUploader(logger.client, get_upload_config(config)) as uploader, \
+            span("train_model", model=model_cfg["name"]):
+        run_id = run.info.run_id
+
+        # Files known before fitting upload while the model trains:
+        # the split manifest (row indices + dataset hash, not a copy of the test set),
+        # the run ID and the model schemas
+        uploader.log_artifact(run_id, split_path)
+        run_id_path = output_dir / f"run_id_{suffix}.txt"
+        with open(run_id_path, "w") as f:
+            f.write(run_id)
+        uploader.log_artifact(run_id, run_id_path)
+        input_schema_path = output_dir / f"model_input_schema_{suffix}.json"
+        output_schema_path = output_dir / f"model_output_schema_{suffix}.json"
+        with open(input_schema_path, "w") as f:
+            json.dump(model_input_schema, f, indent=2)
+        with open(output_schema_path, "w") as f:
+            json.dump(model_output_schema, f, indent=2)
+        uploader.log_artifact(run_id, input_schema_path)
+        uploader.log_artifact(run_id, output_schema_path)
+
+        eval_cfg = get_evaluation_config(config)
+        if streaming:
+            # Out-of-core: fit and evaluate chunk by chunk over the memory-mapped dataset
+            with span("fit", mode="streaming"):
+                model = entry["fit_streaming"](X, y, split["train_idx"], hparams, training_cfg)
+            with span("evaluate", mode="streaming"):
+                metrics = evaluate_streaming(model, X, y, split["test_idx"], training_cfg["chunk_rows"],
+                                             eval_cfg["pos_label"], eval_cfg["average"])
+        else:
+            if update:
+                # New rows plus a replay sample of earlier ones, starting from the registered model
+                with span("fit", mode="incremental", rows=len(X_train)):
+                    model = entry["update"](update["model"], X_train, y_train, hparams, {**inc_cfg, **update})
+            else:
+                model = entry["build"](hparams)
+                with span("fit", rows=len(X_train)):
+                    model.fit(X_train, y_train)
+            with span("predict", rows=len(X_test)):
+                y_pred = model.predict(X_test)
+            with span("metrics"):
+                metrics = compute_metrics(y_test, y_pred, getattr(model, "classes_", None),
+                                          eval_cfg["pos_label"], eval_cfg["average"])
+            with span("schema_check.output"):
+                output_report = compile_schema(model_output_schema).validate(pd.DataFrame({"prediction": y_pred}))
+            handle_report(output_report, f"{model_cfg['name']} predictions", schema_cfg)
+            schema_reports["output"] = summarize_report(output_report)
+
+        # Log model
+        with span("mlflow.log_model"):
+            mlflow.sklearn.log_model(
+                sk_model=model,
+                artifact_path="model"
+            )
+
+        # Compiled inference engine (random forests), logged next to the sklearn model
+        if entry.get("compile"):
+            X_check = X_test if not streaming else X.iloc[split["test_idx"][:training_cfg["chunk_rows"]]]
+            logged = _log_compiled_engine(entry["compile"], model, X_check, output_dir / f"engine_{suffix}",
+                                          uploader, run_id)
+            logger.set_tag(run_id, "compiled_engine", "logged" if logged else "mismatch")
+
+        # Log hyperparameters and metrics (buffered, sent in one batch when the run ends)
+        logger.log_params(run_id, {**entry["params"](hparams), "training_mode": training_cfg["mode"]})
+        if hasattr(model, "estimators_"):
+            # Trees in the fitted forest; incremental updates add and drop trees
+            logger.log_param(run_id, "n_estimators_grown", len(model.estimators_))
+        logger.log_metrics(run_id, metrics)
+        logger.log_metric(run_id, "schema_invalid_rows", input_report["invalid_rows"])
+        if cv_results:
+            # Fold means/stds, plus each fold's metrics as cv_<metric> at step=fold
+            logger.log_metrics(run_id, cv_results["summary"])
+            for fold in cv_results["folds"]:
+                logger.log_metrics(run_id, {f"cv_{m}": v for m, v in fold["metrics"].items()}, step=fold["fold"])
+            logger.log_param(run_id, "cv_folds", cv_cfg["folds"])
+            cv_path = output_dir / f"cv_results_{suffix}.json"
+            with open(cv_path, "w") as f:
+                json.dump({**cv_results, "settings": cv_cfg}, f, indent=2)
+            uploader.log_artifact(run_id, cv_path)
+
+        # Per-feature distribution sketch, for drift checks in validation and scoring
+        if drift_cfg["enabled"]:
+            with span("sketch", model=model_cfg["name"]):
+                sketch = _feature_sketch(config, X, split, update, drift_cfg, training_cfg["chunk_rows"])
+                sketch_dir = output_dir / f"sketches_{suffix}"
+                sketch_dir.mkdir(parents=True, exist_ok=True)
+                sketch_path = sketch.save(sketch_dir / SKETCH_FILE)
+            uploader.log_artifact(run_id, sketch_path, artifact_path=SKETCH_ARTIFACT_PATH)
+
+        # How the data matched the model schemas
+        schema_report_path = output_dir / f"schema_report_{suffix}.json"
+        with open(schema_report_path, "w") as f:
+            json.dump(schema_reports, f, indent=2)
+        uploader.log_artifact(run_id, schema_report_path)
+
+        # Log model tags, and which rows the model has been trained on
+        logger.set_tags(run_id, model_cfg.get("model_tags", {}))
+        logger.set_tag(run_id, SPLIT_DIGEST_TAG, manifest_digest(split_path))
+        logger.set_tags(run_id, lineage_tags(entry, hparams, split))
+        if inc_cfg["enabled"]:
+            logger.set_tags(run_id, update["tags"] if update else {"training_update": "full"})
+        if search_run_id:
+            logger.set_tag(run_id, "search_run_id", search_run_id)
+
+    get_profiler().log_to_run(run_id, model=model_cfg["name"])
+    return run_id, metrics
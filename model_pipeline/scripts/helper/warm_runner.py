@@ -0,0 +1,144 @@
+import importlib
+import multiprocessing
+import os
+import resource
+import signal
+import subprocess
+import sys
+import time
+import traceback
+from pathlib import Path
+
+from helper.load_config import load_config
+
+SCRIPTS_DIR = Path(__file__).resolve().parent.parent
+# Libraries every stage needs; the warm parent imports them once
+WARM_MODULES = [
+    "numpy", "pandas", "pyarrow.parquet", "yaml",
+    "sklearn.ensemble", "sklearn.linear_model", "sklearn.model_selection", "sklearn.metrics",
+    "mlflow", "mlflow.sklearn", "mlflow.tracking",
+]
+AZUREML_MODULES = ["azureml.core"]
+KILL_GRACE_S = 5
+# Stage scripts with a main(argv, config) entry that can run in a warm child
+STAGE_MODULES = {"train.py": "train", "validate_model.py": "validate_model", "register_model.py": "register_model"}
+
+
+def _noop():
+    pass
+
+
+def _stage_child(module_name, args, config, log_path, submitted_at, start_method, conn):
+    """Body of a forked stage: output goes to the step log, timings go back through conn."""
+    timings = {"startup_s": time.time() - submitted_at}
+    # Own process group, so a timeout also stops the stage's worker processes
+    os.setpgid(0, 0)
+    # Children of the forkserver default to it too; the stage's own pools should fork this warm process
+    multiprocessing.set_start_method(start_method, force=True)
+    fd = os.open(log_path, os.O_WRONLY | os.O_APPEND | os.O_CREAT)
+    os.dup2(fd, 1)
+    os.dup2(fd, 2)
+    try:
+        started = time.perf_counter()
+        module = importlib.import_module(module_name)
+        timings["import_s"] = time.perf_counter() - started
+        started = time.perf_counter()
+        module.main(args, config)
+        timings["run_s"] = time.perf_counter() - started
+        # Largest resident set of the stage or any of its worker processes (KB on Linux)
+        timings["max_rss_mb"] = max(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+                                    resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss) / 1024
+    except BaseException:
+        traceback.print_exc()
+        sys.stdout.flush()
+        conn.send(timings)
+        os._exit(1)
+    sys.stdout.flush()
+    sys.stderr.flush()
+    conn.send(timings)
+
+
+class WarmRunner:
+    """
+    Runs pipeline stages as children of a warm, long-lived parent.
+
+    A forkserver process imports numpy, pandas, sklearn and mlflow (and azureml.core
+    with use_azureml) once; each stage is then a fresh fork of it, so steps start in
+    milliseconds instead of paying interpreter startup and imports. Config files are
+    parsed once and passed to the stage's main(argv, config). Children still get their
+    own process, so a crash, timeout or leaked state stays within one step.
+    """
+
+    def __init__(self, modules=None):
+        self.modules = list(modules or WARM_MODULES)
+        self.ctx = multiprocessing.get_context("forkserver")
+        self.ctx.set_forkserver_preload(self.modules)
+        self.configs = {}
+        self.warmup_s = None
+
+    def start(self):
+        """Start the forkserver and wait until its imports are done."""
+        started = time.perf_counter()
+        child = self.ctx.Process(target=_noop)
+        child.start()
+        child.join()
+        self.warmup_s = time.perf_counter() - started
+        print(f"🔥 Warm parent ready in {self.warmup_s:.1f}s "
+              f"(imported once: {', '.join(self.modules)})")
+        return self
+
+    def can_run(self, argv):
+        """Whether argv is `python <stage script> ...` for a stage script from this scripts directory."""
+        return (len(argv) > 1 and argv[0] == sys.executable
+                and Path(argv[1]).name in STAGE_MODULES and Path(argv[1]).parent.resolve() == SCRIPTS_DIR)
+
+    def _config_for(self, args):
+        if "--config" not in args:
+            return None
+        path = args[args.index("--config") + 1]
+        if path not in self.configs:
+            self.configs[path] = load_config(path)
+        return self.configs[path]
+
+    @staticmethod
+    def _kill(child):
+        for sig in (signal.SIGTERM, signal.SIGKILL):
+            try:
+                os.killpg(child.pid, sig)
+            except ProcessLookupError:
+                return
+            child.join(KILL_GRACE_S)
+            if not child.is_alive():
+                return
+
+    def execute(self, argv, log, timeout_s=None):
+        """Run one stage in a forked child; same contract as running argv as a subprocess."""
+        log.flush()
+        args = argv[2:]
+        receiver, sender = self.ctx.Pipe(duplex=False)
+        child = self.ctx.Process(target=_stage_child, args=(
+            STAGE_MODULES[Path(argv[1]).name], args, self._config_for(args), log.name, time.time(),
+            multiprocessing.get_start_method(), sender))
+        child.start()
+        sender.close()
+        child.join(timeout_s)
+        if child.is_alive():
+            self._kill(child)
+            raise subprocess.TimeoutExpired(argv, timeout_s)
+        timings = receiver.recv() if receiver.poll() else {}
+        receiver.close()
+        return child.exitcode, timings
+
+
+def get_warm_runner(config, local_cfg):
+    """A started WarmRunner when platform.local.warm is set, else None."""
+    if not local_cfg.get("warm"):
+        return None
+    if "forkserver" not in multiprocessing.get_all_start_methods():
+        print("⚠️ Warm mode needs the forkserver start method; running steps as subprocesses")
+        return None
+    modules = list(WARM_MODULES)
+    pipeline_config = load_config(config["job"]["config_path"])
+    if pipeline_config.get("platform", {}).get("use_azureml", False):
+        modules += AZUREML_MODULES
+    return WarmRunner(modules).start()
@@ -0,0 +1,134 @@
+import argparse
+import asyncio
+import json
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from helper.load_config import load_config
+from serve import get_serving_config
+
+
+async def _request(reader, writer, host, path, body):
+    data = json.dumps(body).encode()
+    writer.write(
+        f"POST {path} HTTP/1.1\r\nHost: {host}\r\nContent-Type: application/json\r\n"
+        f"Content-Length: {len(data)}\r\n\r\n".encode() + data
+    )
+    await writer.drain()
+    status = int((await reader.readline()).split()[1])
+    length = 0
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            break
+        key, _, value = line.decode("latin-1").partition(":")
+        if key.strip().lower() == "content-length":
+            length = int(value)
+    payload = json.loads(await reader.readexactly(length))
+    if status != 200:
+        raise RuntimeError(f"HTTP {status}: {payload}")
+    return payload
+
+
+async def run_load(host, port, path, records, n_requests, concurrency):
+    """
+    Send n_requests single-record predictions over `concurrency` keep-alive connections.
+
+    Returns throughput and client-side latency percentiles.
+    """
+    latencies = []
+    counter = iter(range(n_requests))
+
+    async def client():
+        reader, writer = await asyncio.open_connection(host, port)
+        try:
+            for i in counter:
+                started = time.perf_counter()
+                await _request(reader, writer, host, path, {"inputs": [records[i % len(records)]]})
+                latencies.append(time.perf_counter() - started)
+        finally:
+            writer.close()
+
+    started = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    latencies_ms = np.array(latencies) * 1000
+    return {
+        "requests": len(latencies),
+        "seconds": round(elapsed, 3),
+        "requests_per_second": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(float(np.percentile(latencies_ms, 50)), 3),
+        "p99_ms": round(float(np.percentile(latencies_ms, 99)), 3),
+    }
+
+
+async def _wait_until_ready(host, port, process, timeout=120):
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"Server exited with code {process.returncode}")
+        try:
+            _, writer = await asyncio.open_connection(host, port)
+            writer.close()
+            return
+        except OSError:
+            await asyncio.sleep(0.2)
+    raise TimeoutError(f"Server on port {port} did not start within {timeout}s")
+
+
+async def run_against_server(args, host, port, max_batch_size, path, records):
+    """Start serve.py with the given batch size, run the load, and stop it again."""
+    command = [sys.executable, str(Path(__file__).parent / "serve.py"), "--config", args.config,
+               "--host", host, "--port", str(port), "--max-batch-size", str(max_batch_size)]
+    process = subprocess.Popen(command)
+    try:
+        await _wait_until_ready(host, port, process)
+        await run_load(host, port, path, records, min(args.requests, 200), args.concurrency)  # warm-up
+        return await run_load(host, port, path, records, args.requests, args.concurrency)
+    finally:
+        process.terminate()
+        process.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--config", type=str, required=True, help="Path to job config YAML")
+    parser.add_argument("--model", type=str, required=True, help="Config name or registered model name to call")
+    parser.add_argument("--version", type=str, help="Model version (default: the server's default version)")
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--url", type=str, help="host:port of a running server; otherwise compare "
+                                                "unbatched and batched servers started locally")
+    args = parser.parse_args()
+
+    config = load_config(args.config)
+    serving_cfg = get_serving_config(config)
+    target = config["data"]["target_column"]
+    records = pd.read_csv(config["data"]["path"], nrows=1000).drop(columns=[target]).to_dict("records")
+    path = f"/predict/{args.model}" + (f"/{args.version}" if args.version else "")
+
+    if args.url:
+        host, port = args.url.rsplit(":", 1)
+        print(json.dumps(asyncio.run(run_load(host, int(port), path, records, args.requests, args.concurrency)), indent=2))
+        return
+
+    host, port = "127.0.0.1", serving_cfg["port"]
+    results = {
+        "unbatched": asyncio.run(run_against_server(args, host, port, 1, path, records)),
+        "batched": asyncio.run(run_against_server(args, host, port, serving_cfg["max_batch_size"], path, records)),
+    }
+    print(f"📊 {args.requests} requests, concurrency {args.concurrency}")
+    for mode, result in results.items():
+        print(f"   {mode:<10} {result['requests_per_second']:>9.1f} req/s  "
+              f"p50={result['p50_ms']:.2f}ms  p99={result['p99_ms']:.2f}ms")
+    speedup = results["batched"]["requests_per_second"] / results["unbatched"]["requests_per_second"]
+    print(f"🚀 Micro-batching throughput gain: {speedup:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
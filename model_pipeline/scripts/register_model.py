@@ -2,44 +2,69 @@ import mlflow
 from mlflow.tracking import MlflowClient
 from pathlib import Path
 import json
+import time
 
 from helper.load_config import load_config
 from helper.setup_mlflow import setup_mlflow
-from helper.resolve_config_path import resolve_config_path
+from helper.resolve_config_path import resolve_config_path, resolve_step_args
 from helper.get_model_config import get_model_config
-
-def register_model_if_accepted(model_key: str, config: dict, client: MlflowClient):
+from helper.batch_logger import BatchLogger
+from helper.artifact_uploader import ArtifactUploader, get_upload_config
+from helper.stage_cache import StageCache, get_stage_cache, register_components
+from helper.run_index import RunIndex, get_run_index
+from helper.incremental import version_lineage_tags
+from helper.profiling import get_profiling_config, init_profiler, get_profiler, span
+
+def register_model_if_accepted(model_key: str, config: dict, client: MlflowClient, logger: BatchLogger,
+                               uploader: ArtifactUploader, stage_cache: StageCache, run_index: RunIndex,
+                               run_id: str = None, status: str = None):
     model_cfg = get_model_config(config, model_key)
     model_name = model_cfg["model_name"]
     experiment_name = model_cfg["experiment_name"]
 
-    mlflow.set_experiment(experiment_name)
-
-    experiment = mlflow.get_experiment_by_name(experiment_name)
-    runs = client.search_runs(experiment.experiment_id, order_by=["start_time DESC"], max_results=1)
-
-    if not runs:
-        print(f"⚠️ No runs found for experiment '{experiment_name}'")
-        return
-
-    run = runs[0]
-    run_id = run.info.run_id
-    tags = run.data.tags
-    status = tags.get("evaluation_status", "").lower()
+    if not run_id:
+        # The latest run that went through validation, not just the latest run
+        run_id = run_index.latest_run(experiment_name, tags={"evaluation_status": None})
+        if not run_id:
+            print(f"⚠️ No validated runs found for experiment '{experiment_name}'")
+            return
+
+    # A status handed over by the validate step takes precedence over the run tag.
+    # The tags come from the server: validation may have re-tagged the run since it was indexed
+    with span("mlflow.get_run"):
+        tags = client.get_run(run_id).data.tags
+    run_index.update(run_id, tags=tags)
+    if not status:
+        status = tags.get("evaluation_status", "")
+    status = status.lower()
 
     if status != "accepted":
         print(f"🚫 Skipping registration for '{model_name}' – evaluation_status='{status}'")
         return
 
+    # The same accepted run is registered only once
+    components = register_components(model_cfg, run_id, status)
+    record, reason = stage_cache.check("register", model_key, components)
+    if record:
+        print(f"⏭️ '{model_name}' already registered as version {record['result']['version']} ({reason})")
+        return
+
+    # Versions updated incrementally point back to the version they were updated from
+    lineage = version_lineage_tags(tags)
     model_uri = f"runs:/{run_id}/model"
-    registered_model = mlflow.register_model(model_uri=model_uri, name=model_name)
+    with span("mlflow.register_model"):
+        registered_model = mlflow.register_model(model_uri=model_uri, name=model_name, tags=lineage or None)
 
-    # Set additional tags
-    client.set_tag(run_id, "registered_model_version", registered_model.version)
-    client.set_tag(run_id, "registered_model_name", model_name)
-    client.set_tag(run_id, "registered_stage", "None")
+    # Set additional tags (one batched request)
+    logger.set_tags(run_id, {
+        "registered_model_version": registered_model.version,
+        "registered_model_name": model_name,
+        "registered_stage": "None"
+    })
+    logger.flush(run_id)
 
-    print(f"✅ Registered model '{model_name}' as version {registered_model.version}")
+    print(f"✅ Registered model '{model_name}' as version {registered_model.version}"
+          + (f" (updated from version {lineage['parent_version']})" if "parent_version" in lineage else ""))
 
     # Save model info
     output_dir = Path(config["data"]["output_dir"])
@@ -49,23 +74,54 @@ def register_model_if_accepted(model_key: str, config: dict, client: MlflowClien
         "model_name": model_name,
         "run_id": run_id,
         "version": registered_model.version,
-        "status": "registered"
+        "status": "registered",
+        **({"lineage": lineage} if lineage else {}),
     }
 
     info_path = output_dir / f"registered_model_info_{model_name}.json"
     with open(info_path, "w") as f:
         json.dump(model_info, f, indent=2)
 
-    mlflow.log_artifact(str(info_path))
+    # Attach to the registered run (there is no active run here); uploads in the background
+    uploader.log_artifact(run_id, info_path)
+    get_profiler().log_to_run(run_id, model=model_key, client=client)
+    stage_cache.record("register", model_key, components, run_id, outputs=[info_path], result=model_info)
 
-def main():
-    config_path = resolve_config_path()
-    config = load_config(config_path)
+def register_models(config, step_args):
     setup_mlflow(config)
     client = MlflowClient()
-
-    for model_key in ["model_lr", "model_rf"]:
-        register_model_if_accepted(model_key, config, client)
+    stage_cache = get_stage_cache(config, client)
+    run_index = get_run_index(config, client)
+
+    model_keys = step_args.models or ["model_lr", "model_rf"]
+    run_id = Path(step_args.run_id_file).read_text().strip() if step_args.run_id_file else None
+    status = Path(step_args.status_file).read_text().strip() if step_args.status_file else None
+    if (run_id or status) and len(model_keys) != 1:
+        raise ValueError("--run-id-file and --status-file need exactly one model in --models")
+
+    if not run_id:
+        with span("sync_run_index"):
+            run_index.sync([get_model_config(config, key)["experiment_name"] for key in model_keys],
+                           refresh_tags=("evaluation_status",))
+
+    # Uploads are flushed (and failures raised) before the stage cache is saved
+    with BatchLogger(client, run_index=run_index) as logger, \
+            ArtifactUploader(client, get_upload_config(config)) as uploader:
+        for model_key in model_keys:
+            with span("register", model=model_key):
+                register_model_if_accepted(model_key, config, client, logger, uploader, stage_cache, run_index,
+                                           run_id, status)
+    stage_cache.save()
+
+def main(argv=None, config=None):
+    """Command-line entry; argv and an already-parsed config may be passed by a warm runner."""
+    started = time.time()
+    if config is None:
+        config = load_config(resolve_config_path(argv))
+    profiler = init_profiler(get_profiling_config(config), "register")
+    profiler.add("config_load", started, time.time())
+    register_models(config, resolve_step_args(argv))
+    profiler.report()
 
 if __name__ == "__main__":
     main()
@@ -4,6 +4,10 @@ import subprocess
 import yaml
 from helper.azure_pipeline_runner import run_azure_pipeline
 from helper.aws_pipeline_runner import run_aws_pipeline
+from helper.local_pipeline_runner import run_local_pipeline
+from helper.load_config import load_config as load_pipeline_config
+from helper.setup_mlflow import setup_mlflow
+from helper.stage_cache import get_stage_cache, plan_stages, print_plan
 
 def load_config(path):
     with open(path, 'r') as f:
@@ -12,17 +16,26 @@ def load_config(path):
 def main():
     parser = argparse.ArgumentParser()
     parser.add_argument("--config", type=str, default="config.yaml")
+    parser.add_argument("--dry-run", action="store_true", help="Report which stages would run and why, then exit")
     args = parser.parse_args()
 
     config = load_config(args.config)
+    if args.dry_run:
+        pipeline_config = load_pipeline_config(config["job"]["config_path"])
+        setup_mlflow(pipeline_config)
+        print_plan(plan_stages(pipeline_config, get_stage_cache(pipeline_config)))
+        return
+
     provider = config['platform']['provider'].lower()
 
     if provider == 'azure':
         run_azure_pipeline(config)
     elif provider == 'aws':
         run_aws_pipeline(config)
+    elif provider == 'local':
+        run_local_pipeline(config)
     else:
-        raise ValueError("Unsupported platform: use 'azure' or 'aws'")
+        raise ValueError("Unsupported platform: use 'azure', 'aws' or 'local'")
 
 if __name__ == "__main__":
     main()
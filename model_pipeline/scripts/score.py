@@ -0,0 +1,158 @@
+import argparse
+import json
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from pathlib import Path
+
+import numpy as np
+from mlflow.tracking import MlflowClient
+
+from helper.load_config import load_config
+from helper.setup_mlflow import setup_mlflow
+from helper.model_cache import get_model_cache
+from helper.train_model import get_model_schemas
+from helper.schema_validator import get_schema_validation_config, empty_report, merge_reports, summarize_report
+from helper.forest_engine import INFERENCE_ENGINES
+from helper.metrics import get_evaluation_config
+from helper.sketches import DriftMonitor, get_drift_config, handle_drift, load_run_sketch
+from helper.scoring import (
+    OUTPUT_FORMATS,
+    get_scoring_config,
+    find_model_config,
+    resolve_model_version,
+    input_format,
+    iter_input_chunks,
+    get_output_columns,
+    init_scoring_worker,
+    score_chunk,
+)
+
+
+def score(config, model, input_path, version=None, stage=None, overrides=None):
+    """
+    Score input_path with a registered model and write one output shard per chunk.
+
+    The input is read chunk by chunk and at most max_pending chunks are in flight, so
+    memory stays bounded by chunk_rows * max_pending rows whatever the input size.
+    Each worker process loads the model once. With drift enabled, workers compare the
+    chunks they score with the model's training sketch. Returns the scoring manifest.
+    """
+    scoring_cfg = {**get_scoring_config(config), **{k: v for k, v in (overrides or {}).items() if v}}
+    model_cfg = find_model_config(config, model)
+    schemas = get_model_schemas(model_cfg)
+    input_schema, output_schema = schemas
+    schema_cfg = get_schema_validation_config(config)
+    output_columns = get_output_columns(output_schema)
+    output_format = scoring_cfg["format"] or input_format(input_path)
+    max_pending = scoring_cfg["max_pending"] or 2 * scoring_cfg["workers"]
+    dtype = config["data"].get("dtype")
+    pos_label = get_evaluation_config(config)["pos_label"]
+
+    client = MlflowClient()
+    model_version = resolve_model_version(client, model_cfg["model_name"], version, stage)
+    model_cache = get_model_cache(config, client)
+    artifact_path = model_cache.inference_artifact(model_version.run_id, scoring_cfg["engine"])
+    model_path = model_cache.get_local_path(model_version.run_id, artifact_path)
+    print(f"📦 Scoring with {model_cfg['model_name']} v{model_version.version} "
+          f"(run {model_version.run_id}, {artifact_path})")
+    drift_cfg = get_drift_config(config)
+    sketch = load_run_sketch(model_cache, model_version.run_id) if drift_cfg["enabled"] else None
+    drift_monitor = DriftMonitor(sketch, drift_cfg) if sketch is not None else None
+
+    output_dir = Path(scoring_cfg["output_dir"])
+    output_dir.mkdir(parents=True, exist_ok=True)
+    for stale in output_dir.glob("part-*"):
+        stale.unlink()
+
+    shards, latencies = [], []
+    schema_reports = {"input": empty_report(), "output": empty_report()}
+    total_rows = 0
+
+    def collect(done):
+        nonlocal total_rows
+        for future in done:
+            chunk_id, shard_path, rows, seconds, reports, drift_state = future.result()
+            for key, report in reports.items():
+                merge_reports(schema_reports[key], report)
+            if drift_state is not None:
+                drift_monitor.update_state(drift_state)
+            shards.append({"chunk": chunk_id, "path": shard_path, "rows": rows})
+            latencies.append(seconds)
+            total_rows += rows
+
+    started = time.perf_counter()
+    with ProcessPoolExecutor(scoring_cfg["workers"], initializer=init_scoring_worker,
+                             initargs=(model_path, sketch, drift_cfg)) as pool:
+        pending = set()
+        for chunk_id, chunk in enumerate(iter_input_chunks(input_path, scoring_cfg["chunk_rows"])):
+            if len(pending) >= max_pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                collect(done)
+            pending.add(pool.submit(score_chunk, chunk_id, chunk, output_dir, output_columns,
+                                    output_format, dtype, schemas, schema_cfg, pos_label))
+        collect(wait(pending).done)
+    elapsed = time.perf_counter() - started
+
+    latencies = np.array(latencies) if latencies else np.zeros(1)
+    manifest = {
+        "model_name": model_cfg["model_name"],
+        "model_version": model_version.version,
+        "run_id": model_version.run_id,
+        "input": str(input_path),
+        "output_columns": output_columns,
+        "rows": total_rows,
+        "seconds": round(elapsed, 4),
+        "rows_per_second": round(total_rows / elapsed, 1) if elapsed else 0.0,
+        "chunk_latency_s": {
+            "p50": round(float(np.percentile(latencies, 50)), 4),
+            "p95": round(float(np.percentile(latencies, 95)), 4),
+            "max": round(float(latencies.max()), 4),
+        },
+        "schema_validation": {key: summarize_report(report) for key, report in schema_reports.items()},
+        "shards": sorted(shards, key=lambda s: s["chunk"]),
+    }
+    if drift_monitor is not None:
+        manifest["drift"] = drift_monitor.report()
+    with open(output_dir / "score_manifest.json", "w") as f:
+        json.dump(manifest, f, indent=2)
+
+    print(f"✅ Scored {total_rows} rows into {len(shards)} shards in {elapsed:.2f}s "
+          f"({manifest['rows_per_second']:.0f} rows/s)")
+    print(f"⏱️ Chunk latency p50={manifest['chunk_latency_s']['p50']:.3f}s "
+          f"p95={manifest['chunk_latency_s']['p95']:.3f}s max={manifest['chunk_latency_s']['max']:.3f}s")
+    invalid = schema_reports["input"]["invalid_rows"]
+    if invalid:
+        print(f"⚠️ {invalid} input rows did not match model_input_schema (see score_manifest.json)")
+    if drift_monitor is not None:
+        handle_drift(manifest["drift"], f"{model_cfg['model_name']} scoring input", drift_cfg)
+    return manifest
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--config", type=str, required=True, help="Path to job config YAML")
+    parser.add_argument("--model", type=str, required=True, help="Config name (model_lr) or registered model name")
+    parser.add_argument("--input", type=str, required=True, help="CSV or Parquet file to score")
+    group = parser.add_mutually_exclusive_group()
+    group.add_argument("--version", type=str, help="Registered model version (default: latest)")
+    group.add_argument("--stage", type=str, help="Registered model stage, e.g. Production")
+    parser.add_argument("--output-dir", type=str, help="Directory for output shards (default: scoring.output_dir)")
+    parser.add_argument("--format", choices=OUTPUT_FORMATS, help="Output shard format (default: input format)")
+    parser.add_argument("--chunk-rows", type=int, help="Rows per chunk (default: scoring.chunk_rows)")
+    parser.add_argument("--workers", type=int, help="Worker processes (default: scoring.workers)")
+    parser.add_argument("--engine", choices=INFERENCE_ENGINES, help="sklearn model or compiled forest engine (default: scoring.engine)")
+    args = parser.parse_args()
+
+    config = load_config(args.config)
+    setup_mlflow(config)
+    score(config, args.model, args.input, args.version, args.stage, {
+        "output_dir": args.output_dir,
+        "format": args.format,
+        "chunk_rows": args.chunk_rows,
+        "workers": args.workers,
+        "engine": args.engine,
+    })
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,225 @@
+import argparse
+import asyncio
+import json
+from urllib.parse import urlsplit
+
+import pandas as pd
+from mlflow.tracking import MlflowClient
+
+from helper.load_config import load_config
+from helper.setup_mlflow import setup_mlflow
+from helper.model_cache import get_model_cache
+from helper.train_model import get_model_schemas
+from helper.scoring import find_model_config, resolve_model_version
+from helper.micro_batcher import MicroBatcher
+from helper.forest_engine import INFERENCE_ENGINES
+from helper.schema_validator import compile_schema, is_valid, describe_report
+
+HTTP_REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed", 500: "Internal Server Error"}
+
+
+def get_serving_config(config):
+    """Settings for the online inference server from config["serving"]."""
+    return {
+        "host": "127.0.0.1",
+        "port": 8080,
+        "max_batch_size": 64,
+        "max_delay_ms": 5.0,
+        "engine": "sklearn",
+        "models": [{"model": model_cfg["name"]} for model_cfg in config.get("models", [])],
+        **config.get("serving", {}),
+    }
+
+
+class InferenceServer:
+    """
+    Serves one micro-batched endpoint per registered model version.
+
+        GET  /health
+        GET  /metrics                      latency percentiles and batch-size histograms
+        POST /predict/<model>[/<version>]  {"inputs": [{...}, ...]} -> {"predictions": [...]}
+
+    <model> is the config name or registered model name; without a version the first
+    configured version of that model is used.
+    """
+
+    def __init__(self, config, serving_cfg):
+        self.config = config
+        self.serving_cfg = serving_cfg
+        self.endpoints = {}
+        self.default_versions = {}
+        self.aliases = {}
+
+    def load_models(self, client: MlflowClient = None):
+        client = client or MlflowClient()
+        model_cache = get_model_cache(self.config, client)
+        dtype = self.config["data"].get("dtype")
+        for spec in self.serving_cfg["models"]:
+            model_cfg = find_model_config(self.config, spec["model"])
+            model_name = model_cfg["model_name"]
+            model_version = resolve_model_version(client, model_name, spec.get("version"), spec.get("stage"))
+            artifact_path = model_cache.inference_artifact(model_version.run_id, spec.get("engine", self.serving_cfg["engine"]))
+            model = model_cache.load(model_version.run_id, artifact_path)
+            input_schema, _ = get_model_schemas(model_cfg)
+            feature_names = getattr(model, "feature_names_in_", None)
+
+            self.endpoints[(model_name, str(model_version.version))] = {
+                "model": model,
+                "validator": compile_schema(input_schema),
+                "columns": list(feature_names) if feature_names is not None else input_schema.get("required"),
+                "dtype": dtype,
+                "batcher": MicroBatcher(
+                    model.predict,
+                    spec.get("max_batch_size", self.serving_cfg["max_batch_size"]),
+                    spec.get("max_delay_ms", self.serving_cfg["max_delay_ms"]),
+                ),
+            }
+            self.default_versions.setdefault(model_name, str(model_version.version))
+            self.aliases[model_cfg["name"]] = model_name
+            print(f"📦 Serving {model_name} v{model_version.version} (run {model_version.run_id}, {artifact_path})")
+
+    def start(self):
+        for endpoint in self.endpoints.values():
+            endpoint["batcher"].start()
+
+    async def stop(self):
+        for endpoint in self.endpoints.values():
+            await endpoint["batcher"].stop()
+
+    def metrics(self):
+        return {f"{name}/{version}": endpoint["batcher"].stats.summary()
+                for (name, version), endpoint in self.endpoints.items()}
+
+    async def predict(self, parts, body):
+        model_name = self.aliases.get(parts[0], parts[0])
+        version = parts[1] if len(parts) > 1 else self.default_versions.get(model_name)
+        endpoint = self.endpoints.get((model_name, version))
+        if endpoint is None:
+            return 404, {"error": f"Model '{'/'.join(parts)}' is not served"}
+
+        try:
+            payload = json.loads(body or b"null")
+        except ValueError:
+            return 400, {"error": "Request body is not valid JSON"}
+        records = payload.get("inputs") if isinstance(payload, dict) and "inputs" in payload else payload
+        if isinstance(records, dict):
+            records = [records]
+        if not isinstance(records, list) or not records or not all(isinstance(r, dict) for r in records):
+            return 400, {"error": "Expected {'inputs': [{...}, ...]}"}
+
+        rows = pd.DataFrame.from_records(records)
+        report = endpoint["validator"].validate(rows)
+        if not is_valid(report):
+            return 400, {"error": "Input does not match model_input_schema", "details": describe_report(report)}
+
+        missing = [c for c in endpoint["columns"] if c not in rows.columns]
+        if missing:
+            return 400, {"error": f"Inputs must provide every model feature: {endpoint['columns']}"}
+        # The schema only type-checks the columns it declares; every feature must be numeric
+        raw = rows[endpoint["columns"]]
+        rows = raw.apply(pd.to_numeric, errors="coerce")
+        not_numeric = [c for c in endpoint["columns"] if (rows[c].isna() & raw[c].notna()).any()]
+        if not_numeric:
+            return 400, {"error": f"Feature values must be numeric: {not_numeric}"}
+        if rows.isna().any(axis=None):
+            return 400, {"error": f"Inputs must provide every model feature: {endpoint['columns']}"}
+        if endpoint["dtype"]:
+            rows = rows.astype(endpoint["dtype"])
+
+        predictions = await endpoint["batcher"].predict(rows)
+        return 200, {"model": model_name, "version": version, "predictions": predictions.tolist()}
+
+    async def dispatch(self, method, target, body):
+        parts = [p for p in urlsplit(target).path.split("/") if p]
+        if method == "GET" and parts == ["health"]:
+            return 200, {"status": "ok", "models": [f"{n}/{v}" for n, v in self.endpoints]}
+        if method == "GET" and parts == ["metrics"]:
+            return 200, self.metrics()
+        if parts[:1] == ["predict"] and len(parts) in (2, 3):
+            if method != "POST":
+                return 405, {"error": "Use POST for predictions"}
+            return await self.predict(parts[1:], body)
+        return 404, {"error": f"No route for {method} {target}"}
+
+    async def handle_connection(self, reader, writer):
+        """Minimal HTTP/1.1 with keep-alive: one JSON request and response at a time per connection."""
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line.strip():
+                    break
+                method, target, _ = request_line.decode("latin-1").split(" ", 2)
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    key, _, value = line.decode("latin-1").partition(":")
+                    headers[key.strip().lower()] = value.strip()
+                body = await reader.readexactly(int(headers.get("content-length", 0)))
+
+                try:
+                    status, payload = await self.dispatch(method, target, body)
+                except Exception as exc:
+                    status, payload = 500, {"error": str(exc)}
+
+                data = json.dumps(payload).encode()
+                keep_alive = headers.get("connection", "").lower() != "close"
+                writer.write(
+                    f"HTTP/1.1 {status} {HTTP_REASONS[status]}\r\n"
+                    f"Content-Type: application/json\r\nContent-Length: {len(data)}\r\n"
+                    f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode() + data
+                )
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+
+async def serve(config, serving_cfg):
+    server = InferenceServer(config, serving_cfg)
+    server.load_models()
+    server.start()
+    listener = await asyncio.start_server(server.handle_connection, serving_cfg["host"], serving_cfg["port"])
+    print(f"🚀 Listening on http://{serving_cfg['host']}:{serving_cfg['port']} "
+          f"(max_batch_size={serving_cfg['max_batch_size']}, max_delay_ms={serving_cfg['max_delay_ms']})")
+    try:
+        async with listener:
+            await listener.serve_forever()
+    finally:
+        await server.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--config", type=str, required=True, help="Path to job config YAML")
+    parser.add_argument("--host", type=str, help="Bind address (default: serving.host)")
+    parser.add_argument("--port", type=int, help="Port (default: serving.port)")
+    parser.add_argument("--max-batch-size", type=int, help="Rows per micro-batch; 1 disables batching")
+    parser.add_argument("--max-delay-ms", type=float, help="Longest wait for a micro-batch to fill")
+    parser.add_argument("--engine", choices=INFERENCE_ENGINES, help="sklearn model or compiled forest engine (default: serving.engine)")
+    args = parser.parse_args()
+
+    config = load_config(args.config)
+    setup_mlflow(config)
+    serving_cfg = get_serving_config(config)
+    overrides = {"host": args.host, "port": args.port,
+                 "max_batch_size": args.max_batch_size, "max_delay_ms": args.max_delay_ms, "engine": args.engine}
+    serving_cfg.update({k: v for k, v in overrides.items() if v is not None})
+    # Command-line batching limits and engine apply to every served model
+    overridden = [k for k in ("max_batch_size", "max_delay_ms", "engine") if overrides[k] is not None]
+    if overridden:
+        serving_cfg["models"] = [{k: v for k, v in spec.items() if k not in overridden}
+                                 for spec in serving_cfg["models"]]
+
+    try:
+        asyncio.run(serve(config, serving_cfg))
+    except KeyboardInterrupt:
+        print("👋 Server stopped")
+
+
+if __name__ == "__main__":
+    main()
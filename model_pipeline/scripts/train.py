@@ -0,0 +1,118 @@
+import argparse
+import os
+import time
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from helper.load_config import load_config
+from helper.setup_mlflow import setup_mlflow
+from helper.get_model_config import get_model_config
+from helper.model_registry import get_model_entry
+from helper.data_loader import load_training_data
+from helper.split_manifest import get_or_create_split, load_split_manifest
+from helper.train_model import train_model
+from helper.stage_cache import get_stage_cache, train_components
+from helper.profiling import get_profiling_config, init_profiler, get_profiler, span
+
+
+def _train_worker(config, model_cfg, split_path, workers):
+    """
+    Train one model in a worker process and log it to its own MLflow run; returns (run_id, metrics, spans).
+
+    workers is the size of the pool, so a hyperparameter search takes its share of the cores.
+    """
+    init_profiler(get_profiling_config(config), "train")
+    setup_mlflow(config)
+    # The dataset cache is already built, so this only maps the shared pages again.
+    with span("load_data", model=model_cfg["name"]):
+        X, y = load_training_data(config)
+        split = load_split_manifest(split_path)
+    run_id, metrics = train_model(config, model_cfg, X, y, split, split_path, workers)
+    return run_id, metrics, get_profiler().drain()
+
+
+def train_all_models(config, model_names=None, max_workers=None):
+    """
+    Train every model in config["models"] (or just model_names) concurrently.
+
+    The dataset cache and split manifest are prepared once in the parent; each worker
+    memory-maps the same cache files, so the data is shared through the page cache
+    rather than copied per model. Models whose training fingerprint is unchanged
+    (see helper.stage_cache) reuse their earlier run. Returns {model name: (run_id, metrics)}.
+    """
+    if model_names:
+        model_cfgs = [get_model_config(config, name) for name in model_names]
+    else:
+        model_cfgs = config.get("models", [])
+    for model_cfg in model_cfgs:
+        get_model_entry(model_cfg)  # fail fast on unknown model types
+
+    with span("load_data"):
+        X, _ = load_training_data(config)
+    with span("split"):
+        _, split_path = get_or_create_split(config, len(X))
+    del X
+
+    setup_mlflow(config)
+    stage_cache = get_stage_cache(config)
+    results, pending, components = {}, [], {}
+    for model_cfg in model_cfgs:
+        name = model_cfg["name"]
+        components[name] = train_components(config, model_cfg)
+        record, reason = stage_cache.check("train", name, components[name])
+        if record:
+            results[name] = (record["run_id"], record["result"])
+            print(f"⏭️ Skipping training of {name} ({reason}), reusing run {record['run_id']}")
+        else:
+            pending.append(model_cfg)
+            print(f"▶️ Training {name}: {reason}")
+    if not pending:
+        return results
+
+    max_workers = max_workers or min(len(pending), os.cpu_count() or 1)
+    print(f"🚀 Training {len(pending)} models with {max_workers} workers")
+
+    output_dir = Path(config["data"]["output_dir"])
+    with ProcessPoolExecutor(max_workers=max_workers) as pool:
+        futures = {
+            pool.submit(_train_worker, config, model_cfg, split_path, max_workers): model_cfg
+            for model_cfg in pending
+        }
+        for future in as_completed(futures):
+            model_cfg = futures[future]
+            name = model_cfg["name"]
+            run_id, metrics, spans = future.result()
+            get_profiler().extend(spans)
+            results[name] = (run_id, metrics)
+            suffix = get_model_entry(model_cfg)["suffix"]
+            stage_cache.record("train", name, components[name], run_id,
+                               outputs=[output_dir / f"run_id_{suffix}.txt"], result=metrics)
+            stage_cache.save()
+            print(f"✅ Trained {name} in run {run_id}: {metrics}")
+    return results
+
+
+def main(argv=None, config=None):
+    """Command-line entry; argv and an already-parsed config may be passed by a warm runner."""
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--config", type=str, required=True, help="Path to job config YAML")
+    parser.add_argument("--models", nargs="*", help="Model names to train (default: all in config)")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: one per model, up to CPU count)")
+    parser.add_argument("--run-id-file", type=str, help="Write the run id here (pipeline steps training one model)")
+    args = parser.parse_args(argv)
+    if args.run_id_file and len(args.models or []) != 1:
+        parser.error("--run-id-file needs exactly one model in --models")
+
+    started = time.time()
+    config = config or load_config(args.config)
+    profiler = init_profiler(get_profiling_config(config), "train")
+    profiler.add("config_load", started, time.time())
+    results = train_all_models(config, args.models, args.workers)
+    if args.run_id_file:
+        Path(args.run_id_file).parent.mkdir(parents=True, exist_ok=True)
+        Path(args.run_id_file).write_text(results[args.models[0]][0])
+    profiler.report()
+
+
+if __name__ == "__main__":
+    main()
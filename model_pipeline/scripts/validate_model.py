@@ -1,22 +1,54 @@
 import sys
 import os
+import time
+import multiprocessing
 import mlflow
 import pandas as pd
 from pathlib import Path
-from sklearn.metrics import accuracy_score, f1_score, precision_score, recall_score
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
 import json
 from helper.load_config import load_config
 from helper.setup_mlflow import setup_mlflow
-from helper.resolve_config_path import resolve_config_path
+from helper.resolve_config_path import resolve_config_path, resolve_step_args
+from helper.get_model_config import get_model_config
+from helper.cross_validation import get_cv_config
+from helper.split_manifest import (
+    SPLIT_DIGEST_TAG,
+    SPLIT_MANIFEST_FILE,
+    check_manifest_dataset,
+    load_holdout,
+    load_split_manifest,
+    manifest_digest,
+)
+from helper.data_loader import load_training_data
+from helper.streaming import get_training_config, accumulate_streaming
+from helper.metrics import (
+    METRIC_NAMES,
+    get_evaluation_config,
+    evaluate_predictions,
+    gate_metrics,
+    get_metrics_thresholds,
+    predict_with_scores,
+    summarize_confusion,
+)
+from helper.batch_logger import BatchLogger
+from helper.artifact_uploader import ArtifactUploader, get_upload_config
+from helper.model_cache import get_model_cache
+from helper.stage_cache import get_stage_cache, validate_components
+from helper.run_index import get_run_index
+from helper.sketches import DriftMonitor, get_drift_config, handle_drift, load_run_sketch
+from helper.profiling import get_profiling_config, init_profiler, get_profiler, span
+from helper.train_model import get_model_schemas
+from helper.schema_validator import (
+    get_schema_validation_config,
+    compile_schema,
+    validate_chunked,
+    handle_report,
+    summarize_report,
+)
 
-# Evaluate model metrics
-def evaluate_metrics(y_true, y_pred):
-    return {
-        "accuracy": accuracy_score(y_true, y_pred),
-        "precision": precision_score(y_true, y_pred, zero_division=0),
-        "recall": recall_score(y_true, y_pred, zero_division=0),
-        "f1_score": f1_score(y_true, y_pred, zero_division=0)
-    }
+# Created once per cpu_pool process by init_validation_worker
+_worker_model_cache = None
 
 # Compare against thresholds
 def is_acceptable(actual, expected):
@@ -26,95 +58,346 @@ def save_json(path, obj):
     with open(path, "w") as f:
         json.dump(obj, f, indent=2)
 
-def log_json_artifact(client, run_id, path):
+def log_json_artifact(uploader, run_id, path):
     if os.path.exists(path):
-        client.log_artifact(run_id, local_path=path)
-        print(f"📁 Logged artifact: {path}")
+        uploader.log_artifact(run_id, path)
+        print(f"📁 Queued artifact: {path}")
 
-def evaluate_all_models():
-    config_path = resolve_config_path()
-    print(f"Using config path: {config_path}")
-    config = load_config(config_path)
-    setup_mlflow(config)
+def load_run_split(client, model_cache, run_index, run_id, output_dir):
+    """
+    Load the split manifest a run was trained with. The local copy in the output
+    directory is used only when its digest matches the one tagged on the run (a later
+    resplit rewrites it); otherwise the run's manifest artifact comes through the model cache.
+    """
+    local_path = output_dir / SPLIT_MANIFEST_FILE
+    tags = run_index.get_tags(run_id)
+    if SPLIT_DIGEST_TAG not in tags:
+        with span("mlflow.get_run"):
+            tags = client.get_run(run_id).data.tags
+    if local_path.exists() and tags.get(SPLIT_DIGEST_TAG) == manifest_digest(local_path):
+        return load_split_manifest(local_path)
+    return load_split_manifest(model_cache.get_local_path(run_id, SPLIT_MANIFEST_FILE))
 
-    output_dir = Path(config.get("OUTPUT_DIR", config['data']['output_dir']))
-    output_dir.mkdir(parents=True, exist_ok=True)
+def load_cv_summary(client, run_index, run_id):
+    """Cross-validation means/stds the training run logged, or None if it was trained without CV."""
+    metrics = run_index.get_metrics(run_id)
+    if "cv_f1_score_mean" not in metrics:
+        with span("mlflow.get_run"):
+            metrics = client.get_run(run_id).data.metrics
+    if "cv_f1_score_mean" not in metrics:
+        return None
+    return {stat: {m: metrics[f"cv_{m}_{stat}"] for m in METRIC_NAMES} for stat in ("mean", "std")}
 
-    # Load test data
-    X_test = pd.read_csv(output_dir / "X_test.csv")
-    y_test = pd.read_csv(output_dir / "y_test.csv")
+def get_validation_config(config):
+    """
+    Concurrency settings from config["validation"].
 
-    client = mlflow.tracking.MlflowClient()
-    for model_cfg in config.get("models", []):
-        print(config.get("models"))
-        exp = mlflow.get_experiment_by_name(model_cfg["experiment_name"])
-        if not exp:
-            print(f"⚠️ Experiment not found: {model_cfg['experiment_name']}")
-            continue
-
-        runs = client.search_runs(exp.experiment_id, order_by=["start_time DESC"], max_results=1)
-        if not runs:
-            print(f"⚠️ No runs found for {model_cfg['name']}")
-            continue
-
-        run_id = runs[0].info.run_id
-        model_uri = f"runs:/{run_id}/model"
-        print(model_uri)
-        model = mlflow.sklearn.load_model(model_uri)
-        y_pred = model.predict(X_test)
-
-        # Compute and evaluate metrics
-        actual_metrics = evaluate_metrics(y_test, y_pred)
-        expected_metrics = model_cfg.get("metrics_threshold", {})
-        accepted = is_acceptable(actual_metrics, expected_metrics)
-
-        # Log metrics and artifacts back to the same run
+    io_workers threads run MLflow lookups, downloads and uploads; cpu_workers
+    processes run prediction and metrics (0 evaluates inside the I/O thread).
+    """
+    n_models = max(len(config.get("models", [])), 1)
+    return {
+        "io_workers": n_models,
+        "cpu_workers": min(n_models, os.cpu_count() or 1),
+        **config.get("validation", {}),
+    }
+
+def find_latest_run(run_index, model_cfg):
+    run_id = run_index.latest_run(model_cfg["experiment_name"])
+    if not run_id:
+        print(f"⚠️ No runs found for {model_cfg['name']}")
+    return run_id
+
+def _drift_summary(drift_monitor, name, drift_cfg):
+    report = drift_monitor.report()
+    handle_drift(report, f"{name} holdout", drift_cfg)
+    return report
+
+def compute_evaluation(config, model_cfg, model_cache, run_id, model_path, split, eval_cfg, sketch=None):
+    """
+    CPU-bound part of validation: load the model, predict on the holdout and compute metrics.
+
+    The model is loaded through model_cache from model_path, the run's downloaded copy.
+    With the run's training sketch, the holdout chunks are also checked for drift.
+    """
+    name = model_cfg["name"]
+    with span("load_model", model=name):
+        model = model_cache.load(run_id, "model", local_path=model_path)
+    training_cfg = get_training_config(model_cfg)
+    schema_cfg = get_schema_validation_config(config)
+    drift_cfg = get_drift_config(config)
+    drift_monitor = DriftMonitor(sketch, drift_cfg) if sketch is not None else None
+    input_schema, output_schema = get_model_schemas(model_cfg)
+
+    # Compute metrics, bootstrap intervals and threshold sweep from one confusion matrix
+    if training_cfg["mode"] == "streaming":
+        # Accumulate counts chunk by chunk; the holdout is never fully materialised
+        check_manifest_dataset(config, split)
+        with span("load_data", model=name):
+            X, y = load_training_data(config)
+        with span("schema_check.input", model=name):
+            input_report = validate_chunked(compile_schema(input_schema), X, training_cfg["chunk_rows"], split["test_idx"])
+        handle_report(input_report, f"{model_cfg['name']} holdout", schema_cfg)
+        with span("predict", model=name, mode="streaming"):
+            cm, labels, histograms = accumulate_streaming(
+                model, X, y, split["test_idx"], training_cfg["chunk_rows"],
+                eval_cfg["pos_label"], eval_cfg["sweep_bins"], drift_monitor
+            )
+        with span("metrics", model=name):
+            evaluation = summarize_confusion(cm, labels, eval_cfg, histograms)
+        evaluation["schema_validation"] = {"input": summarize_report(input_report)}
+        if drift_monitor is not None:
+            evaluation["drift"] = _drift_summary(drift_monitor, name, drift_cfg)
+        return evaluation
+
+    with span("load_data", model=name):
+        X_test, y_test = load_holdout(config, split)
+    with span("schema_check.input", model=name):
+        input_report = compile_schema(input_schema).validate(X_test)
+    handle_report(input_report, f"{model_cfg['name']} holdout", schema_cfg)
+    with span("predict", model=name, rows=len(X_test)):
+        y_pred, y_score = predict_with_scores(model, X_test, eval_cfg["pos_label"])
+    outputs = pd.DataFrame({"prediction": y_pred})
+    if y_score is not None:
+        outputs["probability"] = y_score
+    with span("schema_check.output", model=name):
+        output_report = compile_schema(output_schema).validate(outputs)
+    handle_report(output_report, f"{model_cfg['name']} predictions", schema_cfg)
+
+    with span("metrics", model=name):
+        evaluation = evaluate_predictions(y_test, y_pred, y_score, eval_cfg, getattr(model, "classes_", None))
+    evaluation["schema_validation"] = {"input": summarize_report(input_report),
+                                       "output": summarize_report(output_report)}
+    if drift_monitor is not None:
+        with span("drift", model=name):
+            for start in range(0, len(X_test), training_cfg["chunk_rows"]):
+                drift_monitor.update(X_test.iloc[start:start + training_cfg["chunk_rows"]])
+        evaluation["drift"] = _drift_summary(drift_monitor, name, drift_cfg)
+    return evaluation
+
+def init_validation_worker(config):
+    global _worker_model_cache
+    _worker_model_cache = get_model_cache(config)
+
+def _evaluate_in_worker(profiling_cfg, config, model_cfg, *args):
+    """
+    compute_evaluation in a cpu_pool process with that process's model cache; its spans
+    and cache lookups are returned to the parent's profiler and model cache.
+    """
+    init_profiler(profiling_cfg, "validate")
+    stats = dict(_worker_model_cache.stats)
+    evaluation = compute_evaluation(config, model_cfg, _worker_model_cache, *args)
+    stats = {stat: count - stats[stat] for stat, count in _worker_model_cache.stats.items()}
+    return evaluation, get_profiler().drain(), stats
+
+def validate_model(model_cfg, config, client, model_cache, cpu_pool, eval_cfg, output_dir, stage_cache, run_index,
+                   uploader, run_id=None):
+    """
+    Validate the latest run of one model (or the given run) and log the result back to it.
+
+    Runs in an I/O thread; the CPU-bound evaluation is handed to cpu_pool when given.
+    Artifact files are queued on uploader and upload in the background.
+    Returns a summary dict, or None when there is no run to validate. When the run and
+    everything else the validation reads are unchanged, the earlier result is returned.
+    """
+    timings = {}
+    name = model_cfg["name"]
+    started = time.perf_counter()
+    with span("lookup", model=name):
+        run_id = run_id or find_latest_run(run_index, model_cfg)
+    if not run_id:
+        return None
+    timings["lookup_s"] = time.perf_counter() - started
+
+    if eval_cfg["gate_on"] == "cv_mean" and not get_cv_config(model_cfg)["enabled"]:
+        raise ValueError(f"evaluation.gate_on is 'cv_mean' but '{name}' is trained without cross_validation; "
+                         f"enable its cross_validation block or gate on 'point' or 'lower_bound'")
+
+    components = validate_components(config, model_cfg, run_id)
+    record, reason = stage_cache.check("validate", model_cfg["name"], components)
+    if record:
+        print(f"⏭️ Skipping validation of {model_cfg['name']} ({reason})")
+        return {**record["result"], "skipped": True, "round_trips_saved": 0}
+    print(f"▶️ Validating {model_cfg['name']}: {reason}")
+
+    started = time.perf_counter()
+    with span("download", model=name):
+        model_path = model_cache.get_local_path(run_id)
+        split = load_run_split(client, model_cache, run_index, run_id, output_dir)
+        sketch = load_run_sketch(model_cache, run_id) if get_drift_config(config)["enabled"] else None
+    timings["download_s"] = time.perf_counter() - started
+
+    # Files that do not depend on the evaluation upload while it runs
+    expected_metrics = get_metrics_thresholds(config, model_cfg)
+    thresholds_path = output_dir / f"{model_cfg['name']}_thresholds.json"
+    save_json(thresholds_path, expected_metrics)
+    log_json_artifact(uploader, run_id, thresholds_path)
+
+    # Optional: input/output schema logging (from config)
+    if "model_input_schema" in model_cfg:
+        input_schema_path = output_dir / f"{model_cfg['name']}_input_schema.json"
+        save_json(input_schema_path, model_cfg["model_input_schema"])
+        log_json_artifact(uploader, run_id, input_schema_path)
+
+    if "model_output_schema" in model_cfg:
+        output_schema_path = output_dir / f"{model_cfg['name']}_output_schema.json"
+        save_json(output_schema_path, model_cfg["model_output_schema"])
+        log_json_artifact(uploader, run_id, output_schema_path)
+
+    started = time.perf_counter()
+    with span("evaluate", model=name):
+        if cpu_pool:
+            evaluation, spans, stats = cpu_pool.submit(_evaluate_in_worker, get_profiling_config(config), config,
+                                                       model_cfg, run_id, model_path, split, eval_cfg, sketch).result()
+            get_profiler().extend(spans)
+            model_cache.add_stats(stats)
+        else:
+            evaluation = compute_evaluation(config, model_cfg, model_cache, run_id, model_path, split, eval_cfg, sketch)
+    timings["evaluate_s"] = time.perf_counter() - started
+
+    if eval_cfg["gate_on"] == "cv_mean":
+        with span("lookup", model=name):
+            cv_summary = load_cv_summary(client, run_index, run_id)
+        if not cv_summary:
+            raise ValueError(f"Run {run_id} of '{name}' has no cross-validation metrics to gate on "
+                             f"(gate_on: cv_mean); retrain it with cross_validation enabled")
+        evaluation["cv"] = cv_summary
+
+    # Gate on point estimates, lower confidence bounds or CV means (evaluation.gate_on)
+    actual_metrics = evaluation["metrics"]
+    accepted = is_acceptable(gate_metrics(evaluation, eval_cfg), expected_metrics)
+
+    started = time.perf_counter()
+    with span("upload", model=name):
+        # Log metrics and acceptance decision back to the training run (sent as one batch)
         print(f"🔁 Logging evaluation into run: {run_id}")
-        for key, val in actual_metrics.items():
-            client.log_metric(run_id, key, val)
+        logger = BatchLogger(client, verbose=False, run_index=run_index)
+        logger.log_metrics(run_id, actual_metrics)
+        for key, bounds in evaluation["intervals"].items():
+            logger.log_metrics(run_id, {f"{key}_ci_lower": bounds["lower"], f"{key}_ci_upper": bounds["upper"]})
+        if "best_threshold" in evaluation:
+            logger.log_metric(run_id, "best_threshold", evaluation["best_threshold"]["threshold"])
+        if "drift" in evaluation:
+            drift = evaluation["drift"]
+            logger.log_metrics(run_id, {"drift_max_psi": drift["max_psi"], "drift_max_ks": drift["max_ks"],
+                                        "drift_features": len(drift["drifted_features"])})
+        logger.set_tags(run_id, {
+            "evaluation_status": "accepted" if accepted else "rejected",
+            "evaluated_model": model_cfg["name"]
+        })
+        logger.flush(run_id)
+    # Covers the metrics batch; artifact files upload in the background
+    timings["upload_s"] = time.perf_counter() - started
 
-        # Log acceptance decision
-        client.set_tag(run_id, "evaluation_status", "accepted" if accepted else "rejected")
-        client.set_tag(run_id, "evaluated_model", model_cfg["name"])
+    # Log evaluation JSON artifact
+    eval_json = {
+        "model_name": model_cfg["name"],
+        "evaluated_run_id": run_id,
+        "accepted": accepted,
+        "actual_metrics": actual_metrics,
+        "expected_thresholds": expected_metrics,
+        "gate_on": eval_cfg["gate_on"],
+        "timings": {k: round(v, 4) for k, v in timings.items()},
+        **{k: v for k, v in evaluation.items() if k != "metrics"}
+    }
+    eval_path = output_dir / f"{model_cfg['name']}_evaluation_result.json"
+    save_json(eval_path, eval_json)
+    log_json_artifact(uploader, run_id, eval_path)
+    get_profiler().log_to_run(run_id, model=name, client=client)
 
-        # Log evaluation JSON artifact
-        eval_json = {
-            "model_name": model_cfg["name"],
-            "evaluated_run_id": run_id,
-            "accepted": accepted,
-            "actual_metrics": actual_metrics,
-            "expected_thresholds": config["metrics_threshold"]
-        }
+    print(f"✅ Model {model_cfg['name']} evaluation logged under run {run_id} — {'ACCEPTED' if accepted else 'REJECTED'}")
+    return {
+        "model_name": model_cfg["name"],
+        "run_id": run_id,
+        "accepted": accepted,
+        "timings": timings,
+        "round_trips_saved": logger.round_trips_saved,
+        "components": components,
+        "outputs": [str(eval_path)],
+    }
 
-        eval_path = output_dir / f"{model_cfg['name']}_evaluation_result.json"
-        save_json(eval_path, eval_json)
+def evaluate_all_models(config, step_args):
+    setup_mlflow(config)
 
-        thresholds_path = output_dir / f"{model_cfg['name']}_thresholds.json"
-        save_json(thresholds_path, expected_metrics)
+    output_dir = Path(config.get("OUTPUT_DIR", config['data']['output_dir']))
+    output_dir.mkdir(parents=True, exist_ok=True)
 
-        # Optional: input/output schema logging (from config)
-        if "model_input_schema" in model_cfg:
-            input_schema_path = output_dir / f"{model_cfg['name']}_input_schema.json"
-            save_json(input_schema_path, model_cfg["model_input_schema"])
-            log_json_artifact(client, run_id, input_schema_path)
+    eval_cfg = get_evaluation_config(config)
+    validation_cfg = get_validation_config(config)
+    if step_args.models:
+        model_cfgs = [get_model_config(config, name) for name in step_args.models]
+    else:
+        model_cfgs = config.get("models", [])
+    run_id = None
+    if step_args.run_id_file:
+        if len(model_cfgs) != 1:
+            raise ValueError("--run-id-file needs exactly one model in --models")
+        run_id = Path(step_args.run_id_file).read_text().strip()
+
+    client = mlflow.tracking.MlflowClient()
+    uploader = ArtifactUploader(client, get_upload_config(config), verbose=False)
+    model_cache = get_model_cache(config, client)
+    stage_cache = get_stage_cache(config, client)
+    run_index = get_run_index(config, client)
+    if run_id is None:
+        # One search for all models; the latest run of each is then a local lookup
+        with span("sync_run_index"):
+            run_index.sync([model_cfg["experiment_name"] for model_cfg in model_cfgs])
 
-        if "model_output_schema" in model_cfg:
-            output_schema_path = output_dir / f"{model_cfg['name']}_output_schema.json"
-            save_json(output_schema_path, model_cfg["model_output_schema"])
-            log_json_artifact(client, run_id, output_schema_path)
+    # Spawned (not forked) workers: the I/O threads are already running when they start
+    cpu_pool = None
+    if validation_cfg["cpu_workers"]:
+        cpu_pool = ProcessPoolExecutor(validation_cfg["cpu_workers"], mp_context=multiprocessing.get_context("spawn"),
+                                       initializer=init_validation_worker, initargs=(config,))
+    try:
+        # Every artifact is uploaded before any validation is recorded in the stage cache
+        with uploader, ThreadPoolExecutor(validation_cfg["io_workers"]) as io_pool:
+            futures = [
+                io_pool.submit(validate_model, model_cfg, config, client, model_cache, cpu_pool, eval_cfg,
+                               output_dir, stage_cache, run_index, uploader, run_id)
+                for model_cfg in model_cfgs
+            ]
+            # Collected in config order so the summary is deterministic
+            results = [future.result() for future in futures]
+    finally:
+        if cpu_pool:
+            cpu_pool.shutdown()
 
-        # Log all JSON artifacts to original training run
-        log_json_artifact(client, run_id, eval_path)
-        log_json_artifact(client, run_id, thresholds_path)
+    # Stage cache is written from this thread only
+    for result in results:
+        if result and not result.get("skipped"):
+            summary = {k: result[k] for k in ("model_name", "run_id", "accepted", "timings")}
+            stage_cache.record("validate", result["model_name"], result["components"], result["run_id"],
+                               outputs=result["outputs"], result=summary)
+    stage_cache.save()
 
-        # Log metrics & tags back to training run
-        for key, val in actual_metrics.items():
-            client.log_metric(run_id, key, val)
+    print("📊 Validation summary:")
+    for result in filter(None, results):
+        timing = "reused earlier result" if result.get("skipped") else \
+            ", ".join(f"{k}={v:.2f}" for k, v in result["timings"].items())
+        print(f"   {result['model_name']}: {'ACCEPTED' if result['accepted'] else 'REJECTED'} ({timing})")
+    if step_args.status_file:
+        # One model per pipeline step: its status gates the register step
+        status = "accepted" if results[0] and results[0]["accepted"] else "rejected"
+        Path(step_args.status_file).parent.mkdir(parents=True, exist_ok=True)
+        Path(step_args.status_file).write_text(status)
 
-        client.set_tag(run_id, "evaluation_status", "accepted" if accepted else "rejected")
-        client.set_tag(run_id, "evaluated_model", model_cfg["name"])
+    saved = sum(r["round_trips_saved"] for r in results if r)
+    print(f"📉 Batched MLflow logging saved {saved} round trips")
+    uploader.report()
+    model_cache.report()
 
-        print(f"✅ Model {model_cfg['name']} evaluation logged under run {run_id} — {'ACCEPTED' if accepted else 'REJECTED'}")
+def main(argv=None, config=None):
+    """Command-line entry; argv and an already-parsed config may be passed by a warm runner."""
+    started = time.time()
+    if config is None:
+        config_path = resolve_config_path(argv)
+        print(f"Using config path: {config_path}")
+        config = load_config(config_path)
+    profiler = init_profiler(get_profiling_config(config), "validate")
+    profiler.add("config_load", started, time.time())
+    evaluate_all_models(config, resolve_step_args(argv))
+    profiler.report()
 
 if __name__ == "__main__":
-    evaluate_all_models()
\ No newline at end of file
+    main()
\ No newline at end of file
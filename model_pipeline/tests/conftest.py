@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# The pipeline scripts import their helpers as `helper.<module>`
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "scripts"))
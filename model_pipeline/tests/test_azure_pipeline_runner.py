@@ -0,0 +1,109 @@
+import json
+import os
+import stat
+import sys
+
+import pytest
+import yaml
+
+from helper.azure_pipeline_runner import resolve_components
+
+# Stands in for the az CLI: records each call and keeps each registered component in a JSON file
+FAKE_AZ = """#!{python}
+import json, os, sys
+args = sys.argv[1:]
+with open(os.environ["FAKE_AZ_LOG"], "a") as f:
+    f.write(json.dumps(args) + "\\n")
+registry_dir = os.environ["FAKE_AZ_REGISTRY"]
+
+def versions(name):
+    path = os.path.join(registry_dir, name + ".json")
+    return json.load(open(path)) if os.path.exists(path) else []
+
+if args[:3] == ["ml", "component", "list"]:
+    print(json.dumps(versions(args[args.index("--name") + 1])))
+elif args[:3] == ["ml", "component", "create"]:
+    import yaml
+    component = yaml.safe_load(open(args[args.index("--file") + 1]))
+    registered = versions(component["name"])
+    registered.append({{"version": str(len(registered) + 1), "hash": component["tags"]["hash"]}})
+    json.dump(registered, open(os.path.join(registry_dir, component["name"] + ".json"), "w"))
+    print(json.dumps({{"version": registered[-1]["version"]}}))
+else:
+    sys.exit("unexpected az call: " + " ".join(args))
+"""
+
+WORKSPACE = {"subscription_id": "sub", "resource_group": "rg", "workspace_name": "ws", "args": []}
+
+
+@pytest.fixture
+def az(tmp_path, monkeypatch):
+    bin_dir = tmp_path / "bin"
+    bin_dir.mkdir()
+    script = bin_dir / "az"
+    script.write_text(FAKE_AZ.format(python=sys.executable))
+    script.chmod(script.stat().st_mode | stat.S_IEXEC)
+    log = tmp_path / "az_calls.jsonl"
+    monkeypatch.setenv("PATH", f"{bin_dir}{os.pathsep}{os.environ['PATH']}")
+    monkeypatch.setenv("FAKE_AZ_LOG", str(log))
+    (tmp_path / "registry").mkdir()
+    monkeypatch.setenv("FAKE_AZ_REGISTRY", str(tmp_path / "registry"))
+
+    def calls():
+        """az calls since the last check, as (subcommand, component name or None)."""
+        if not log.exists():
+            return []
+        lines = [json.loads(line) for line in log.read_text().splitlines()]
+        log.unlink()
+        return sorted((args[2], args[args.index("--name") + 1] if "--name" in args else None) for args in lines)
+    return calls
+
+
+@pytest.fixture
+def components(tmp_path):
+    jobs_dir = tmp_path / "jobs"
+    jobs_dir.mkdir()
+    paths = []
+    for name in ("train_model", "validate_model"):
+        path = jobs_dir / f"{name}_job.yaml"
+        path.write_text(yaml.safe_dump({"name": name, "type": "command", "command": f"python {name}.py"}))
+        paths.append(path)
+    return paths
+
+
+def test_components_are_listed_once_and_created_only_when_changed(tmp_path, az, components):
+    cache_path = tmp_path / "components.json"
+    resolved = resolve_components(components, cache_path, workspace=WORKSPACE)
+    assert resolved == {"train_model": "azureml:train_model:1", "validate_model": "azureml:validate_model:1"}
+    assert az() == [("create", None), ("create", None),
+                    ("list", "train_model"), ("list", "validate_model")]
+
+    # Second run: everything comes from the cache file
+    assert resolve_components(components, cache_path, workspace=WORKSPACE) == resolved
+    assert az() == []
+
+    # Only the changed component is looked up and registered again
+    components[0].write_text(components[0].read_text() + "description: retrained\n")
+    resolved = resolve_components(components, cache_path, workspace=WORKSPACE)
+    assert resolved["train_model"] == "azureml:train_model:2"
+    assert az() == [("create", None), ("list", "train_model")]
+
+    # Without the cache file the registry's hash tags match: one list each, no create
+    cache_path.unlink()
+    assert resolve_components(components, cache_path, workspace=WORKSPACE) == resolved
+    assert az() == [("list", "train_model"), ("list", "validate_model")]
+
+
+def test_cache_is_kept_per_workspace(tmp_path, az, components):
+    cache_path = tmp_path / "components.json"
+    resolve_components(components, cache_path, workspace=WORKSPACE)
+    az()
+
+    other = {**WORKSPACE, "workspace_name": "other"}
+    resolve_components(components, cache_path, workspace=other)
+    assert [call for call, _ in az()].count("list") == 2
+
+    # Both workspaces are now served from the cache
+    resolve_components(components, cache_path, workspace=WORKSPACE)
+    resolve_components(components, cache_path, workspace=other)
+    assert az() == []
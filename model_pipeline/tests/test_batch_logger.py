@@ -0,0 +1,74 @@
+from helper.batch_logger import MAX_METRICS_PER_BATCH, MAX_PARAMS_PER_BATCH, BatchLogger
+from helper.run_index import RunIndex
+
+
+class RecordingClient:
+    def __init__(self):
+        self.batches = []
+
+    def log_batch(self, run_id, metrics=(), params=(), tags=()):
+        self.batches.append((run_id, list(metrics), list(params), list(tags)))
+
+
+def test_calls_are_buffered_until_flush_and_sent_in_one_request():
+    client = RecordingClient()
+    logger = BatchLogger(client, verbose=False)
+    logger.log_metrics("run", {"accuracy": 0.9, "f1_score": 0.8})
+    logger.log_params("run", {"C": 1.0, "solver": "lbfgs"})
+    logger.set_tags("run", {"evaluation_status": "accepted"})
+    assert client.batches == []
+
+    logger.flush()
+    assert len(client.batches) == 1
+    run_id, metrics, params, tags = client.batches[0]
+    assert run_id == "run"
+    assert {m.key: m.value for m in metrics} == {"accuracy": 0.9, "f1_score": 0.8}
+    assert {p.key: p.value for p in params} == {"C": "1.0", "solver": "lbfgs"}
+    assert {t.key: t.value for t in tags} == {"evaluation_status": "accepted"}
+    assert logger.calls_requested == 5 and logger.requests_sent == 1 and logger.round_trips_saved == 4
+
+
+def test_repeated_writes_keep_the_last_value_per_key_and_step():
+    client = RecordingClient()
+    with BatchLogger(client, verbose=False) as logger:
+        logger.log_metric("run", "loss", 1.0)
+        logger.log_metric("run", "loss", 0.5)
+        logger.log_metric("run", "loss", 0.7, step=1)
+        logger.set_tag("run", "stage", "train")
+        logger.set_tag("run", "stage", "validate")
+    _, metrics, _, tags = client.batches[0]
+    assert sorted((m.step, m.value) for m in metrics) == [(0, 0.5), (1, 0.7)]
+    assert [(t.key, t.value) for t in tags] == [("stage", "validate")]
+
+
+def test_large_buffers_are_split_at_the_log_batch_limits():
+    client = RecordingClient()
+    with BatchLogger(client, verbose=False) as logger:
+        logger.log_metrics("run", {f"m{i}": i for i in range(MAX_METRICS_PER_BATCH + 10)})
+        logger.log_params("run", {f"p{i}": i for i in range(2 * MAX_PARAMS_PER_BATCH + 1)})
+    assert [len(metrics) for _, metrics, _, _ in client.batches] == [MAX_METRICS_PER_BATCH, 10, 0]
+    assert [len(params) for _, _, params, _ in client.batches] == [MAX_PARAMS_PER_BATCH] * 2 + [1]
+    assert logger.requests_sent == 3
+
+
+def test_each_run_gets_its_own_request_and_flush_can_target_one():
+    client = RecordingClient()
+    logger = BatchLogger(client, verbose=False)
+    logger.log_metric("a", "x", 1)
+    logger.log_metric("b", "x", 2)
+    logger.flush("a")
+    assert [run_id for run_id, *_ in client.batches] == ["a"]
+    logger.flush()
+    assert [run_id for run_id, *_ in client.batches] == ["a", "b"]
+    logger.flush()
+    assert len(client.batches) == 2
+
+
+def test_sent_metrics_and_tags_are_written_to_the_run_index():
+    client = RecordingClient()
+    index = RunIndex(":memory:", client)
+    with BatchLogger(client, verbose=False, run_index=index) as logger:
+        logger.log_metric("run", "f1_score", 0.8)
+        logger.set_tag("run", "evaluation_status", "accepted")
+    assert index.get_metrics("run") == {"f1_score": 0.8}
+    assert index.get_tags("run") == {"evaluation_status": "accepted"}
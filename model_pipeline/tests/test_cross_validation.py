@@ -0,0 +1,72 @@
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.datasets import make_classification
+
+from helper import cross_validation
+from helper.cross_validation import get_cv_config, make_folds, run_cross_validation
+from helper.data_loader import load_training_data
+from helper.metrics import compute_metrics
+from helper.model_registry import get_model_entry
+
+MODEL_CFG = {"name": "model_lr", "type": "logistic_regression",
+             "cross_validation": {"enabled": True, "folds": 3, "workers": 2}}
+HPARAMS = {"C": 1.0, "max_iter": 200}
+
+
+@pytest.fixture
+def config(tmp_path):
+    X, y = make_classification(n_samples=600, n_features=5, random_state=0)
+    df = pd.DataFrame(X, columns=[f"feature_{i}" for i in range(5)]).assign(target=y)
+    df.to_csv(tmp_path / "train.csv", index=False)
+    return {"data": {"path": str(tmp_path / "train.csv"), "target_column": "target",
+                     "output_dir": str(tmp_path / "out"), "cache_dir": str(tmp_path / "cache")},
+            "stage_cache": {"dir": str(tmp_path / "stages")}}
+
+
+def run(config, hparams=HPARAMS):
+    _, y = load_training_data(config)
+    return run_cross_validation(config, MODEL_CFG, hparams, y, np.arange(500), get_cv_config(MODEL_CFG))
+
+
+def refuse_to_fit(monkeypatch):
+    def no_pool(*args, **kwargs):
+        raise AssertionError("a cached fold was fitted again")
+    monkeypatch.setattr(cross_validation, "ProcessPoolExecutor", no_pool)
+
+
+def test_fold_metrics_match_fitting_each_fold_directly(config):
+    results = run(config)
+    X, y = load_training_data(config)
+    train_idx = np.arange(500)
+    for fold, (fit, score) in enumerate(make_folds(y.iloc[train_idx].to_numpy(), get_cv_config(MODEL_CFG))):
+        model = get_model_entry(MODEL_CFG)["build"](HPARAMS).fit(X.iloc[fit], y.iloc[fit])
+        expected = compute_metrics(y.iloc[score].to_numpy(), model.predict(X.iloc[score]), model.classes_)
+        assert results["folds"][fold]["metrics"] == pytest.approx(expected)
+    assert results["summary"]["cv_f1_score_mean"] == pytest.approx(
+        np.mean([f["metrics"]["f1_score"] for f in results["folds"]]))
+
+
+def test_an_unchanged_rerun_reuses_every_fold(config, monkeypatch):
+    first = run(config)
+    refuse_to_fit(monkeypatch)
+    second = run(config)
+    assert second["cached_folds"] == 3
+    assert second["summary"] == first["summary"]
+
+
+def test_only_missing_folds_are_fitted_again(config):
+    first = run(config)
+    fold_files = sorted((Path(config["stage_cache"]["dir"]) / "cv").glob("*/fold_1.json"))
+    assert len(fold_files) == 1
+    fold_files[0].unlink()
+    second = run(config)
+    assert second["cached_folds"] == 2
+    assert second["summary"] == pytest.approx(first["summary"])
+
+
+def test_other_hyperparameters_do_not_reuse_folds(config):
+    run(config)
+    assert run(config, {**HPARAMS, "C": 0.01})["cached_folds"] == 0
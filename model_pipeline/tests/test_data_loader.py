@@ -0,0 +1,106 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from helper import data_loader
+from helper.data_loader import _build_cache, get_cached_file_hash, get_file_hash, get_file_lineage
+
+
+@pytest.fixture
+def small_blocks(monkeypatch):
+    # Files span many hash blocks without being large
+    monkeypatch.setattr(data_loader, "HASH_BLOCK_SIZE", 256)
+
+
+def write_csv(path, rows, start=0, header=True):
+    rng = np.random.default_rng(start)
+    df = pd.DataFrame({"a": rng.random(rows), "b": rng.random(rows), "target": rng.integers(0, 2, rows)})
+    df.to_csv(path, mode="w" if header else "a", header=header, index=False)
+
+
+def test_appended_rows_extend_the_lineage(tmp_path, small_blocks):
+    csv, cache = tmp_path / "train.csv", tmp_path / "cache"
+    write_csv(csv, 200)
+    old_hash = get_cached_file_hash(csv, cache)
+    write_csv(csv, 50, start=1, header=False)
+
+    assert get_cached_file_hash(csv, cache) == get_file_hash(csv) != old_hash
+    assert [v["hash"] for v in get_file_lineage(csv, cache)] == [old_hash]
+
+
+def test_an_edit_in_the_old_bytes_plus_an_append_changes_the_hash(tmp_path, small_blocks):
+    csv, cache = tmp_path / "train.csv", tmp_path / "cache"
+    write_csv(csv, 200)
+    get_cached_file_hash(csv, cache)
+    appended_only = tmp_path / "appended.csv"
+    appended_only.write_bytes(csv.read_bytes())
+    write_csv(appended_only, 50, start=1, header=False)
+
+    # Same-length edit in the middle of the old bytes, away from the first and last blocks
+    content = bytearray(csv.read_bytes())
+    middle = len(content) // 2
+    content[middle] = ord("7") if content[middle] != ord("7") else ord("3")
+    csv.write_bytes(bytes(content))
+    write_csv(csv, 50, start=1, header=False)
+
+    file_hash = get_cached_file_hash(csv, cache)
+    assert file_hash == get_file_hash(csv)
+    assert file_hash != get_file_hash(appended_only)
+    assert get_file_lineage(csv, cache) == []
+
+
+def is_memory_mapped(array):
+    while array is not None:
+        if isinstance(array, np.memmap):
+            return True
+        array = getattr(array, "base", None)
+    return False
+
+
+def test_load_dataset_memory_maps_the_cache(tmp_path):
+    csv, cache = tmp_path / "train.csv", tmp_path / "cache"
+    write_csv(csv, 300)
+    X, y = data_loader.load_dataset(csv, target_col="target", dtype="float32", cache_dir=cache)
+
+    expected = pd.read_csv(csv)
+    assert list(X.columns) == ["a", "b"] and len(X) == 300
+    assert X.dtypes.eq(np.float32).all()
+    assert is_memory_mapped(X.to_numpy())
+    np.testing.assert_allclose(X.to_numpy(), expected[["a", "b"]].to_numpy(dtype=np.float32))
+    assert np.array_equal(y.to_numpy(), expected["target"].to_numpy())
+
+
+def test_the_cache_is_reused_projected_and_invalidated(tmp_path, monkeypatch):
+    csv, cache = tmp_path / "train.csv", tmp_path / "cache"
+    write_csv(csv, 300)
+    path, _ = data_loader.get_dataset_cache(csv, "target", cache_dir=cache)
+
+    builds = []
+    monkeypatch.setattr(data_loader, "_build_cache",
+                        lambda *args: builds.append(args) or _build_cache(*args))
+    assert data_loader.get_dataset_cache(csv, "target", cache_dir=cache)[0] == path
+    assert builds == []
+
+    # Another projection is another entry of the same file
+    projected, meta = data_loader.get_dataset_cache(csv, "target", columns=["b"], cache_dir=cache)
+    assert projected != path and meta["feature_columns"] == ["b"]
+
+    # Rewritten content is a new entry
+    write_csv(csv, 300, start=5)
+    rewritten, meta = data_loader.get_dataset_cache(csv, "target", cache_dir=cache)
+    assert rewritten != path and meta["source_hash"] == get_file_hash(csv)
+    assert len(builds) == 2
+
+
+def test_appended_rows_extend_the_cache_entry(tmp_path, monkeypatch):
+    csv, cache = tmp_path / "train.csv", tmp_path / "cache"
+    write_csv(csv, 300)
+    data_loader.load_dataset(csv, "target", cache_dir=cache)
+    write_csv(csv, 40, start=1, header=False)
+    monkeypatch.setattr(data_loader, "_build_cache", lambda *args: pytest.fail("rebuilt the whole cache"))
+
+    X, y = data_loader.load_dataset(csv, "target", cache_dir=cache)
+    expected = pd.read_csv(csv)
+    assert len(X) == 340
+    np.testing.assert_allclose(X.to_numpy(), expected[["a", "b"]].to_numpy())
+    assert np.array_equal(y.to_numpy(), expected["target"].to_numpy())
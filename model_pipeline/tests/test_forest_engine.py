@@ -0,0 +1,51 @@
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.datasets import make_classification
+from sklearn.ensemble import RandomForestClassifier
+
+from helper.forest_engine import ENGINE_FILE, CompiledForest, compile_forest
+
+
+@pytest.fixture(scope="module")
+def data():
+    X, y = make_classification(n_samples=3000, n_features=12, n_informative=6, n_classes=3,
+                               n_clusters_per_class=1, random_state=0)
+    X = pd.DataFrame(X.astype(np.float32), columns=[f"feature_{i}" for i in range(12)])
+    return X.iloc[:2000], y[:2000], X.iloc[2000:]
+
+
+@pytest.mark.parametrize("layout", ["perfect", "pointer"])
+@pytest.mark.parametrize("max_depth", [4, None])
+def test_compiled_forest_predicts_exactly_like_sklearn(data, layout, max_depth):
+    X_train, y_train, X_test = data
+    model = RandomForestClassifier(n_estimators=25, max_depth=max_depth, random_state=0).fit(X_train, y_train)
+    engine = compile_forest(model, layout)
+
+    assert np.array_equal(engine.predict_proba(X_test), model.predict_proba(X_test))
+    assert np.array_equal(engine.predict(X_test), model.predict(X_test))
+    # Row batches are independent
+    assert np.array_equal(engine.predict_proba(X_test, batch_rows=7), model.predict_proba(X_test))
+
+
+def test_missing_values_follow_sklearn(data):
+    X_train, y_train, X_test = data
+    X_train = np.where(np.random.default_rng(0).random(X_train.shape) < 0.1, np.nan, X_train).astype(np.float32)
+    X_test = np.where(np.random.default_rng(1).random(X_test.shape) < 0.1, np.nan, X_test).astype(np.float32)
+    model = RandomForestClassifier(n_estimators=10, max_depth=6, random_state=0).fit(X_train, y_train)
+    for layout in ("perfect", "pointer"):
+        assert np.array_equal(compile_forest(model, layout).predict_proba(X_test), model.predict_proba(X_test))
+
+
+def test_a_saved_engine_loads_memory_mapped_and_identical(tmp_path, data):
+    X_train, y_train, X_test = data
+    model = RandomForestClassifier(n_estimators=10, max_depth=8, random_state=0).fit(X_train, y_train)
+    path = compile_forest(model).save(tmp_path / ENGINE_FILE)
+    loaded = CompiledForest.load(tmp_path)
+
+    assert np.array_equal(loaded.classes_, model.classes_)
+    assert list(loaded.feature_names_in_) == list(X_train.columns)
+    assert any(isinstance(array, np.memmap) or isinstance(getattr(array, "base", None), np.memmap)
+               for array in loaded.arrays.values())
+    assert np.array_equal(loaded.predict_proba(X_test), model.predict_proba(X_test))
+    assert path.exists()
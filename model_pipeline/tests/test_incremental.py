@@ -0,0 +1,55 @@
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.datasets import make_classification
+from sklearn.metrics import accuracy_score
+
+from helper.incremental import get_incremental_config, replay_sample
+from helper.model_registry import get_model_entry
+
+N_OLD, N_NEW, N_TEST = 60_000, 6_000, 20_000
+
+
+@pytest.fixture(scope="module")
+def data():
+    X, y = make_classification(n_samples=N_OLD + N_NEW + N_TEST, n_features=40, n_informative=20,
+                               flip_y=0.05, random_state=0)
+    return pd.DataFrame(X), pd.Series(y)
+
+
+@pytest.mark.parametrize("model_type, hparams", [
+    ("logistic_regression", {"max_iter": 300}),
+    ("random_forest", {"n_estimators": 30, "max_depth": 12}),
+])
+def test_update_matches_full_retrain(data, model_type, hparams):
+    """An update with the default replay_ratio is as accurate as retraining on every row."""
+    X, y = data
+    model_cfg = {"name": model_type, "type": model_type}
+    entry = get_model_entry(model_cfg)
+    inc_cfg = get_incremental_config(model_cfg)
+    old_rows, new_rows = np.arange(N_OLD), np.arange(N_OLD, N_OLD + N_NEW)
+    test_rows = np.arange(N_OLD + N_NEW, len(X))
+
+    parent = entry["build"](hparams).fit(X.iloc[old_rows], y.iloc[old_rows])
+    fit_rows = np.sort(np.concatenate([replay_sample(old_rows, N_NEW, inc_cfg, N_OLD), new_rows]))
+    update = {**inc_cfg, "new_rows": N_NEW, "base_rows": N_OLD}
+    updated = entry["update"](parent, X.iloc[fit_rows], y.iloc[fit_rows], hparams, update)
+
+    full_rows = np.concatenate([old_rows, new_rows])
+    full = entry["build"](hparams).fit(X.iloc[full_rows], y.iloc[full_rows])
+
+    X_test, y_test = X.iloc[test_rows], y.iloc[test_rows]
+    assert accuracy_score(y_test, updated.predict(X_test)) >= accuracy_score(y_test, full.predict(X_test)) - 0.0025
+    if model_type == "logistic_regression":
+        # The refit only remembers the earlier rows it replays: its coefficients must stay near the full fit's
+        distance = np.abs(updated.coef_ - full.coef_).sum() / np.abs(full.coef_).sum()
+        assert distance < 0.15
+
+
+def test_replay_sample_is_bounded_and_reproducible():
+    old_rows = np.arange(1000)
+    cfg = {"replay_ratio": 4.0, "random_state": 42}
+    sample = replay_sample(old_rows, 100, cfg, 1000)
+    assert len(sample) == 400 and len(np.unique(sample)) == 400
+    assert np.array_equal(sample, replay_sample(old_rows, 100, cfg, 1000))
+    assert len(replay_sample(old_rows, 500, cfg, 1000)) == 1000
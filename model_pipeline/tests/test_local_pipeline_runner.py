@@ -0,0 +1,71 @@
+import json
+
+import pytest
+import yaml
+
+from helper.local_pipeline_runner import run_local_pipeline
+
+# Stands in for a stage script: checks its upstream outputs exist, sleeps, writes its own output
+STAGE = """
+import argparse, sys, time
+parser = argparse.ArgumentParser()
+parser.add_argument("--after", action="append", default=[])
+parser.add_argument("--sleep", type=float, default=0.0)
+parser.add_argument("--fail", action="store_true")
+parser.add_argument("--out")
+args = parser.parse_args()
+for path in args.after:
+    open(path).read()
+time.sleep(args.sleep)
+if args.fail:
+    sys.exit(3)
+with open(args.out, "w") as f:
+    f.write("done")
+"""
+
+
+def pipeline(tmp_path, fail_b=False):
+    """a and b are independent; c reads both of their outputs."""
+    (tmp_path / "stage.py").write_text(STAGE)
+    outputs = {"done": {"type": "uri_file"}}
+    jobs = {
+        "a": {"code": ".", "command": "python stage.py --sleep 0.5 --out ${{outputs.done}}", "outputs": outputs},
+        "b": {"code": ".", "command": "python stage.py --sleep 1.0 " + ("--fail " if fail_b else "")
+              + "--out ${{outputs.done}}", "outputs": outputs},
+        "c": {"code": ".", "command": "python stage.py --after ${{inputs.a}} --after ${{inputs.b}} "
+                                      "--out ${{outputs.done}}",
+              "inputs": {"a": "${{parent.jobs.a.outputs.done}}", "b": "${{parent.jobs.b.outputs.done}}"},
+              "outputs": outputs},
+    }
+    (tmp_path / "pipeline.yaml").write_text(yaml.safe_dump({"jobs": jobs}))
+    (tmp_path / "jobs").mkdir()
+    return {"job": {"config_path": "config.yaml"},
+            "platform": {"local": {"pipeline_file": str(tmp_path / "pipeline.yaml"), "jobs_dir": str(tmp_path / "jobs"),
+                                   "work_dir": str(tmp_path / "work"), "max_workers": 4, "retries": 0}}}
+
+
+def report(tmp_path):
+    return json.loads(next((tmp_path / "work").glob("run_*/timings.json")).read_text())
+
+
+def test_independent_branches_overlap_and_the_join_waits_for_both(tmp_path):
+    run_local_pipeline(pipeline(tmp_path))
+    timings = report(tmp_path)
+    steps = timings["steps"]
+
+    assert all(step["status"] == "succeeded" for step in steps.values())
+    assert steps["a"]["start"] < steps["b"]["end"] and steps["b"]["start"] < steps["a"]["end"]
+    assert steps["c"]["start"] >= max(steps["a"]["end"], steps["b"]["end"])
+    assert timings["critical_path"] == ["b", "c"]
+    assert timings["wall_s"] < timings["step_s"]
+
+
+def test_a_failed_step_skips_its_downstream_steps(tmp_path):
+    with pytest.raises(RuntimeError, match=r"\['b'\]"):
+        run_local_pipeline(pipeline(tmp_path, fail_b=True))
+    timings = report(tmp_path)
+
+    assert timings["steps"]["a"]["status"] == "succeeded"
+    assert timings["steps"]["b"]["status"] == "failed"
+    assert "c" not in timings["steps"] and timings["skipped"] == ["c"]
+    assert "exit code 3" in next((tmp_path / "work").glob("run_*/b/log.txt")).read_text()
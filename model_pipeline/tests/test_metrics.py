@@ -0,0 +1,120 @@
+import numpy as np
+import pytest
+from sklearn.metrics import accuracy_score, f1_score, precision_score, recall_score
+
+from helper.metrics import (
+    bootstrap_intervals,
+    compute_metrics,
+    confusion_counts,
+    evaluate_predictions,
+    get_evaluation_config,
+    get_labels,
+    score_histograms,
+    threshold_sweep,
+)
+
+
+def sklearn_metrics(y_true, y_pred, **kwargs):
+    return {
+        "accuracy": accuracy_score(y_true, y_pred),
+        "precision": precision_score(y_true, y_pred, zero_division=0, **kwargs),
+        "recall": recall_score(y_true, y_pred, zero_division=0, **kwargs),
+        "f1_score": f1_score(y_true, y_pred, zero_division=0, **kwargs),
+    }
+
+
+def assert_metrics_match(ours, expected):
+    assert ours.keys() == expected.keys()
+    for name, value in expected.items():
+        assert ours[name] == pytest.approx(value), name
+
+
+def test_binary_metrics_match_sklearn():
+    rng = np.random.default_rng(0)
+    y_true = rng.integers(0, 2, size=500)
+    y_pred = np.where(rng.random(500) < 0.8, y_true, 1 - y_true)
+    assert_metrics_match(compute_metrics(y_true, y_pred), sklearn_metrics(y_true, y_pred))
+    assert_metrics_match(compute_metrics(y_true, y_pred, pos_label=0),
+                         sklearn_metrics(y_true, y_pred, pos_label=0))
+
+
+@pytest.mark.parametrize("y_true, y_pred", [
+    (np.zeros(50, dtype=int), np.zeros(50, dtype=int)),    # no positives anywhere
+    (np.ones(50, dtype=int), np.zeros(50, dtype=int)),     # the model never predicts the positive class
+])
+def test_a_holdout_without_predicted_positives_scores_zero(y_true, y_pred):
+    metrics = compute_metrics(y_true, y_pred, classes=np.array([0, 1]))
+    assert_metrics_match(metrics, sklearn_metrics(y_true, y_pred))
+    assert metrics["precision"] == metrics["recall"] == metrics["f1_score"] == 0.0
+
+
+def test_pos_label_is_a_label_even_when_nobody_saw_it():
+    assert get_labels(np.zeros(5), np.zeros(5), pos_label=1).tolist() == [0, 1]
+    assert get_labels([0, 2], [2, 2], classes=np.array([0, 1, 2])).tolist() == [0, 1, 2]
+
+
+@pytest.mark.parametrize("average", ["macro", "weighted", "micro"])
+def test_multiclass_metrics_match_sklearn(average):
+    rng = np.random.default_rng(1)
+    y_true = rng.integers(0, 4, size=600)
+    y_pred = np.where(rng.random(600) < 0.6, y_true, rng.integers(0, 4, size=600))
+    assert_metrics_match(compute_metrics(y_true, y_pred, average=average),
+                         sklearn_metrics(y_true, y_pred, average=average))
+
+
+def test_multiclass_defaults_to_macro():
+    rng = np.random.default_rng(2)
+    y_true = rng.integers(0, 3, size=300)
+    y_pred = rng.integers(0, 3, size=300)
+    assert_metrics_match(compute_metrics(y_true, y_pred), sklearn_metrics(y_true, y_pred, average="macro"))
+
+
+def test_bootstrap_matches_resampling_rows():
+    rng = np.random.default_rng(3)
+    y_true = rng.integers(0, 2, size=400)
+    y_pred = np.where(rng.random(400) < 0.75, y_true, 1 - y_true)
+    labels = get_labels(y_true, y_pred, pos_label=1)
+    intervals = bootstrap_intervals(confusion_counts(y_true, y_pred, labels), labels, n_resamples=2000)
+
+    # The same percentile bootstrap, resampling rows and scoring with sklearn
+    resampled = []
+    for _ in range(2000):
+        rows = rng.integers(0, len(y_true), size=len(y_true))
+        resampled.append(sklearn_metrics(y_true[rows], y_pred[rows]))
+    for name, bounds in intervals.items():
+        values = [r[name] for r in resampled]
+        assert bounds["lower"] == pytest.approx(np.percentile(values, 2.5), abs=0.02), name
+        assert bounds["upper"] == pytest.approx(np.percentile(values, 97.5), abs=0.02), name
+        assert bounds["lower"] <= compute_metrics(y_true, y_pred)[name] <= bounds["upper"]
+
+
+def test_bootstrap_is_deterministic_for_a_seed():
+    cm = np.array([[40, 10], [5, 45]])
+    labels = np.array([0, 1])
+    assert bootstrap_intervals(cm, labels, random_state=7) == bootstrap_intervals(cm, labels, random_state=7)
+
+
+def test_threshold_sweep_matches_sklearn_at_every_threshold():
+    rng = np.random.default_rng(4)
+    y_true = rng.integers(0, 2, size=1000)
+    y_score = np.clip(y_true * 0.3 + rng.random(1000) * 0.7, 0, 1)
+    sweep = threshold_sweep(*score_histograms(y_true, y_score, bins=20))
+
+    for i, threshold in enumerate(sweep["threshold"]):
+        expected = sklearn_metrics(y_true, (y_score >= threshold).astype(int))
+        for name, value in expected.items():
+            assert sweep[name][i] == pytest.approx(value), (name, threshold)
+
+
+def test_evaluate_predictions_reports_the_best_threshold():
+    rng = np.random.default_rng(5)
+    y_true = rng.integers(0, 2, size=500)
+    y_score = np.clip(y_true * 0.4 + rng.random(500) * 0.6, 0, 1)
+    y_pred = (y_score >= 0.5).astype(int)
+    evaluation = evaluate_predictions(y_true, y_pred, y_score, get_evaluation_config({"evaluation": {"sweep_bins": 50}}))
+
+    assert evaluation["labels"] == [0, 1]
+    assert_metrics_match(evaluation["metrics"], sklearn_metrics(y_true, y_pred))
+    best = evaluation["best_threshold"]
+    assert best["f1_score"] == pytest.approx(max(evaluation["threshold_sweep"]["f1_score"]), abs=1e-6)
+    assert best["f1_score"] == pytest.approx(f1_score(y_true, (y_score >= best["threshold"]).astype(int)))
@@ -0,0 +1,72 @@
+import asyncio
+import time
+
+import numpy as np
+import pandas as pd
+
+from helper.micro_batcher import MicroBatcher
+
+
+class RecordingModel:
+    def __init__(self):
+        self.batches = []
+
+    def predict(self, X):
+        self.batches.append(len(X))
+        return X["v"].to_numpy() * 2
+
+
+def requests(n, rows=1):
+    return [pd.DataFrame({"v": np.arange(i * rows, (i + 1) * rows)}) for i in range(n)]
+
+
+async def serve(batcher, frames):
+    batcher.start()
+    try:
+        return await asyncio.gather(*(batcher.predict(frame) for frame in frames))
+    finally:
+        await batcher.stop()
+
+
+def test_a_full_batch_is_sent_without_waiting_for_the_delay():
+    model = RecordingModel()
+    batcher = MicroBatcher(model.predict, max_batch_size=4, max_delay_ms=10_000)
+    started = time.perf_counter()
+    results = asyncio.run(serve(batcher, requests(8)))
+    assert time.perf_counter() - started < 5
+    assert model.batches == [4, 4]
+    assert [r.tolist() for r in results] == [[2 * i] for i in range(8)]
+
+
+def test_a_partial_batch_is_sent_after_max_delay():
+    model = RecordingModel()
+    batcher = MicroBatcher(model.predict, max_batch_size=100, max_delay_ms=50)
+    started = time.perf_counter()
+    results = asyncio.run(serve(batcher, requests(3, rows=2)))
+    assert time.perf_counter() - started >= 0.05
+    assert model.batches == [6]
+    assert [r.tolist() for r in results] == [[0, 2], [4, 6], [8, 10]]
+    assert batcher.stats.summary()["mean_batch_rows"] == 6
+
+
+def test_max_batch_size_one_serves_requests_alone():
+    model = RecordingModel()
+    asyncio.run(serve(MicroBatcher(model.predict, max_batch_size=1, max_delay_ms=10_000), requests(3)))
+    assert model.batches == [1, 1, 1]
+
+
+def test_a_failed_batch_fails_each_of_its_requests():
+    def predict(X):
+        raise RuntimeError("model failed")
+
+    async def run():
+        batcher = MicroBatcher(predict, max_batch_size=2, max_delay_ms=10)
+        batcher.start()
+        try:
+            return await asyncio.gather(*(batcher.predict(frame) for frame in requests(2)),
+                                        return_exceptions=True)
+        finally:
+            await batcher.stop()
+
+    errors = asyncio.run(run())
+    assert all(isinstance(error, RuntimeError) for error in errors)
@@ -0,0 +1,83 @@
+import mlflow
+import numpy as np
+import pytest
+from mlflow.tracking import MlflowClient
+from sklearn.linear_model import LogisticRegression
+
+from helper.model_cache import ModelCache
+
+
+@pytest.fixture
+def client(tmp_path):
+    mlflow.set_tracking_uri(f"sqlite:///{tmp_path / 'mlflow.db'}")
+    experiment_id = mlflow.create_experiment("model_cache", artifact_location=(tmp_path / "artifacts").as_uri())
+    mlflow.set_experiment(experiment_id=experiment_id)
+    yield MlflowClient()
+    mlflow.set_tracking_uri(None)
+
+
+def log_file_run(tmp_path, name, size):
+    path = tmp_path / name
+    path.write_bytes(b"x" * size)
+    with mlflow.start_run() as run:
+        mlflow.log_artifact(str(path), artifact_path="files")
+    return run.info.run_id
+
+
+def test_disk_hits_skip_the_tracking_server(tmp_path, client, monkeypatch):
+    run_id = log_file_run(tmp_path, "a.bin", 100)
+    cache = ModelCache(tmp_path / "cache", client=client)
+    local_path = cache.get_local_path(run_id, "files")
+    assert (local_path / "a.bin").read_bytes() == b"x" * 100
+
+    def offline(*args, **kwargs):
+        raise AssertionError("a cached artifact was looked up on the tracking server")
+    monkeypatch.setattr(client, "list_artifacts", offline)
+    monkeypatch.setattr(mlflow.artifacts, "download_artifacts", offline)
+    assert cache.get_local_path(run_id, "files") == local_path
+    # Another process sharing the directory hits it too
+    assert ModelCache(tmp_path / "cache", client=client).get_local_path(run_id, "files") == local_path
+    assert cache.stats == {"memory_hits": 0, "disk_hits": 1, "misses": 1, "evictions": 0}
+
+
+def test_each_artifact_path_is_its_own_entry(tmp_path, client):
+    path = tmp_path / "b.bin"
+    path.write_bytes(b"b")
+    with mlflow.start_run() as run:
+        mlflow.log_artifact(str(path), artifact_path="one")
+        mlflow.log_artifact(str(path), artifact_path="two")
+    cache = ModelCache(tmp_path / "cache", client=client)
+    one = cache.get_local_path(run.info.run_id, "one")
+    two = cache.get_local_path(run.info.run_id, "two")
+    assert one.parent != two.parent and (one / "b.bin").exists() and (two / "b.bin").exists()
+    assert cache.stats["misses"] == 2
+
+
+def test_least_recently_used_entries_are_evicted_past_the_size_limit(tmp_path, client):
+    runs = [log_file_run(tmp_path, f"{i}.bin", 400_000) for i in range(3)]
+    cache = ModelCache(tmp_path / "cache", max_size_mb=1, client=client)
+    first = cache.get_local_path(runs[0], "files")
+    second = cache.get_local_path(runs[1], "files")
+    cache.get_local_path(runs[0], "files")      # runs[0] is now the most recently used
+    cache.get_local_path(runs[2], "files")
+
+    assert first.exists() and not second.exists()
+    assert cache.stats["evictions"] == 1
+
+
+def test_loaded_models_are_kept_in_memory_up_to_max_in_memory(tmp_path, client):
+    rng = np.random.default_rng(0)
+    X, y = rng.normal(size=(50, 3)), rng.integers(0, 2, 50)
+    run_ids = []
+    for _ in range(2):
+        with mlflow.start_run() as run:
+            mlflow.sklearn.log_model(LogisticRegression().fit(X, y), artifact_path="model")
+        run_ids.append(run.info.run_id)
+
+    cache = ModelCache(tmp_path / "cache", max_in_memory=1, client=client)
+    model = cache.load(run_ids[0])
+    assert cache.load(run_ids[0]) is model
+    np.testing.assert_array_equal(model.predict(X), LogisticRegression().fit(X, y).predict(X))
+    cache.load(run_ids[1])
+    assert cache.load(run_ids[0]) is not model    # pushed out of memory, reloaded from disk
+    assert cache.stats == {"memory_hits": 1, "disk_hits": 1, "misses": 2, "evictions": 0}
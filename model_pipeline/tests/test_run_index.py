@@ -0,0 +1,80 @@
+import time
+
+import mlflow
+import pytest
+from mlflow.tracking import MlflowClient
+
+from helper.run_index import RunIndex
+
+EXPERIMENT = "run_index"
+
+
+@pytest.fixture
+def client(tmp_path):
+    mlflow.set_tracking_uri(f"sqlite:///{tmp_path / 'mlflow.db'}")
+    mlflow.create_experiment(EXPERIMENT, artifact_location=(tmp_path / "artifacts").as_uri())
+    mlflow.set_experiment(EXPERIMENT)
+    yield MlflowClient()
+    mlflow.set_tracking_uri(None)
+
+
+def start_runs(n):
+    run_ids = []
+    for _ in range(n):
+        with mlflow.start_run() as run:
+            mlflow.log_metric("f1_score", 0.5)
+        run_ids.append(run.info.run_id)
+        time.sleep(0.01)    # distinct start times
+    return run_ids
+
+
+def test_latest_run_and_best_run_are_local_lookups(tmp_path, client):
+    run_ids = start_runs(3)
+    client.log_metric(run_ids[1], "f1_score", 0.9)
+    index = RunIndex(tmp_path / "index.sqlite", client)
+    assert index.sync([EXPERIMENT]) == 3
+
+    calls = index.server_calls
+    assert index.latest_run(EXPERIMENT) == run_ids[2]
+    assert index.best_run(EXPERIMENT, "f1_score") == run_ids[1]
+    assert index.best_run(EXPERIMENT, "f1_score", minimum=0.95) is None
+    assert index.server_calls == calls
+
+
+def test_tags_set_by_another_process_after_sync_are_picked_up(tmp_path, client):
+    run_ids = start_runs(3)
+    index = RunIndex(tmp_path / "index.sqlite", client)
+    index.sync([EXPERIMENT], refresh_tags=("evaluation_status",))
+    assert index.latest_run(EXPERIMENT, tags={"evaluation_status": None}) is None
+
+    # Validation tags a finished run that started before the watermark
+    client.set_tag(run_ids[0], "evaluation_status", "accepted")
+    index.sync([EXPERIMENT], refresh_tags=("evaluation_status",))
+    assert index.latest_run(EXPERIMENT, tags={"evaluation_status": "accepted"}) == run_ids[0]
+
+    # Without refresh_tags, only runs from the watermark on are fetched again
+    client.set_tag(run_ids[1], "evaluation_status", "rejected")
+    index.sync([EXPERIMENT])
+    assert "evaluation_status" not in index.get_tags(run_ids[1])
+
+
+def test_runs_that_have_the_tags_are_not_fetched_again(tmp_path, client):
+    run_ids = start_runs(2)
+    for run_id in run_ids:
+        client.set_tag(run_id, "evaluation_status", "accepted")
+    index = RunIndex(tmp_path / "index.sqlite", client)
+    index.sync([EXPERIMENT], refresh_tags=("evaluation_status",))
+    # Only the run at the watermark comes back
+    assert index.sync([EXPERIMENT], refresh_tags=("evaluation_status",)) == 1
+
+
+def test_runs_that_never_get_the_tags_are_re_read_only_once(tmp_path, client):
+    start_runs(3)
+    index = RunIndex(tmp_path / "index.sqlite", client)
+    index.sync([EXPERIMENT], refresh_tags=("evaluation_status",))
+    # The second sync re-reads the untagged runs once, together with the run at the watermark
+    assert index.sync([EXPERIMENT], refresh_tags=("evaluation_status",)) == 4
+    for _ in range(3):
+        calls = index.server_calls
+        assert index.sync([EXPERIMENT], refresh_tags=("evaluation_status",)) == 1
+        assert index.server_calls == calls + 1
@@ -0,0 +1,73 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from helper.schema_validator import compile_schema, handle_report, is_valid, validate_chunked
+
+SCHEMA = {
+    "required": ["age", "income"],
+    "properties": {
+        "age": {"type": "integer", "minimum": 0, "maximum": 120},
+        "income": {"type": "number", "exclusiveMinimum": 0},
+        "segment": {"type": "string", "enum": ["a", "b"]},
+    },
+    "additionalProperties": False,
+}
+
+
+def frame():
+    return pd.DataFrame({
+        "age": [30, -1, 40.5, 200, None, 25],
+        "income": [1.0, 2.0, 0.0, "x", 3.0, 4.0],
+        "segment": ["a", "c", None, "b", "a", 5],
+    })
+
+
+def test_each_invalid_row_is_counted_once():
+    report, invalid = compile_schema(SCHEMA).validate(frame(), return_mask=True)
+    # Row 0 is clean; row 3 breaks both the age maximum and the income type
+    assert invalid.tolist() == [False, True, True, True, True, True]
+    assert report["rows"] == 6 and report["invalid_rows"] == 5
+    assert report["violations"] == {
+        "age": {"null": 1, "integer": 1, "minimum": 1, "maximum": 1},
+        "income": {"type": 1, "exclusiveMinimum": 1},
+        "segment": {"type": 1, "enum": 2},
+    }
+
+
+def test_missing_and_unexpected_columns():
+    report = compile_schema(SCHEMA).validate(pd.DataFrame({"age": [1, 2], "extra": [0, 0]}))
+    assert report["missing_columns"] == ["income"]
+    assert report["unexpected_columns"] == ["extra"]
+    assert report["invalid_rows"] == 2 and not is_valid(report)
+
+
+def test_optional_properties_may_be_null():
+    report = compile_schema(SCHEMA).validate(pd.DataFrame({"age": [1], "income": [1.0], "segment": [None]}))
+    assert is_valid(report)
+
+
+@pytest.mark.parametrize("chunk_rows", [1, 4, 100])
+def test_chunked_validation_matches_one_pass(chunk_rows):
+    rng = np.random.default_rng(0)
+    X = pd.DataFrame({"age": rng.integers(-10, 130, 1000), "income": rng.normal(1, 1, 1000)})
+    validator = compile_schema(SCHEMA)
+    whole = validator.validate(X)
+    chunked = validate_chunked(validator, X, chunk_rows)
+    assert chunked["invalid_rows"] == whole["invalid_rows"] > 0
+    assert chunked["violations"] == whole["violations"]
+
+    rows = rng.choice(1000, size=300, replace=False)
+    subset = validate_chunked(validator, X, chunk_rows, rows)
+    assert subset["rows"] == 300
+    assert subset["invalid_rows"] == validator.validate(X.iloc[np.sort(rows)])["invalid_rows"]
+
+
+def test_handle_report_follows_on_violation(capsys):
+    report = compile_schema(SCHEMA).validate(frame())
+    with pytest.raises(ValueError, match="5/6 invalid rows"):
+        handle_report(report, "training data", {"on_violation": "fail"})
+    handle_report(report, "training data", {"on_violation": "warn"})
+    assert "training data does not match its schema" in capsys.readouterr().out
+    handle_report(report, "training data", {"on_violation": "off"})
+    assert capsys.readouterr().out == ""
@@ -0,0 +1,38 @@
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.linear_model import LogisticRegression
+
+from helper import scoring
+
+
+@pytest.fixture
+def fitted(monkeypatch):
+    def fit(n_classes):
+        rng = np.random.default_rng(n_classes)
+        X = pd.DataFrame(rng.normal(size=(300, 3)), columns=["a", "b", "c"])
+        y = rng.integers(0, n_classes, size=300)
+        model = LogisticRegression().fit(X, y)
+        monkeypatch.setattr(scoring, "_worker_model", model)
+        return model, X
+    return fit
+
+
+def score(tmp_path, X, pos_label):
+    _, path, *_ = scoring.score_chunk(0, X, tmp_path, ["prediction", "probability"], "csv",
+                                      pos_label=pos_label)
+    return pd.read_csv(path)
+
+
+@pytest.mark.parametrize("n_classes, pos_label", [(2, 1), (2, 0), (3, 1)])
+def test_probability_is_the_pos_label_column(tmp_path, fitted, n_classes, pos_label):
+    model, X = fitted(n_classes)
+    output = score(tmp_path, X, pos_label)
+    np.testing.assert_allclose(output["probability"], model.predict_proba(X)[:, pos_label])
+    np.testing.assert_array_equal(output["prediction"], model.predict(X))
+
+
+def test_an_unknown_pos_label_is_an_error(tmp_path, fitted):
+    _, X = fitted(2)
+    with pytest.raises(ValueError, match="pos_label"):
+        score(tmp_path, X, "yes")
@@ -0,0 +1,11 @@
+import os
+
+from helper.search import get_search_config
+
+
+def test_concurrent_searches_share_the_cores(monkeypatch):
+    monkeypatch.setattr(os, "cpu_count", lambda: 8)
+    assert get_search_config({})["n_jobs"] == 8
+    assert get_search_config({}, workers=2)["n_jobs"] == 4
+    assert get_search_config({}, workers=16)["n_jobs"] == 1
+    assert get_search_config({"search": {"n_jobs": 3}}, workers=2)["n_jobs"] == 3
@@ -0,0 +1,46 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from helper.sketches import DatasetSketch, DriftMonitor, get_drift_config
+
+FEATURES = [f"feature_{i}" for i in range(10)]
+
+
+@pytest.fixture(scope="module")
+def reference():
+    rng = np.random.default_rng(0)
+    sketch = DatasetSketch(FEATURES)
+    sketch.update(pd.DataFrame(rng.normal(size=(100_000, len(FEATURES))), columns=FEATURES))
+    return sketch
+
+
+def drift_report(reference, X):
+    return DriftMonitor(reference, get_drift_config({})).update(pd.DataFrame(X, columns=FEATURES)).report()
+
+
+@pytest.mark.parametrize("rows", [30, 100, 200, 1000])
+def test_small_holdouts_from_the_training_distribution_do_not_drift(reference, rows):
+    rng = np.random.default_rng(rows)
+    drifted = [drift_report(reference, rng.normal(size=(rows, len(FEATURES))))["drifted_features"]
+               for _ in range(20)]
+    assert sum(map(len, drifted)) <= 1
+
+
+def test_psi_is_judged_once_every_bin_expects_enough_rows(reference):
+    rng = np.random.default_rng(1)
+    small = drift_report(reference, rng.normal(size=(30, len(FEATURES))))["features"]["feature_0"]
+    assert small["psi_critical"] is None
+    # The null PSI shrinks with the sample: (bins - 1)(1/n + 1/m)
+    critical = [drift_report(reference, rng.normal(size=(rows, len(FEATURES))))["features"]["feature_0"]["psi_critical"]
+                for rows in (200, 2000)]
+    assert critical[0] > 5 * critical[1]
+
+
+def test_shifted_feature_drifts(reference):
+    rng = np.random.default_rng(2)
+    X = rng.normal(size=(200, len(FEATURES)))
+    X[:, 3] += 1.0
+    report = drift_report(reference, X)
+    assert report["drifted_features"] == ["feature_3"]
+    assert report["features"]["feature_3"]["psi"] > report["features"]["feature_3"]["psi_critical"]
@@ -0,0 +1,91 @@
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.model_selection import train_test_split
+
+from helper.split_manifest import (
+    SPLIT_MANIFEST_FILE,
+    check_manifest_dataset,
+    get_or_create_split,
+    load_holdout,
+)
+
+
+def write_csv(path, rows, start=0, header=True):
+    rng = np.random.default_rng(start)
+    df = pd.DataFrame({"a": rng.random(rows), "target": rng.integers(0, 2, rows)})
+    df.to_csv(path, mode="w" if header else "a", header=header, index=False)
+
+
+def make_config(tmp_path, on_append="resplit", **split):
+    return {"data": {"path": str(tmp_path / "train.csv"), "target_column": "target",
+                     "output_dir": str(tmp_path / "out"), "cache_dir": str(tmp_path / "cache"),
+                     "split": {"test_size": 0.2, "random_state": 42, "on_append": on_append, **split}}}
+
+
+def test_the_split_matches_train_test_split_and_is_reused(tmp_path):
+    config = make_config(tmp_path)
+    write_csv(config["data"]["path"], 500)
+    manifest, path = get_or_create_split(config, 500)
+
+    train_idx, test_idx = train_test_split(np.arange(500), test_size=0.2, random_state=42)
+    assert np.array_equal(manifest["train_idx"], train_idx) and np.array_equal(manifest["test_idx"], test_idx)
+    assert path.name == SPLIT_MANIFEST_FILE
+
+    written = path.stat().st_mtime_ns
+    reused, _ = get_or_create_split(config, 500)
+    assert path.stat().st_mtime_ns == written
+    assert np.array_equal(reused["test_idx"], manifest["test_idx"])
+
+
+def test_other_split_parameters_or_data_resplit(tmp_path):
+    config = make_config(tmp_path)
+    write_csv(config["data"]["path"], 500)
+    manifest, _ = get_or_create_split(config, 500)
+
+    resplit, _ = get_or_create_split(make_config(tmp_path, random_state=7), 500)
+    assert not np.array_equal(resplit["test_idx"], manifest["test_idx"])
+
+    write_csv(config["data"]["path"], 500, start=1)
+    with pytest.raises(ValueError, match="Split manifest was built for dataset"):
+        check_manifest_dataset(config, manifest)
+    assert get_or_create_split(config, 500)[0]["dataset_hash"] != manifest["dataset_hash"]
+
+
+def test_extend_keeps_existing_rows_on_their_side(tmp_path):
+    config = make_config(tmp_path, on_append="extend")
+    write_csv(config["data"]["path"], 1000)
+    manifest, _ = get_or_create_split(config, 1000)
+    write_csv(config["data"]["path"], 500, start=1, header=False)
+    extended, _ = get_or_create_split(config, 1500)
+
+    assert np.array_equal(extended["train_idx"][:len(manifest["train_idx"])], manifest["train_idx"])
+    assert np.array_equal(extended["test_idx"][:len(manifest["test_idx"])], manifest["test_idx"])
+    new_rows = np.concatenate([extended["train_idx"][len(manifest["train_idx"]):],
+                               extended["test_idx"][len(manifest["test_idx"]):]])
+    assert np.array_equal(np.sort(new_rows), np.arange(1000, 1500))
+    assert 0.1 < np.isin(np.arange(1000, 1500), extended["test_idx"]).mean() < 0.3
+    assert [rows for rows, _ in extended["history"]] == [1000, 1500]
+
+
+def test_extend_resplits_when_old_rows_changed(tmp_path):
+    config = make_config(tmp_path, on_append="extend")
+    write_csv(config["data"]["path"], 1000)
+    get_or_create_split(config, 1000)
+    write_csv(config["data"]["path"], 1500, start=2)
+    resplit, _ = get_or_create_split(config, 1500)
+
+    train_idx, test_idx = train_test_split(np.arange(1500), test_size=0.2, random_state=42)
+    assert np.array_equal(resplit["test_idx"], test_idx)
+    assert [rows for rows, _ in resplit["history"]] == [1500]
+
+
+def test_load_holdout_reads_the_test_rows(tmp_path):
+    config = make_config(tmp_path)
+    write_csv(config["data"]["path"], 300)
+    manifest, _ = get_or_create_split(config, 300)
+    X_test, y_test = load_holdout(config, manifest)
+
+    expected = pd.read_csv(config["data"]["path"]).iloc[np.sort(manifest["test_idx"])]
+    np.testing.assert_allclose(X_test["a"].to_numpy(), expected["a"].to_numpy())
+    assert np.array_equal(y_test.to_numpy(), expected["target"].to_numpy())
@@ -0,0 +1,120 @@
+import mlflow
+import numpy as np
+import pandas as pd
+import pytest
+from mlflow.tracking import MlflowClient
+
+from helper.stage_cache import (
+    StageCache,
+    plan_stages,
+    register_components,
+    train_components,
+    validate_components,
+)
+
+
+@pytest.fixture
+def client(tmp_path):
+    mlflow.set_tracking_uri(f"sqlite:///{tmp_path / 'mlflow.db'}")
+    mlflow.create_experiment("stages", artifact_location=(tmp_path / "artifacts").as_uri())
+    mlflow.set_experiment("stages")
+    yield MlflowClient()
+    mlflow.set_tracking_uri(None)
+
+
+@pytest.fixture
+def config(tmp_path):
+    data_path = tmp_path / "train.csv"
+    rng = np.random.default_rng(0)
+    pd.DataFrame({"a": rng.random(100), "target": rng.integers(0, 2, 100)}).to_csv(data_path, index=False)
+    return {
+        "data": {"path": str(data_path), "target_column": "target", "output_dir": str(tmp_path / "out"),
+                 "cache_dir": str(tmp_path / "cache")},
+        "models": [{"name": "model_lr", "type": "logistic_regression", "model_name": "LR",
+                    "hyperparameters": {"C": 1.0}}],
+    }
+
+
+def record_all(config, cache, accepted=True, outputs=()):
+    """Record train/validate/register results for every model, as a completed pipeline would."""
+    for model_cfg in config["models"]:
+        name = model_cfg["name"]
+        with mlflow.start_run() as run:
+            pass
+        run_id = run.info.run_id
+        cache.record("train", name, train_components(config, model_cfg), run_id, outputs=outputs)
+        cache.record("validate", name, validate_components(config, model_cfg, run_id), run_id,
+                     result={"accepted": accepted})
+        if accepted:
+            cache.record("register", name, register_components(model_cfg, run_id, "accepted"), run_id,
+                         result={"version": "1"})
+    cache.save()
+    return run_id
+
+
+def actions(plan):
+    return [(step["stage"], step["run"]) for step in plan]
+
+
+def test_an_unchanged_pipeline_skips_every_stage(tmp_path, config, client):
+    record_all(config, StageCache(tmp_path / "stages", client=client))
+    plan = plan_stages(config, StageCache(tmp_path / "stages", client=client))
+    assert actions(plan) == [("train", False), ("validate", False), ("register", False)]
+
+
+def test_without_records_everything_runs(tmp_path, config, client):
+    plan = plan_stages(config, StageCache(tmp_path / "stages", client=client))
+    assert actions(plan) == [("train", True), ("validate", True), ("register", True)]
+    assert plan[0]["reason"] == "no earlier result"
+
+
+def test_a_changed_evaluation_block_reruns_validate_and_register(tmp_path, config, client):
+    record_all(config, StageCache(tmp_path / "stages", client=client))
+    config["evaluation"] = {"gate_on": "lower_bound"}
+    plan = plan_stages(config, StageCache(tmp_path / "stages", client=client))
+    assert actions(plan) == [("train", True), ("validate", True), ("register", True)]
+    assert "evaluation" in plan[0]["reason"]
+
+    config["metrics_threshold"] = {"accuracy": 0.9}
+    record_all(config, StageCache(tmp_path / "stages", client=client))
+    config["metrics_threshold"] = {"accuracy": 0.95}
+    plan = plan_stages(config, StageCache(tmp_path / "stages", client=client))
+    assert actions(plan) == [("train", False), ("validate", True), ("register", True)]
+    assert plan[1]["reason"] == "changed: metrics_threshold"
+
+
+def test_changed_data_reruns_training(tmp_path, config, client):
+    record_all(config, StageCache(tmp_path / "stages", client=client))
+    with open(config["data"]["path"], "a") as f:
+        f.write("0.5,1\n")
+    plan = plan_stages(config, StageCache(tmp_path / "stages", client=client))
+    assert actions(plan)[0] == ("train", True) and plan[0]["reason"] == "changed: dataset"
+
+
+def test_deleted_runs_missing_outputs_and_force_rerun(tmp_path, config, client):
+    output = tmp_path / "run_id_lr.txt"
+    output.write_text("x")
+    run_id = record_all(config, StageCache(tmp_path / "stages", client=client), outputs=[output])
+
+    output.unlink()
+    assert plan_stages(config, StageCache(tmp_path / "stages", client=client))[0]["reason"].startswith("outputs missing")
+    output.write_text("x")
+    client.delete_run(run_id)
+    assert "no longer exists" in plan_stages(config, StageCache(tmp_path / "stages", client=client))[0]["reason"]
+    assert actions(plan_stages(config, StageCache(tmp_path / "stages", force=True, client=client)))[0] == ("train", True)
+
+
+def test_a_rejected_model_is_not_registered(tmp_path, config, client):
+    record_all(config, StageCache(tmp_path / "stages", client=client), accepted=False)
+    plan = plan_stages(config, StageCache(tmp_path / "stages", client=client))
+    assert actions(plan) == [("train", False), ("validate", False), ("register", False)]
+    assert plan[2]["reason"] == "model was rejected"
+
+
+def test_parallel_saves_keep_each_others_records(tmp_path, client):
+    first, second = StageCache(tmp_path / "stages", client=client), StageCache(tmp_path / "stages", client=client)
+    first.record("train", "model_lr", {"code": "a"})
+    second.record("train", "model_rf", {"code": "b"})
+    first.save()
+    second.save()
+    assert set(StageCache(tmp_path / "stages", client=client).records) == {"train:model_lr", "train:model_rf"}
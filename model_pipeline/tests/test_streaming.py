@@ -0,0 +1,71 @@
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.datasets import make_classification
+from sklearn.linear_model import LogisticRegression
+
+from helper.metrics import compute_metrics
+from helper.model_registry import get_model_entry
+from helper.streaming import evaluate_streaming, fit_lr_streaming, fit_rf_streaming
+
+
+def test_rf_streaming_grows_every_tree_when_the_last_chunks_miss_a_class():
+    rng = np.random.default_rng(0)
+    X = pd.DataFrame(rng.normal(size=(1000, 5)))
+    y = pd.Series(rng.integers(0, 2, size=1000))
+    y.iloc[800:] = 0    # the last two chunks hold one class
+
+    model = fit_rf_streaming(X, y, np.arange(1000), {"n_estimators": 20, "max_depth": 4}, {"chunk_rows": 100})
+    assert len(model.estimators_) == 20
+    assert all(len(tree.classes_) == 2 for tree in model.estimators_)
+
+
+def lr_data(scales, offsets):
+    X, y = make_classification(n_samples=40_000, n_features=8, n_informative=5, random_state=0)
+    X = (X - X.mean(axis=0)) / X.std(axis=0) * scales + offsets
+    return pd.DataFrame(X, columns=[f"feature_{i}" for i in range(8)]), pd.Series(y)
+
+
+def fit_streaming_and_batch(X, y):
+    train_rows = np.arange(30_000)
+    streamed = fit_lr_streaming(X, y, train_rows, {"C": 1.0}, {"chunk_rows": 5_000, "epochs": 5})
+    batch = get_model_entry({"name": "lr", "type": "logistic_regression"})["build"]({"max_iter": 1000})
+    batch.fit(X.iloc[train_rows], y.iloc[train_rows])
+    return streamed, batch
+
+
+def test_lr_streaming_matches_the_batch_objective_on_unit_variance_features():
+    rng = np.random.default_rng(0)
+    X, y = lr_data(1.0, rng.uniform(-5, 5, size=8))
+    streamed, _ = fit_streaming_and_batch(X, y)
+    # The batch optimum, converged past lbfgs' default tol (offset features are ill-conditioned)
+    batch = LogisticRegression(C=1.0, tol=1e-10, max_iter=10_000).fit(X.iloc[:30_000], y.iloc[:30_000])
+
+    # One linear model on raw features, no preprocessing step in front of it
+    assert list(streamed.feature_names_in_) == list(X.columns)
+    assert np.abs(streamed.coef_ - batch.coef_).sum() / np.abs(batch.coef_).sum() < 0.02
+    assert streamed.intercept_ == pytest.approx(batch.intercept_, rel=0.01)
+    X_test = X.iloc[30_000:]
+    assert np.mean(streamed.predict(X_test) == batch.predict(X_test)) > 0.995
+
+
+def test_lr_streaming_predicts_like_the_batch_model_on_raw_scales():
+    rng = np.random.default_rng(1)
+    X, y = lr_data(rng.uniform(0.1, 20, size=8), rng.uniform(-50, 50, size=8))
+    streamed, batch = fit_streaming_and_batch(X, y)
+    X_test, y_test = X.iloc[30_000:], y.iloc[30_000:]
+    assert np.mean(streamed.predict(X_test) == batch.predict(X_test)) > 0.98
+    assert np.mean(streamed.predict(X_test) == y_test) >= np.mean(batch.predict(X_test) == y_test) - 0.01
+
+
+@pytest.mark.parametrize("n_classes, pos_label, average", [(2, 0, None), (2, 1, "macro"), (3, 2, "weighted")])
+def test_streaming_metrics_match_the_in_memory_ones(n_classes, pos_label, average):
+    X, y = make_classification(n_samples=3000, n_features=6, n_informative=4, n_classes=n_classes, random_state=0)
+    X, y = pd.DataFrame(X), pd.Series(y)
+    model = LogisticRegression().fit(X.iloc[:2000], y.iloc[:2000])
+    test_rows = np.arange(2000, 3000)
+
+    streamed = evaluate_streaming(model, X, y, test_rows, chunk_rows=128, pos_label=pos_label, average=average)
+    expected = compute_metrics(y.iloc[test_rows].to_numpy(), model.predict(X.iloc[test_rows]), model.classes_,
+                               pos_label, average)
+    assert streamed == pytest.approx(expected)
@@ -0,0 +1,45 @@
+import pytest
+
+from helper import synthetic_data
+from helper.synthetic_data import _part_paths, generate_dataset, generate_shard, get_generation_config
+
+
+def params_for(fmt):
+    return get_generation_config({"data_generation": {
+        "n_samples": 2500, "shard_rows": 1000, "chunk_rows": 300, "format": fmt, "weights": [0.7, 0.3]}})
+
+
+def part_bytes(params, directory, index):
+    return [(directory / name).read_bytes() for name in _part_paths(params, index) if name]
+
+
+@pytest.mark.parametrize("fmt", ["parquet", "npy", "csv"])
+def test_any_shard_regenerated_alone_is_byte_identical(tmp_path, fmt):
+    params = params_for(fmt)
+    serial = generate_dataset(params, tmp_path / "serial", workers=1)
+    parallel = generate_dataset(params, tmp_path / "parallel", workers=3)
+    assert serial["shards"] == parallel["shards"]
+
+    for index in range(len(serial["shards"])):
+        alone = generate_dataset(params, tmp_path / f"shard_{index}", workers=2, shards=[index])
+        assert alone["shards"] == [serial["shards"][index]]
+        expected = part_bytes(params, tmp_path / "serial", index)
+        assert part_bytes(params, tmp_path / "parallel", index) == expected
+        assert part_bytes(params, tmp_path / f"shard_{index}", index) == expected
+
+
+@pytest.mark.parametrize("fmt", ["parquet", "npy", "csv"])
+def test_a_failed_shard_leaves_no_part_files(tmp_path, monkeypatch, fmt):
+    sample = synthetic_data._sample
+    calls = []
+
+    def failing_sample(*args):
+        calls.append(1)
+        if len(calls) == 2:
+            raise RuntimeError("generation failed")
+        return sample(*args)
+
+    monkeypatch.setattr(synthetic_data, "_sample", failing_sample)
+    with pytest.raises(RuntimeError):
+        generate_shard(params_for(fmt), 0, tmp_path)
+    assert list(tmp_path.iterdir()) == []
@@ -0,0 +1,110 @@
+import json
+import subprocess
+import sys
+import time
+
+import pytest
+import yaml
+
+from helper import warm_runner
+from helper.warm_runner import SCRIPTS_DIR, WarmRunner
+
+# Stand-ins for the stage scripts, imported by the forked children
+STAGES = {
+    "ok_stage": """
+import json, sys
+
+def main(argv, config):
+    print("stage output")
+    with open(argv[argv.index("--out") + 1], "w") as f:
+        json.dump({"argv": argv, "config": config}, f)
+""",
+    "failing_stage": """
+def main(argv, config):
+    raise RuntimeError("stage failed")
+""",
+    "hanging_stage": """
+import subprocess, time
+
+def main(argv, config):
+    worker = subprocess.Popen(["sleep", "60"])
+    with open(argv[argv.index("--pid-file") + 1], "w") as f:
+        f.write(str(worker.pid))
+    time.sleep(60)
+""",
+}
+
+
+@pytest.fixture(scope="module")
+def runner(tmp_path_factory):
+    stages_dir = tmp_path_factory.mktemp("stages")
+    for name, source in STAGES.items():
+        (stages_dir / f"{name}.py").write_text(source)
+    # The forkserver takes sys.path as it is when it starts
+    sys.path.insert(0, str(stages_dir))
+    try:
+        yield WarmRunner(["json"]).start()
+    finally:
+        sys.path.remove(str(stages_dir))
+
+
+@pytest.fixture
+def stages(monkeypatch):
+    monkeypatch.setattr(warm_runner, "STAGE_MODULES", {f"{name}.py": name for name in STAGES})
+
+
+def argv(stage, *args):
+    return [sys.executable, str(SCRIPTS_DIR / f"{stage}.py"), *args]
+
+
+def is_running(pid):
+    try:
+        with open(f"/proc/{pid}/stat") as f:
+            return f.read().rsplit(")", 1)[1].split()[0] not in ("Z", "X")
+    except FileNotFoundError:
+        return False
+
+
+def test_can_run_only_stage_scripts_of_this_scripts_directory(tmp_path):
+    runner = WarmRunner()
+    assert runner.can_run(argv("train", "--config", "job.yaml"))
+    assert runner.can_run(argv("register_model"))
+    assert not runner.can_run(argv("score"))                                   # not a warm stage
+    assert not runner.can_run([sys.executable, str(tmp_path / "train.py")])   # another directory
+    assert not runner.can_run(["/usr/bin/python2", str(SCRIPTS_DIR / "train.py")])
+    assert not runner.can_run([sys.executable])
+
+
+def test_a_stage_gets_its_args_and_the_parsed_config(tmp_path, runner, stages):
+    config_path = tmp_path / "job.yaml"
+    config_path.write_text(yaml.safe_dump({"data": {"path": "train.csv"}}))
+    out = tmp_path / "out.json"
+    with open(tmp_path / "step.log", "w") as log:
+        exitcode, timings = runner.execute(argv("ok_stage", "--config", str(config_path), "--out", str(out)), log)
+
+    assert exitcode == 0
+    assert json.loads(out.read_text()) == {"argv": ["--config", str(config_path), "--out", str(out)],
+                                           "config": {"data": {"path": "train.csv"}}}
+    assert {"startup_s", "import_s", "run_s", "max_rss_mb"} <= timings.keys()
+    assert "stage output" in (tmp_path / "step.log").read_text()
+
+
+def test_a_failing_stage_exits_1_and_still_reports_timings(tmp_path, runner, stages):
+    with open(tmp_path / "step.log", "w") as log:
+        exitcode, timings = runner.execute(argv("failing_stage"), log)
+
+    assert exitcode == 1
+    assert {"startup_s", "import_s"} <= timings.keys() and "run_s" not in timings
+    assert "RuntimeError: stage failed" in (tmp_path / "step.log").read_text()
+
+
+def test_a_timeout_kills_the_stage_and_its_workers(tmp_path, runner, stages):
+    pid_file = tmp_path / "worker.pid"
+    with open(tmp_path / "step.log", "w") as log, pytest.raises(subprocess.TimeoutExpired):
+        runner.execute(argv("hanging_stage", "--pid-file", str(pid_file)), log, timeout_s=2)
+
+    worker_pid = int(pid_file.read_text())
+    deadline = time.time() + 5
+    while is_running(worker_pid) and time.time() < deadline:
+        time.sleep(0.05)
+    assert not is_running(worker_pid)